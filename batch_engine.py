@@ -0,0 +1,241 @@
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+
+# truck states, in the same order as the mining_truck state machine
+START_MINING = 0
+MINING_IN_PROGRESS = 1
+TRAVEL_TO_UNLOAD = 2
+WAIT_TO_UNLOAD = 3
+UNLOADING = 4
+LOAD_COMPLETE = 5
+
+class batch_engine:
+    """
+    Represents a batch of Lunar Helium-3 simulations run together with NumPy.
+
+    Each replication follows the same minute by minute rules as the mining_truck
+    state machine and the station_manager, but the truck and station state of
+    every replication is held in arrays with shape (replications, trucks) and
+    (replications, stations) and all replications are advanced at once.
+
+    Like the station_manager, a released station is handed at once to the next
+    truck in its queue, or to the first truck of the longest queue. Station
+    queues are linked lists through one (replications, trucks) array, so they
+    take memory for at most one entry per truck.
+
+    Arriving and releasing trucks are run in truck ID order within each
+    replication, in rounds over the replications, so a minute takes as many
+    rounds as the most such trucks in one replication. The arrays are advanced
+    every minute whatever happens, so the batch is only faster than the event
+    engine from a few hundred replications on.
+
+    Attributes:
+        num_replications (int): Number of replications to run together.
+        num_mining_trucks (int): Number of mining trucks in operation.
+        num_unload_stations (int): Number of unloading stations in operation.
+        sim_duration_hrs (int): Simulator duration in hours.
+        truck_unload_duration (int): Truck unloading duration in minutes.
+        travel_to_unload (int): Travel to unload duration in minutes.
+        mining_duration_min_hrs (int): Mining duration minimum amount of hours.
+        mining_duration_max_hrs (int): Mining duration max amount of hours.
+        seed (int): Seed for the mining duration draws (Optional).
+        mining_durations (np.ndarray): Mining duration in minutes per replication
+                                       and truck, overrides the random draws (Optional).
+
+    Methods:
+        run(): Runs all replications and returns total loads per replication.
+    """
+
+    def __init__(self,
+                num_replications : int,
+                num_mining_trucks : int,
+                num_unload_stations : int,
+                sim_duration_hrs : int,
+                truck_unload_duration : int,
+                travel_to_unload : int,
+                mining_duration_min_hrs : int,
+                mining_duration_max_hrs : int,
+                seed : int = None,
+                mining_durations : np.ndarray = None):
+        """
+        Initializes the batch_engine class with all simulator attributes.
+
+        Args:
+            num_replications (int): Number of replications to run together.
+            num_mining_trucks (int): Number of mining trucks in operation.
+            num_unload_stations (int): Number of unloading stations in operation.
+            sim_duration_hrs (int): Simulator duration in hours.
+            truck_unload_duration (int): Truck unloading duration in minutes.
+            travel_to_unload (int): Travel to unload duration in minutes.
+            mining_duration_min_hrs (int): Mining duration minimum amount of hours.
+            mining_duration_max_hrs (int): Mining duration max amount of hours.
+            seed (int): Seed for the mining duration draws (Optional).
+            mining_durations (np.ndarray): Mining duration in minutes per replication
+                                           and truck, overrides the random draws (Optional).
+        """
+        self.num_replications = num_replications
+        self.num_mining_trucks = num_mining_trucks
+        self.num_unload_stations = num_unload_stations
+        self.truck_unload_duration = truck_unload_duration
+        self.travel_to_unload = travel_to_unload
+
+        # convert time to minutes
+        self.mining_duration_min = mining_duration_min_hrs * 60
+        self.mining_duration_max = mining_duration_max_hrs * 60
+        self.sim_duration = sim_duration_hrs * 60
+
+        shape = (num_replications, num_mining_trucks)
+        if mining_durations is None:
+            rng = np.random.default_rng(seed)
+            if float(self.mining_duration_min).is_integer() and float(self.mining_duration_max).is_integer():
+                mining_durations = rng.integers(self.mining_duration_min, self.mining_duration_max,
+                                                size=shape, endpoint=True)
+            else:
+                mining_durations = rng.uniform(self.mining_duration_min, self.mining_duration_max, size=shape)
+        self.mining_durations = np.asarray(mining_durations, dtype=np.float64).reshape(shape)
+
+        # initialize results
+        self.total_loads = None
+        self.truck_loads = None
+        self.station_served = None
+
+    def run(self) -> np.ndarray:
+        """
+        Runs all replications.
+
+        Returns:
+            np.ndarray: Total loads completed per replication.
+        """
+        R, N, S = self.num_replications, self.num_mining_trucks, self.num_unload_stations
+        unload_duration = self.truck_unload_duration
+        travel_duration = self.travel_to_unload
+        mining_duration = self.mining_durations
+
+        # truck arrays (replications, trucks)
+        state = np.full((R, N), START_MINING, dtype=np.int8)
+        start_time = np.zeros((R, N))
+        elapsed_unloading = np.zeros((R, N))
+        assigned = np.full((R, N), -1, dtype=np.int64)
+        in_queue = np.zeros((R, N), dtype=bool)
+        loads = np.zeros((R, N), dtype=np.int64)
+
+        # station arrays (replications, stations), each queue is a linked list through
+        # next_queued, which holds the truck queued after each truck of a replication
+        available = np.ones((R, S), dtype=bool)
+        served = np.zeros((R, S), dtype=np.int64)
+        queue_first = np.full((R, S), -1, dtype=np.int64)
+        queue_last = np.full((R, S), -1, dtype=np.int64)
+        queue_len = np.zeros((R, S), dtype=np.int64)
+        next_queued = np.full((R, N), -1, dtype=np.int64)
+
+        # set all initial states to start_mining
+        state[:] = MINING_IN_PROGRESS
+
+        current_time = 1
+        while current_time < self.sim_duration:
+            snapshot = state.copy()
+
+            # states that do not look at the stations run for every truck at once
+            starting = snapshot == START_MINING
+            start_time[starting] = current_time
+            state[starting] = MINING_IN_PROGRESS
+
+            done_mining = (snapshot == MINING_IN_PROGRESS) & (current_time - start_time >= mining_duration)
+            start_time[done_mining] = current_time
+            state[done_mining] = TRAVEL_TO_UNLOAD
+
+            done_traveling = (snapshot == TRAVEL_TO_UNLOAD) & (current_time - start_time >= travel_duration)
+            state[done_traveling] = WAIT_TO_UNLOAD
+
+            unloading = snapshot == UNLOADING
+            still_unloading = unloading & (elapsed_unloading < unload_duration)
+            elapsed_unloading[still_unloading] += 1
+            state[unloading & ~still_unloading] = LOAD_COMPLETE
+
+            # waiting and releasing trucks share the stations, so each replication runs them
+            # in truck ID order: round k runs the k-th such truck of every replication at once.
+            # Queued trucks only wait for a station to be handed to them.
+            releasing = snapshot == LOAD_COMPLETE
+            act_rows, act_trucks = np.nonzero(releasing | ((snapshot == WAIT_TO_UNLOAD) & ~in_queue))
+            if act_rows.size:
+                rank = np.arange(act_rows.size) - np.searchsorted(act_rows, act_rows)
+                order = np.argsort(rank, kind="stable")
+                bounds = np.searchsorted(rank[order], np.arange(rank.max() + 2))
+            else:
+                bounds = [0]
+            for first, last in zip(bounds[:-1], bounds[1:]):
+                round_rows = act_rows[order[first:last]]
+                round_trucks = act_trucks[order[first:last]]
+                is_release = releasing[round_rows, round_trucks]
+
+                release_rows = round_rows[is_release]
+                if release_rows.size:
+                    truck = round_trucks[is_release]
+                    station = assigned[release_rows, truck]
+                    elapsed_unloading[release_rows, truck] = 0
+                    served[release_rows, station] += 1
+                    available[release_rows, station] = True
+                    loads[release_rows, truck] += 1
+                    state[release_rows, truck] = START_MINING
+
+                    # hand the station to its next queued truck, or to the head of the longest queue
+                    queued_at = np.where(queue_len[release_rows, station] > 0, station,
+                                         queue_len[release_rows].argmax(axis=1))
+                    has_queue = queue_len[release_rows, queued_at] > 0
+                    handoff_rows = release_rows[has_queue]
+                    if handoff_rows.size:
+                        station = station[has_queue]
+                        queued_at = queued_at[has_queue]
+                        handed = queue_first[handoff_rows, queued_at]
+                        queue_first[handoff_rows, queued_at] = next_queued[handoff_rows, handed]
+                        queue_len[handoff_rows, queued_at] -= 1
+                        in_queue[handoff_rows, handed] = False
+                        available[handoff_rows, station] = False
+                        assigned[handoff_rows, handed] = station
+                        start_time[handoff_rows, handed] = current_time
+                        elapsed_unloading[handoff_rows, handed] = 0
+                        state[handoff_rows, handed] = UNLOADING
+
+                # a truck handed a station earlier this minute no longer waits
+                truck = round_trucks[~is_release]
+                still_waiting = state[round_rows[~is_release], truck] == WAIT_TO_UNLOAD
+                wait_rows = round_rows[~is_release][still_waiting]
+                if wait_rows.size:
+                    truck = truck[still_waiting]
+                    free = available[wait_rows] & (queue_len[wait_rows] == 0)
+                    has_free = free.any(axis=1)
+
+                    # assign the truck to the first available station
+                    assign_rows = wait_rows[has_free]
+                    assign_trucks = truck[has_free]
+                    station = free[has_free].argmax(axis=1)
+                    available[assign_rows, station] = False
+                    assigned[assign_rows, assign_trucks] = station
+                    start_time[assign_rows, assign_trucks] = current_time
+                    state[assign_rows, assign_trucks] = UNLOADING
+
+                    # otherwise queue the truck at the station with the least queue
+                    queue_rows = wait_rows[~has_free]
+                    queue_trucks = truck[~has_free]
+                    station = queue_len[queue_rows].argmin(axis=1)
+                    empty = queue_len[queue_rows, station] == 0
+                    queue_first[queue_rows[empty], station[empty]] = queue_trucks[empty]
+                    next_queued[queue_rows[~empty], queue_last[queue_rows[~empty], station[~empty]]] = queue_trucks[~empty]
+                    queue_last[queue_rows, station] = queue_trucks
+                    next_queued[queue_rows, queue_trucks] = -1
+                    queue_len[queue_rows, station] += 1
+                    in_queue[queue_rows, queue_trucks] = True
+                    assigned[queue_rows, queue_trucks] = station
+
+            # update time (every minute)
+            current_time += 1
+
+        self.truck_loads = loads
+        self.station_served = served
+        self.total_loads = loads.sum(axis=1)
+
+        logger.info(f"Batch of {R} replications with {N} trucks and {S} unload stations: "
+                    f"mean total loads {self.total_loads.mean():.2f}")
+
+        return self.total_loads
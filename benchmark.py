@@ -0,0 +1,223 @@
+from simulator import lunar_Helium_3_sim
+from log_setup import configure_logger
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import logging
+logger = logging.getLogger(__name__)
+
+# parameters shared by every benchmark case
+BASE_CONFIG = dict(truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+# (engine, trucks, stations, hours) per case. The tick engines step every truck
+# every minute, so their largest cases are smaller than the event engine's.
+SUITES = {
+    "quick": [("tick", 10, 2, 72), ("fleet", 10, 2, 72), ("event", 10, 2, 72),
+              ("event", 100, 10, 720), ("fleet", 1000, 100, 72)],
+    "full": [("tick", 10, 2, 72), ("tick", 100, 10, 72), ("tick", 100, 10, 720), ("tick", 1000, 100, 72),
+             ("fleet", 10, 2, 72), ("fleet", 1000, 100, 72), ("fleet", 10000, 1000, 72),
+             ("event", 10, 2, 72), ("event", 10, 2, 8760), ("event", 100, 10, 720), ("event", 100, 10, 8760),
+             ("event", 1000, 100, 720), ("event", 10000, 1000, 72), ("event", 100000, 10000, 72)],
+}
+
+class transition_counter:
+    """
+    Represents an observer that counts truck state transitions.
+
+    Methods:
+        update_current_time(): Does nothing, part of the observer interface.
+        truck_state_changed(): Counts a truck state change.
+        station_changed(): Does nothing, part of the observer interface.
+    """
+    def __init__(self):
+        """
+        Initializes the transition_counter class.
+        """
+        self.transitions = 0
+
+    def update_current_time(self, current_time : float) -> None:
+        pass
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        self.transitions += 1
+
+    def station_changed(self, station : object) -> None:
+        pass
+
+def case_name(engine : str, trucks : int, stations : int, hours : int) -> str:
+    """
+    Returns the name of a benchmark case, e.g. "event-100t-10s-720h".
+
+    Returns:
+        str: Case name.
+    """
+    return f"{engine}-{trucks}t-{stations}s-{hours}h"
+
+def run_case(engine : str, trucks : int, stations : int, hours : int, seed : int = 0,
+             repeat : int = 1, measure_memory : bool = True) -> dict:
+    """
+    Runs one benchmark case. The wall time is the best of repeat runs. Peak
+    memory is measured with tracemalloc in a separate run, since tracing
+    slows the simulation down.
+
+    Args:
+        engine (str): Simulation engine.
+        trucks (int): Number of mining trucks.
+        stations (int): Number of unload stations.
+        hours (int): Simulation duration in hours.
+        seed (int): Seed of every run.
+        repeat (int): Number of timed runs.
+        measure_memory (bool): Measure the peak memory.
+    Returns:
+        dict: Case result with wall_time_s, sim_minutes_per_s, transitions,
+              transitions_per_s, peak_memory_bytes and total_loads.
+    """
+    def run() -> tuple:
+        sim = lunar_Helium_3_sim(num_mining_trucks=trucks, num_unload_stations=stations,
+                                 sim_duration_hrs=hours, engine=engine, seed=seed, **BASE_CONFIG)
+        counter = transition_counter()
+        start = time.perf_counter()
+        sim.setup()
+        if engine == "fleet":
+            sim.mining_trucks.observer = counter
+        else:
+            for truck in sim.mining_trucks:
+                truck.observer = counter
+        sim.advance(sim.sim_duration)
+        total_loads = sim.finish()
+        return time.perf_counter() - start, counter.transitions, total_loads
+
+    wall_time, transitions, total_loads = min(run() for n in range(repeat))
+
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"name": case_name(engine, trucks, stations, hours),
+            "engine": engine,
+            "num_mining_trucks": trucks,
+            "num_unload_stations": stations,
+            "sim_duration_hrs": hours,
+            "wall_time_s": wall_time,
+            "sim_minutes_per_s": hours * 60 / wall_time,
+            "transitions": transitions,
+            "transitions_per_s": transitions / wall_time,
+            "peak_memory_bytes": peak_memory,
+            "total_loads": total_loads}
+
+def run_suite(suite : str = "quick", repeat : int = 1, measure_memory : bool = True) -> dict:
+    """
+    Runs every case of a benchmark suite.
+
+    Args:
+        suite (str): Suite name from SUITES.
+        repeat (int): Number of timed runs per case.
+        measure_memory (bool): Measure the peak memory of every case.
+    Returns:
+        dict: Benchmark report with the environment and one result per case.
+    """
+    if suite not in SUITES:
+        raise ValueError(f"Unknown benchmark suite: {suite}")
+
+    results = []
+    for case in SUITES[suite]:
+        result = run_case(*case, repeat=repeat, measure_memory=measure_memory)
+        logger.info(format_result(result))
+        results.append(result)
+
+    return {"suite": suite,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results}
+
+def format_result(result : dict) -> str:
+    """
+    Returns one line summarizing a benchmark case result.
+
+    Args:
+        result (dict): Result from run_case().
+    Returns:
+        str: Wall time, throughputs and peak memory of the case.
+    """
+    return (f"{result['name']}: {result['wall_time_s']:.3f} s, "
+            f"{result['sim_minutes_per_s']:.0f} sim min/s, "
+            f"{result['transitions_per_s']:.0f} transitions/s, "
+            f"peak memory {result['peak_memory_bytes']} bytes")
+
+def compare(report : dict, baseline : dict, threshold : float = 0.1) -> list:
+    """
+    Compares a benchmark report to a baseline and returns the regressions:
+    cases whose wall time or peak memory grew by more than the threshold.
+    Cases missing from the baseline are skipped.
+
+    Args:
+        report (dict): Report from run_suite().
+        baseline (dict): Baseline report from run_suite().
+        threshold (float): Allowed relative growth, e.g. 0.1 for 10%.
+    Returns:
+        list: List of dicts with name, metric, baseline, current and change.
+    """
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        baseline_result = baseline_results.get(result["name"])
+        if baseline_result is None:
+            continue
+        for metric in ("wall_time_s", "peak_memory_bytes"):
+            current, previous = result.get(metric), baseline_result.get(metric)
+            if not current or not previous:
+                continue
+            change = current / previous - 1
+            if change > threshold:
+                regressions.append({"name": result["name"], "metric": metric,
+                                    "baseline": previous, "current": current, "change": change})
+    return regressions
+
+def main(argv : list = None) -> int:
+    """
+    Runs a benchmark suite from the command line, writes the report and
+    compares it to a baseline.
+
+    Args:
+        argv (list): Command line arguments (Optional).
+    Returns:
+        int: Exit status, 1 if a regression was found.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the lunar Helium-3 simulator.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory run")
+    parser.add_argument("--output", default="benchmark.json", help="report file")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline report to compare to")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative growth")
+    args = parser.parse_args(argv)
+
+    # no log file, only warnings on the console, the results go to stdout
+    configure_logger("quiet", log_file=False)
+    report = run_suite(args.suite, repeat=args.repeat, measure_memory=not args.no_memory)
+    for result in report["results"]:
+        print(format_result(result))
+    with open(args.output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+
+    if args.compare is None:
+        return 0
+    with open(args.compare) as baseline_file:
+        regressions = compare(report, json.load(baseline_file), args.threshold)
+    for regression in regressions:
+        print(f"Regression in {regression['name']}: {regression['metric']} "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['change']:+.1%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+from sweep import run_one, derive_seed, check_config
+from replication import confidence_interval
+from run_statistics import running_stats
+from mva import mva_estimator
+from distributions import duration_distribution
+
+import math
+import multiprocessing
+import logging
+logger = logging.getLogger(__name__)
+
+class capacity_planner:
+    """
+    Represents a search for the cheapest truck and station counts that reach a
+    target number of loads.
+
+    For each station count, the fewest trucks that reach the target are found
+    by bisection, since loads never go down when a truck is added. Loads never
+    go down when a station is added either, so the trucks needed with S stations
+    are an upper bound for S + 1 stations, and the search over S stops as soon
+    as the cheapest configuration S stations could possibly have costs more than
+    the best one found. Station counts that cannot reach the target even with
+    every station busy all the time are skipped without simulating, and the
+    first bisection starts from the mva_estimator answer. With per-cycle
+    duration distributions the bounds use their smallest durations and the
+    mva_estimator their means. Road networks are not supported.
+
+    Every configuration is run num_replications times on a process pool with
+    common random numbers and the same seeds, so configurations are compared on
+    the same randomness. To keep a pool wider than num_replications busy, each
+    bisection step runs parallel_candidates evenly spaced truck counts together
+    and narrows to the interval between the last one that misses the target
+    and the first one that reaches it. The station counts are still searched
+    one after the other, as each one starts from the previous answer.
+
+    Attributes:
+        base_config (dict): lunar_Helium_3_sim parameters other than the truck and station counts.
+        target_loads (float): Loads to reach in sim_duration_hrs.
+        truck_cost (float): Cost of one truck.
+        station_cost (float): Cost of one station.
+        max_trucks (int): Largest truck count searched.
+        max_stations (int): Largest station count searched.
+        num_replications (int): Replications per configuration.
+        confidence (float): Confidence level of the load intervals.
+        conservative (bool): Require the lower bound of the interval to reach the
+                             target instead of the mean.
+        master_seed (int): Seed every run seed is derived from.
+        parallel_candidates (int): Truck counts run together per bisection step.
+        evaluations (dict): (trucks, stations) mapped to the evaluated result.
+        simulations (int): Number of simulations run.
+
+    Methods:
+        evaluate(): Runs the replications of one configuration.
+        evaluate_many(): Runs the replications of several configurations together.
+        feasible(): Returns True if a configuration reaches the target.
+        min_trucks(): Returns the fewest trucks that reach the target with S stations.
+        plan(): Returns the Pareto frontier and the cheapest configuration.
+    """
+
+    def __init__(self,
+                base_config : dict,
+                target_loads : float,
+                truck_cost : float = 1.0,
+                station_cost : float = 1.0,
+                max_trucks : int = 1000,
+                max_stations : int = 100,
+                num_replications : int = 5,
+                confidence : float = 0.95,
+                conservative : bool = False,
+                master_seed : int = 0,
+                pool : object = None,
+                parallel_candidates : int = 1):
+        """
+        Initializes the capacity_planner class.
+
+        Args:
+            base_config (dict): lunar_Helium_3_sim parameters other than the truck and station counts.
+            target_loads (float): Loads to reach in sim_duration_hrs.
+            truck_cost (float): Cost of one truck.
+            station_cost (float): Cost of one station.
+            max_trucks (int): Largest truck count searched.
+            max_stations (int): Largest station count searched.
+            num_replications (int): Replications per configuration, at least 2.
+            confidence (float): Confidence level of the load intervals.
+            conservative (bool): Require the lower bound of the interval to reach the target.
+            master_seed (int): Seed every run seed is derived from.
+            pool (multiprocessing.Pool): Pool to run the replications on (Optional).
+                                         Runs them in this process when not set.
+            parallel_candidates (int): Truck counts run together per bisection step.
+        """
+        if num_replications < 2:
+            raise ValueError(f"At least 2 replications are needed for an interval: {num_replications}")
+        if parallel_candidates < 1:
+            raise ValueError(f"At least 1 candidate has to be run per step: {parallel_candidates}")
+        if base_config.get("road_network") is not None:
+            raise ValueError("Capacity plans cannot bound the travel times of a road network")
+        check_config(base_config)
+
+        self.base_config = {name: value for name, value in base_config.items()
+                            if name not in ("num_mining_trucks", "num_unload_stations")}
+        self.target_loads = target_loads
+        self.truck_cost = truck_cost
+        self.station_cost = station_cost
+        self.max_trucks = max_trucks
+        self.max_stations = max_stations
+        self.num_replications = num_replications
+        self.confidence = confidence
+        self.conservative = conservative
+        self.master_seed = master_seed
+        self.pool = pool
+        self.parallel_candidates = parallel_candidates
+
+        self.evaluations = {}
+        self.simulations = 0
+
+    def cost(self, trucks : int, stations : int) -> float:
+        """
+        Returns the cost of a configuration.
+
+        Args:
+            trucks (int): Number of trucks.
+            stations (int): Number of stations.
+        Returns:
+            float: Cost.
+        """
+        return trucks * self.truck_cost + stations * self.station_cost
+
+    def evaluate(self, trucks : int, stations : int) -> dict:
+        """
+        Runs the replications of one configuration, once per configuration.
+
+        Args:
+            trucks (int): Number of trucks.
+            stations (int): Number of stations.
+        Returns:
+            dict: Configuration with its cost, mean loads and interval.
+        """
+        return self.evaluate_many([(trucks, stations)])[0]
+
+    def evaluate_many(self, configurations : list) -> list:
+        """
+        Runs the replications of every configuration not evaluated yet in one
+        batch, so they share the pool.
+
+        Args:
+            configurations (list): (trucks, stations) tuples.
+        Returns:
+            list: Result of each configuration, in the input order.
+        """
+        missing = [key for key in dict.fromkeys(configurations) if key not in self.evaluations]
+        if not missing:
+            return [self.evaluations[key] for key in configurations]
+        tasks = []
+        for trucks, stations in missing:
+            config = {**self.base_config, "num_mining_trucks": trucks, "num_unload_stations": stations,
+                      "common_random_numbers": True}
+            tasks.extend((0, replication, derive_seed(self.master_seed, 0, replication), config)
+                         for replication in range(self.num_replications))
+        rows = list(self.pool.map(run_one, tasks) if self.pool is not None else map(run_one, tasks))
+
+        for index, (trucks, stations) in enumerate(missing):
+            loads = running_stats()
+            for row in rows[index * self.num_replications:(index + 1) * self.num_replications]:
+                loads.add(row["total_loads"])
+            self.simulations += self.num_replications
+
+            mean, half_width = confidence_interval(loads, self.confidence)
+            result = {"num_mining_trucks": trucks,
+                      "num_unload_stations": stations,
+                      "cost": self.cost(trucks, stations),
+                      "mean": mean,
+                      "half_width": half_width,
+                      "ci_low": mean - half_width,
+                      "ci_high": mean + half_width}
+            result["feasible"] = (result["ci_low"] if self.conservative else mean) >= self.target_loads
+            logger.debug(f"{trucks} trucks and {stations} stations: {mean:.1f} +/- {half_width:.1f} loads")
+            self.evaluations[(trucks, stations)] = result
+        return [self.evaluations[key] for key in configurations]
+
+    def feasible(self, trucks : int, stations : int) -> bool:
+        """
+        Returns True if a configuration reaches the target.
+
+        Args:
+            trucks (int): Number of trucks.
+            stations (int): Number of stations.
+        Returns:
+            bool: True if the target is reached.
+        """
+        return self.evaluate(trucks, stations)["feasible"]
+
+    def _bounds(self) -> tuple:
+        """
+        Returns bounds that need no simulation: the fewest trucks that could
+        reach the target if no truck ever waited, and the most loads one station
+        can serve when it is never idle.
+
+        Returns:
+            tuple: Tuple containing
+                - int: lower bound on the number of trucks
+                - float: upper bound on the loads per station
+        """
+        duration = self.base_config["sim_duration_hrs"] * 60
+        mining, travel, unload = (shortest for shortest, mean in self._durations())
+        fastest_cycle = mining + travel + unload + 4
+        min_trucks = max(math.ceil(self.target_loads / (duration / fastest_cycle)), 1)
+        # a queued truck holds the station for the unload duration plus one minute
+        station_loads = duration / (unload + 1)
+        return min_trucks, station_loads
+
+    def _durations(self) -> list:
+        """
+        Returns the shortest and the mean mining, travel and unloading duration
+        in minutes, from the per-cycle distributions when they are set.
+        """
+        config = self.base_config
+        fixed = {"mining": (config["mining_duration_min_hrs"] * 60,
+                            (config["mining_duration_min_hrs"] + config["mining_duration_max_hrs"]) * 30),
+                 "travel": (config["travel_to_unload"],) * 2,
+                 "unload": (config["truck_unload_duration"],) * 2}
+        durations = []
+        for name in ("mining", "travel", "unload"):
+            spec = config.get(f"{name}_distribution")
+            if spec is None:
+                durations.append(fixed[name])
+            else:
+                distribution = duration_distribution(spec)
+                durations.append((distribution.minimum(), distribution.mean()))
+        return durations
+
+    def _estimate_trucks(self, stations : int, low : int, high : int) -> int:
+        """
+        Returns the fewest trucks that reach the target according to the mva_estimator.
+        """
+        parameters = {name: self.base_config[name] for name in
+                      ("sim_duration_hrs", "truck_unload_duration", "travel_to_unload",
+                       "mining_duration_min_hrs", "mining_duration_max_hrs")}
+        mining, travel, unload = (mean for shortest, mean in self._durations())
+        if self.base_config.get("mining_distribution") is not None:
+            # drawn every cycle, so every truck averages the mean mining duration
+            parameters["mining_duration_min_hrs"] = parameters["mining_duration_max_hrs"] = mining / 60
+        parameters["travel_to_unload"] = travel
+        parameters["truck_unload_duration"] = unload
+        while low < high:
+            middle = (low + high) // 2
+            if mva_estimator(middle, stations, **parameters).solve()["expected_loads"] >= self.target_loads:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def min_trucks(self, stations : int, low : int, high : int = None) -> int:
+        """
+        Returns the fewest trucks that reach the target with the input station
+        count, by bisection between low and high. When high is not known to be
+        feasible, it is searched for from the mva_estimator answer up, doubling
+        the truck count. Each step runs parallel_candidates truck counts together.
+
+        Args:
+            stations (int): Number of stations.
+            low (int): Fewest trucks that could reach the target.
+            high (int): Truck count known to reach the target (Optional).
+        Returns:
+            int: Fewest trucks, or None if max_trucks do not reach the target.
+        """
+        if high is None:
+            candidate = self._estimate_trucks(stations, low, self.max_trucks)
+            while high is None:
+                candidates = [candidate]
+                while len(candidates) < self.parallel_candidates and candidates[-1] < self.max_trucks:
+                    candidates.append(min(candidates[-1] * 2, self.max_trucks))
+                for trucks, result in zip(candidates, self.evaluate_many([(trucks, stations) for trucks in candidates])):
+                    if result["feasible"]:
+                        high = trucks
+                        break
+                    low = trucks + 1
+                if high is None:
+                    if candidates[-1] >= self.max_trucks:
+                        return None
+                    candidate = min(candidates[-1] * 2, self.max_trucks)
+
+        while low < high:
+            # evenly spaced truck counts below high, the middle one with a single candidate
+            count = min(self.parallel_candidates, high - low)
+            candidates = sorted({low + (high - low) * (index + 1) // (count + 1) for index in range(count)})
+            for trucks, result in zip(candidates, self.evaluate_many([(trucks, stations) for trucks in candidates])):
+                if result["feasible"]:
+                    high = trucks
+                    break
+                low = trucks + 1
+        return high
+
+    def plan(self) -> dict:
+        """
+        Searches the station counts from 1 up and returns the Pareto frontier of
+        trucks and stations that reach the target, and the cheapest of them.
+
+        Returns:
+            dict: Dictionary containing
+                - best: cheapest configuration reaching the target, None if none does.
+                - frontier: configurations where no other one reaching the target
+                  has as few trucks and as few stations, by station count.
+                - simulations: number of simulations run.
+                - configurations: number of configurations simulated.
+        """
+        min_trucks, station_loads = self._bounds()
+        frontier = []
+        best = None
+        trucks = None
+        for stations in range(1, self.max_stations + 1):
+            if best is not None and self.cost(min_trucks, stations) >= best["cost"]:
+                # every larger station count costs more than the best configuration
+                break
+            if station_loads * stations < self.target_loads:
+                continue
+
+            found = self.min_trucks(stations, min_trucks, trucks)
+            if found is None:
+                continue
+            if trucks is not None and found == trucks:
+                # the added station did not save a truck
+                continue
+            trucks = found
+
+            result = self.evaluate(trucks, stations)
+            frontier.append(result)
+            if best is None or result["cost"] < best["cost"]:
+                best = result
+            if trucks == min_trucks:
+                # no station count can do with fewer trucks
+                break
+
+        logger.info(f"Capacity plan for {self.target_loads} loads: {best}, "
+                    f"{self.simulations} simulations of {len(self.evaluations)} configurations")
+        return {"best": best,
+                "frontier": frontier,
+                "simulations": self.simulations,
+                "configurations": len(self.evaluations)}
+
+def plan_capacity(base_config : dict, target_loads : float, processes : int = None, **kwargs) -> dict:
+    """
+    Returns the cheapest truck and station counts that reach target_loads, and
+    the Pareto frontier, running the replications on a process pool. See
+    capacity_planner for the other arguments. Unless parallel_candidates is
+    given, each bisection step runs enough truck counts to give every process a
+    replication.
+
+    Example:
+        plan_capacity(base_config, target_loads=500, truck_cost=1, station_cost=5)
+
+    Args:
+        base_config (dict): lunar_Helium_3_sim parameters other than the truck and station counts.
+        target_loads (float): Loads to reach in sim_duration_hrs.
+        processes (int): Number of worker processes, defaults to every core (Optional).
+        **kwargs: Other capacity_planner arguments.
+    Returns:
+        dict: Result of capacity_planner.plan().
+    """
+    processes = processes or multiprocessing.cpu_count()
+    with multiprocessing.Pool(processes) as pool:
+        planner = capacity_planner(base_config, target_loads, pool=pool, **kwargs)
+        if "parallel_candidates" not in kwargs:
+            # enough candidates per step to give every process a replication
+            planner.parallel_candidates = max(processes // planner.num_replications, 1)
+        return planner.plan()
@@ -0,0 +1,339 @@
+from fleet import STATE_NAMES
+
+import math
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+
+# stochastic inputs that can be drawn every cycle, with the truck state that
+# starts them and the truck attribute or truck_fleet column the draw goes to
+CYCLE_INPUTS = {"mining": ("mining_in_progress", "mining_duration", "mining_duration"),
+                "travel": ("travel_to_unload", "travel_to_unload_duration", "travel_durations"),
+                "unload": ("unloading", "unload_duration", "unload_durations")}
+
+class duration_distribution:
+    """
+    Represents a distribution of durations in minutes.
+
+    A distribution is described by a spec, a tuple of its kind and
+    parameters that can be stored in a snapshot, a sweep configuration or a
+    result_cache key:
+        ("constant", value)
+        ("uniform", low, high)
+        ("triangular", low, mode, high)
+        ("lognormal", mean, standard_deviation)
+        ("empirical", values) or ("empirical", values, weights)
+
+    Attributes:
+        spec (tuple): Kind and parameters of the distribution.
+        kind (str): Kind of distribution.
+
+    Methods:
+        sample(): Returns a block of random durations.
+        mean(): Returns the mean duration.
+        minimum(): Returns the smallest possible duration.
+    """
+
+    def __init__(self, spec : tuple):
+        """
+        Initializes the duration_distribution class and checks its parameters.
+
+        Args:
+            spec (tuple): Kind and parameters of the distribution.
+        """
+        if isinstance(spec, duration_distribution):
+            spec = spec.spec
+        if not spec or spec[0] not in ("constant", "uniform", "triangular", "lognormal", "empirical"):
+            raise ValueError(f"Unknown duration distribution: {spec}")
+
+        self.kind = spec[0]
+        self.spec = (self.kind, *spec[1:])
+        parameters = spec[1:]
+        if self.kind == "empirical":
+            if len(parameters) not in (1, 2) or not len(parameters[0]):
+                raise ValueError(f"Empirical distribution needs a list of values: {spec}")
+            self.values = np.asarray(parameters[0], dtype=float)
+            weights = np.asarray(parameters[1], dtype=float) if len(parameters) == 2 else np.ones(len(self.values))
+            if len(weights) != len(self.values) or (weights < 0).any() or weights.sum() <= 0:
+                raise ValueError(f"Empirical distribution needs one non-negative weight per value: {spec}")
+            self.weights = weights / weights.sum()
+            durations = self.values
+        else:
+            expected = {"constant": 1, "uniform": 2, "triangular": 3, "lognormal": 2}[self.kind]
+            if len(parameters) != expected:
+                raise ValueError(f"{self.kind} distribution takes {expected} parameters: {spec}")
+            self.parameters = tuple(float(parameter) for parameter in parameters)
+            durations = self.parameters
+            if self.kind == "uniform" and not self.parameters[0] <= self.parameters[1]:
+                raise ValueError(f"Uniform distribution needs low <= high: {spec}")
+            if self.kind == "triangular" and not self.parameters[0] <= self.parameters[1] <= self.parameters[2]:
+                raise ValueError(f"Triangular distribution needs low <= mode <= high: {spec}")
+            if self.kind == "lognormal" and self.parameters[0] <= 0:
+                raise ValueError(f"Lognormal distribution needs a positive mean: {spec}")
+        if min(durations) < 0:
+            raise ValueError(f"Durations cannot be negative: {spec}")
+
+    def sample(self, generator : np.random.Generator, size : int) -> np.ndarray:
+        """
+        Returns a block of random durations.
+
+        Args:
+            generator (np.random.Generator): Random generator to draw from.
+            size (int): Number of durations.
+        Returns:
+            np.ndarray: Durations in minutes.
+        """
+        kind = self.kind
+        if kind == "empirical":
+            return generator.choice(self.values, size, p=self.weights)
+        if kind == "constant":
+            return np.full(size, self.parameters[0])
+        if kind == "uniform":
+            return generator.uniform(*self.parameters, size)
+        if kind == "triangular":
+            low, mode, high = self.parameters
+            if low == high:
+                return np.full(size, low)
+            return generator.triangular(low, mode, high, size)
+        mean, deviation = self.parameters
+        # parameters of the underlying normal distribution for this mean and deviation
+        sigma = math.sqrt(math.log(1 + (deviation / mean) ** 2))
+        return generator.lognormal(math.log(mean) - sigma ** 2 / 2, sigma, size)
+
+    def mean(self) -> float:
+        """
+        Returns the mean duration.
+
+        Returns:
+            float: Mean duration in minutes.
+        """
+        if self.kind == "empirical":
+            return float(np.dot(self.values, self.weights))
+        if self.kind == "triangular":
+            return sum(self.parameters) / 3
+        if self.kind == "uniform":
+            return (self.parameters[0] + self.parameters[1]) / 2
+        return self.parameters[0]
+
+    def minimum(self) -> float:
+        """
+        Returns the smallest possible duration.
+
+        Returns:
+            float: Smallest duration in minutes, 0 for a lognormal distribution,
+                   which only comes close to it.
+        """
+        if self.kind == "empirical":
+            return float(self.values[self.weights > 0].min())
+        if self.kind == "lognormal":
+            return 0.0
+        return self.parameters[0]
+
+class duration_sampler:
+    """
+    Represents a source of random durations served from pre-generated blocks.
+
+    Durations are generated block_size at a time with NumPy and kept as a
+    Python list, so a draw is a list index and a counter, not a random
+    generator call. The sampler state is the generator state at the start of
+    the current block and the position in it, which is all a snapshot needs to
+    regenerate the block.
+
+    Attributes:
+        distribution (duration_distribution): Distribution of the durations.
+        block_size (int): Number of durations generated at a time.
+
+    Methods:
+        draw(): Returns the next duration.
+        getstate(): Returns the sampler state.
+        setstate(): Restores a sampler state.
+    """
+
+    def __init__(self, distribution : duration_distribution, seed : int = None, block_size : int = 65536):
+        """
+        Initializes the duration_sampler class and generates the first block.
+
+        Args:
+            distribution (duration_distribution): Distribution of the durations.
+            seed (int): Seed of the generator (Optional). Unseeded when not set.
+            block_size (int): Number of durations generated at a time.
+        """
+        if block_size < 1:
+            raise ValueError(f"Block size has to be at least 1: {block_size}")
+        self.distribution = distribution
+        self.block_size = block_size
+        self._generator = np.random.default_rng(seed)
+        self._refill()
+
+    def _refill(self) -> None:
+        """
+        Generates the next block of durations.
+        """
+        self._block_state = self._generator.bit_generator.state
+        self._block = self.distribution.sample(self._generator, self.block_size).tolist()
+        self._index = 0
+
+    def draw(self) -> float:
+        """
+        Returns the next duration.
+
+        Returns:
+            float: Duration in minutes.
+        """
+        index = self._index
+        if index == self.block_size:
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return self._block[index]
+
+    def getstate(self) -> list:
+        """
+        Returns the sampler state, as JSON serializable lists and numbers.
+
+        Returns:
+            list: Generator state at the start of the block and position in the block.
+        """
+        return [self._block_state, self._index]
+
+    def setstate(self, state : list) -> None:
+        """
+        Restores a state from getstate() by regenerating its block.
+
+        Args:
+            state (list): State from getstate().
+        Returns:
+            None
+        """
+        block_state, index = state
+        self._generator.bit_generator.state = block_state
+        self._refill()
+        self._index = index
+
+class cycle_durations:
+    """
+    Represents the per-cycle durations of every truck.
+
+    A truck draws a new duration when it starts mining, traveling or
+    unloading, for each input that has a distribution. The draw is written to
+    the truck attribute (mining_duration, travel_to_unload_duration,
+    unload_duration) or truck_fleet column the engines already read, so the
+    engines need no other change.
+
+    Every input has one duration_sampler shared by all trucks, drawn in the
+    order the trucks start their states. With common_random_numbers every
+    truck gets its own smaller sampler from its own substream seed instead, so
+    a truck's n-th duration is the same in every configuration.
+
+    Attributes:
+        distributions (dict): Input name mapped to its duration_distribution.
+        samplers (dict): (input name, truck ID or None) mapped to its duration_sampler.
+
+    Methods:
+        draw(): Draws the durations a mining_truck state starts with.
+        draw_fleet(): Draws the durations a truck_fleet state starts with.
+        getstate(): Returns the state of every sampler.
+        setstate(): Restores the state of every sampler.
+    """
+
+    def __init__(self,
+                distributions : dict,
+                seed_for : object,
+                per_truck : bool = False,
+                block_size : int = 65536,
+                truck_block_size : int = 16):
+        """
+        Initializes the cycle_durations class.
+
+        Args:
+            distributions (dict): Input name from CYCLE_INPUTS mapped to its distribution spec.
+            seed_for (function): Returns the seed of a sampler from the input name and
+                                 truck ID, None for a shared sampler.
+            per_truck (bool): Give every truck its own samplers.
+            block_size (int): Block size of the shared samplers.
+            truck_block_size (int): Block size of the per truck samplers.
+        """
+        self.distributions = {name: duration_distribution(spec) for name, spec in distributions.items()}
+        self.seed_for = seed_for
+        self.per_truck = per_truck
+        self.block_size = block_size
+        self.truck_block_size = truck_block_size
+        self.samplers = {}
+
+        # truck state name and fleet state code mapped to (attribute, input)
+        self._by_state = {}
+        self._by_phase = {}
+        for name in self.distributions:
+            state, attribute, column = CYCLE_INPUTS[name]
+            self._by_state[state] = (attribute, name)
+            self._by_phase[STATE_NAMES.index(state)] = (column, name)
+
+    def sampler(self, name : str, truck_ID : int) -> duration_sampler:
+        """
+        Returns the sampler a truck draws an input from.
+
+        Args:
+            name (str): Input name.
+            truck_ID (int): Truck ID.
+        Returns:
+            duration_sampler: Sampler of the input.
+        """
+        key = (name, truck_ID if self.per_truck else None)
+        sampler = self.samplers.get(key)
+        if sampler is None:
+            block_size = self.truck_block_size if self.per_truck else self.block_size
+            sampler = duration_sampler(self.distributions[name], self.seed_for(*key), block_size)
+            self.samplers[key] = sampler
+        return sampler
+
+    def draw(self, truck : object, state_name : str) -> None:
+        """
+        Draws the duration of the state a mining_truck starts.
+
+        Args:
+            truck (mining_truck): Truck that changed state.
+            state_name (str): Name of the new state.
+        Returns:
+            None
+        """
+        entry = self._by_state.get(state_name)
+        if entry is not None:
+            attribute, name = entry
+            setattr(truck, attribute, self.sampler(name, truck.ID).draw())
+
+    def draw_fleet(self, fleet : object, truck_ID : int, state : int) -> None:
+        """
+        Draws the duration of the state a truck_fleet truck starts.
+
+        Args:
+            fleet (truck_fleet): Fleet of the truck.
+            truck_ID (int): Truck ID.
+            state (int): New state code.
+        Returns:
+            None
+        """
+        entry = self._by_phase.get(state)
+        if entry is not None:
+            column, name = entry
+            getattr(fleet, column)[truck_ID] = self.sampler(name, truck_ID).draw()
+
+    def getstate(self) -> list:
+        """
+        Returns the state of every sampler.
+
+        Returns:
+            list: [input name, truck ID or None, sampler state] per sampler.
+        """
+        return [[name, truck_ID, sampler.getstate()] for (name, truck_ID), sampler in self.samplers.items()]
+
+    def setstate(self, state : list) -> None:
+        """
+        Restores the state of every sampler from getstate().
+
+        Args:
+            state (list): State from getstate().
+        Returns:
+            None
+        """
+        for name, truck_ID, sampler_state in state:
+            self.sampler(name, truck_ID if self.per_truck else None).setstate(sampler_state)
@@ -0,0 +1,309 @@
+import heapq
+import math
+import logging
+logger = logging.getLogger(__name__)
+
+class event_engine:
+    """
+    Represents a discrete-event engine for the mining simulation.
+
+    Instead of calling every truck state every minute, this engine keeps a
+    priority queue of the next time each truck has something to do (mining done,
+    arrival, unload done, station released) and jumps straight to it. The truck
+    states and the station manager are the same objects used by the tick engine,
+    so runs with integer durations give the same counts as the tick engine.
+    Non-integer durations are supported and are not rounded up to the minute.
+
+    Queued trucks do not get an event. The station manager hands a released
+    station to the next queued truck and calls start_unloading(), which
+    schedules the truck from there.
+
+    Attributes:
+        mining_trucks (list): List of mining_truck objects, indexed by truck ID.
+        station_manager (object): station_manager object.
+        sim_duration (float): Simulator duration in minutes.
+        observer (object): Object told the current time of every step, e.g. sim_statistics (Optional).
+
+    Methods:
+        schedule(): Schedules the next time a truck state has to run.
+        run(): Runs the simulation until sim_duration is reached.
+        start(): Sets every truck to start mining at time 0.
+        resume(): Schedules every truck from restored states.
+        advance(): Runs every event before a given time.
+        sync_trucks(): Brings the elapsed unloading time of every truck up to date.
+        start_unloading(): Starts unloading a truck handed a station by the station manager.
+    """
+
+    def __init__(self,
+                mining_trucks : list,
+                station_manager : object,
+                sim_duration : float,
+                observer : object = None):
+        """
+        Initializes the event_engine class with the simulation objects.
+
+        Args:
+            mining_trucks (list): List of mining_truck objects, indexed by truck ID.
+            station_manager (object): station_manager object.
+            sim_duration (float): Simulator duration in minutes.
+            observer (object): Object told the current time of every step, e.g. sim_statistics (Optional).
+        """
+        self.mining_trucks = mining_trucks
+        self.station_manager = station_manager
+        self.sim_duration = sim_duration
+        self.observer = observer
+
+        self.current_time = 0
+        self.events_processed = 0
+        self.started = False
+
+        # heap of (time, truck ID, sequence). Old entries are skipped when the
+        # sequence number no longer matches the truck's latest one.
+        self._events = []
+        self._sequence = [0] * len(mining_trucks)
+        # (time, elapsed) of the last unloading call for each truck
+        self._unload_mark = [(0, 0)] * len(mining_trucks)
+
+    def schedule(self, truck : object, time : float) -> None:
+        """
+        Schedules the next time a truck state has to run. Replaces any
+        earlier scheduled time for the same truck.
+
+        Args:
+            truck (mining_truck): Truck to schedule.
+            time (float): Time at which the truck state runs next.
+        Returns:
+            None
+        """
+        self._sequence[truck.ID] += 1
+        heapq.heappush(self._events, (time, truck.ID, self._sequence[truck.ID]))
+
+    def unschedule(self, truck : object) -> None:
+        """
+        Drops any scheduled time for the truck.
+
+        Args:
+            truck (mining_truck): Truck to unschedule.
+        Returns:
+            None
+        """
+        self._sequence[truck.ID] += 1
+
+    def run(self) -> None:
+        """
+        Runs the simulation until sim_duration is reached.
+
+        Returns:
+            None
+        """
+        self.start()
+        self.advance(self.sim_duration)
+
+    def start(self) -> None:
+        """
+        Sets every truck to start mining at time 0.
+
+        Returns:
+            None
+        """
+        # set all initial states to start_mining
+        for truck in self.mining_trucks:
+            truck.update_current_time(0)
+            truck.start_mining()
+            self._reschedule(truck, "start_mining", 0)
+        self.current_time = 0
+        self.started = True
+
+    def resume(self, time : float) -> None:
+        """
+        Schedules every truck from its current state, for trucks and stations
+        that were restored at the input time as the tick engine leaves them:
+        every state up to the previous minute has run. Trucks that arrived but
+        are not queued yet check for a station at the input time, like the tick
+        engine, and queued trucks wait for a station to be handed to them.
+
+        Args:
+            time (float): Time the trucks were restored at.
+        Returns:
+            None
+        """
+        previous_step = time - 1
+        for truck in self.mining_trucks:
+            state = truck.state.__name__
+            if state == "wait_to_unload":
+                if truck.ID not in self.station_manager.truck_station:
+                    # check for a station on the first step
+                    self.schedule(truck, time)
+            else:
+                self._reschedule(truck, state, previous_step)
+        self.current_time = previous_step
+        self.started = True
+
+    def advance(self, until : float) -> None:
+        """
+        Runs every event before the input time, or before sim_duration.
+
+        Args:
+            until (float): Time to stop at in minutes.
+        Returns:
+            None
+        """
+        if not self.started:
+            self.start()
+        until = min(until, self.sim_duration)
+
+        while True:
+            next_time = self._peek()
+            if next_time is None or next_time >= until:
+                break
+
+            self.current_time = next_time
+            if self.observer is not None:
+                self.observer.update_current_time(next_time)
+            for ID in sorted(self._pop_due(next_time)):
+                self._run_state(self.mining_trucks[ID], next_time)
+
+        logger.debug("Event engine processed %s events", self.events_processed)
+
+    def sync_trucks(self, time : float) -> None:
+        """
+        Sets the elapsed unloading time of every unloading truck to what the
+        tick engine would have after running every minute up to the input time.
+
+        Args:
+            time (float): Time of the last step to catch up to.
+        Returns:
+            None
+        """
+        for truck in self.mining_trucks:
+            self._sync_unloading(truck, time)
+
+    def start_unloading(self, truck_ID : int, station_ID : int, time : float) -> None:
+        """
+        Starts unloading a queued truck the station manager handed a station
+        to, and schedules the end of its unloading.
+
+        Args:
+            truck_ID (int): Truck ID.
+            station_ID (int): Station the truck unloads at.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        truck = self.mining_trucks[truck_ID]
+        truck.start_unloading(station_ID, time)
+        self._reschedule(truck, "wait_to_unload", time)
+
+    def _peek(self) -> float:
+        """
+        Returns the time of the next valid event, or None if there is none.
+
+        Returns:
+            float: Time of the next event.
+        """
+        events = self._events
+        while events and events[0][2] != self._sequence[events[0][1]]:
+            heapq.heappop(events)
+        return events[0][0] if events else None
+
+    def _pop_due(self, time : float) -> set:
+        """
+        Pops all valid events scheduled at the input time.
+
+        Args:
+            time (float): Current time.
+        Returns:
+            set: Set of truck IDs that have an event at the input time.
+        """
+        due = set()
+        events = self._events
+        while events and events[0][0] <= time:
+            event_time, ID, sequence = heapq.heappop(events)
+            if sequence == self._sequence[ID]:
+                due.add(ID)
+        return due
+
+    def _run_state(self, truck : object, time : float) -> None:
+        """
+        Runs the current truck state and schedules the next one.
+
+        Args:
+            truck (mining_truck): Truck to run.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        previous_state = truck.state.__name__
+        if previous_state == "unloading":
+            self._sync_unloading(truck, time - 1)
+
+        truck.update_current_time(time)
+        truck.state()
+        self.events_processed += 1
+
+        self._reschedule(truck, previous_state, time)
+
+    def _sync_unloading(self, truck : object, time : float) -> None:
+        """
+        Sets the elapsed unloading time the truck would have after being called
+        every minute up to the input time.
+
+        Args:
+            truck (mining_truck): Truck to update.
+            time (float): Time of the last call to catch up to.
+        Returns:
+            None
+        """
+        if truck.state.__name__ != "unloading":
+            return
+        mark_time, elapsed = self._unload_mark[truck.ID]
+        if elapsed < truck.unload_duration:
+            elapsed += min(time - mark_time, truck.unload_duration - elapsed)
+        truck.time_elapsed_unloading = elapsed
+
+    def _reschedule(self, truck : object, previous_state : str, time : float) -> None:
+        """
+        Schedules the next call of the truck state based on its current state.
+
+        Args:
+            truck (mining_truck): Truck to schedule.
+            previous_state (str): Name of the state the truck was in before the call.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        state = truck.state.__name__
+
+        if state == "mining_in_progress":
+            self.schedule(truck, self._due(truck.operation_start_time, truck.mining_duration, time))
+        elif state == "travel_to_unload":
+            self.schedule(truck, self._due(truck.operation_start_time, truck.travel_to_unload_duration, time))
+        elif state == "unloading":
+            self._unload_mark[truck.ID] = (time, truck.time_elapsed_unloading)
+            remaining = max(truck.unload_duration - truck.time_elapsed_unloading, 0)
+            self.schedule(truck, time + remaining + 1)
+        elif state == "wait_to_unload" and previous_state == "wait_to_unload":
+            # queued, wait for the station manager to hand over a station
+            self.unschedule(truck)
+        else:
+            # start_mining, load_complete and the first wait_to_unload check
+            self.schedule(truck, time + 1)
+
+    @staticmethod
+    def _due(start_time : float, duration : float, time : float) -> float:
+        """
+        Returns the first time at which the elapsed time since start_time has
+        reached duration. A state never runs twice at the same time.
+
+        Args:
+            start_time (float): Time the state started.
+            duration (float): State duration.
+            time (float): Current time.
+        Returns:
+            float: Time at which the state is done.
+        """
+        due = start_time + duration
+        # guard against rounding making the elapsed time fall short of duration
+        while due - start_time < duration:
+            due = math.nextafter(due, math.inf)
+        return max(due, time + 1)
@@ -0,0 +1,313 @@
+from array import array
+import logging
+logger = logging.getLogger(__name__)
+
+# truck states, in the same order as the mining_truck state machine
+START_MINING = 0
+MINING_IN_PROGRESS = 1
+TRAVEL_TO_UNLOAD = 2
+WAIT_TO_UNLOAD = 3
+UNLOADING = 4
+LOAD_COMPLETE = 5
+
+STATE_NAMES = ("start_mining", "mining_in_progress", "travel_to_unload",
+               "wait_to_unload", "unloading", "load_complete")
+
+# assigned_station value for a truck with no station
+NO_STATION = -1
+
+class truck_fleet:
+    """
+    Represents a fleet of lunar mining trucks stored as typed arrays.
+
+    Each truck field is a column in an array indexed by truck ID, and the state
+    of a truck is a small integer instead of a bound method. The states follow
+    the same rules as the mining_truck state machine, so a run with a fleet
+    gives the same counts as a run with mining_truck objects. Mining and travel
+    elapsed times are not stored, they are the current time minus phase_start.
+
+    Attributes:
+        num_trucks (int): Number of trucks in the fleet.
+        unload_duration (int): Unloading duration at station, shared by every truck.
+        travel_to_unload (int): Travel to unload station duration, shared by every truck.
+        station_manager (object): station_manager object.
+        observer (object): Object told about every state change, e.g. sim_statistics (Optional).
+        durations (cycle_durations): Draws new durations when a state starts (Optional).
+        mining_duration (array): Mining duration per truck.
+        travel_durations (array): Travel duration per truck, travel_to_unload unless drawn every cycle.
+        unload_durations (array): Unloading duration per truck, unload_duration unless drawn every cycle.
+        phase (array): State code per truck.
+        phase_start (array): Start time of the current operation per truck.
+        time_elapsed_unloading (array): Elapsed unloading time per truck.
+        completed_loads (array): Completed load count per truck.
+        assigned_station (array): Assigned station ID per truck, NO_STATION if none.
+
+    Methods:
+        update_current_time(): Updates the current time of the fleet.
+        start_mining(): Sets every truck to start mining.
+        step(): Runs the current state of every truck.
+        start_unloading(): Starts unloading a truck handed a station by the station manager.
+        set_phase(): Moves one truck to a new state and tells the observer.
+        get_completed_load_count(): Returns the loads completed by one truck.
+        nbytes(): Returns the memory used by the truck arrays.
+    """
+
+    def __init__(self,
+                mining_durations : list,
+                unload_duration : int,
+                travel_to_unload : int,
+                station_manager : object):
+        """
+        Initializes the truck_fleet class with simulator parameters.
+
+        Args:
+            mining_durations (list): Mining duration per truck, indexed by truck ID.
+            unload_duration (int): Unloading duration at station.
+            travel_to_unload (int): Travel to unload station duration.
+            station_manager (object): station_manager object.
+        """
+        self.num_trucks = len(mining_durations)
+        self.unload_duration = unload_duration
+        self.travel_to_unload = travel_to_unload
+        self.station_manager = station_manager
+        self.observer = None
+        self.durations = None
+        self.current_time = None
+
+        n = self.num_trucks
+        self.mining_duration = array("d", mining_durations)
+        self.travel_durations = array("d", [travel_to_unload]) * n
+        self.unload_durations = array("d", [unload_duration]) * n
+        self.phase = array("b", [START_MINING]) * n
+        self.phase_start = array("d", [0.0]) * n
+        self.time_elapsed_unloading = array("d", [0.0]) * n
+        self.completed_loads = array("l", [0]) * n
+        self.assigned_station = array("l", [NO_STATION]) * n
+
+    def __len__(self) -> int:
+        return self.num_trucks
+
+    def __getitem__(self, truck_ID : int) -> object:
+        if not 0 <= truck_ID < self.num_trucks:
+            raise IndexError(f"Truck ({truck_ID}) is not in the fleet")
+        return truck_view(self, truck_ID)
+
+    def __iter__(self):
+        for truck_ID in range(self.num_trucks):
+            yield truck_view(self, truck_ID)
+
+    def update_current_time(self, current_time : int) -> None:
+        """
+        Updates the current time of the fleet.
+
+        Args:
+            current_time (int): current time from simulator
+        Returns:
+            None
+        """
+        self.current_time = current_time
+
+    def start_mining(self) -> None:
+        """
+        Sets every truck to start mining at the current time.
+
+        Returns:
+            None
+        """
+        for truck_ID in range(self.num_trucks):
+            self.phase_start[truck_ID] = self.current_time
+            self.set_phase(truck_ID, MINING_IN_PROGRESS)
+
+    def set_phase(self, truck_ID : int, state : int) -> None:
+        """
+        Moves one truck to a new state, draws its duration if durations are
+        drawn every cycle, and tells the observer, if any.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (int): Next state code.
+        Returns:
+            None
+        """
+        self.phase[truck_ID] = state
+        if self.durations is not None:
+            self.durations.draw_fleet(self, truck_ID, state)
+        if self.observer is not None:
+            self.observer.truck_state_changed(truck_ID, STATE_NAMES[state], self.current_time)
+
+    def step(self) -> None:
+        """
+        Runs the current state of every truck in truck ID order.
+
+        Returns:
+            None
+        """
+        # local names keep the per truck loop cheap
+        current_time = self.current_time
+        phase = self.phase
+        phase_start = self.phase_start
+        mining_duration = self.mining_duration
+        travel_durations = self.travel_durations
+        elapsed_unloading = self.time_elapsed_unloading
+        unload_durations = self.unload_durations
+        queued = self.station_manager.truck_station
+
+        for truck_ID in range(self.num_trucks):
+            state = phase[truck_ID]
+            if state == MINING_IN_PROGRESS:
+                if current_time - phase_start[truck_ID] >= mining_duration[truck_ID]:
+                    phase_start[truck_ID] = current_time
+                    self.set_phase(truck_ID, TRAVEL_TO_UNLOAD)
+                    travel_durations[truck_ID] = self.station_manager.truck_departing(truck_ID, current_time,
+                                                                                      travel_durations[truck_ID])
+            elif state == TRAVEL_TO_UNLOAD:
+                if current_time - phase_start[truck_ID] >= travel_durations[truck_ID]:
+                    self.set_phase(truck_ID, WAIT_TO_UNLOAD)
+            elif state == UNLOADING:
+                if phase_start[truck_ID] == current_time:
+                    # handed a station this minute, unloading starts on the next one
+                    continue
+                if elapsed_unloading[truck_ID] < unload_durations[truck_ID]:
+                    elapsed_unloading[truck_ID] += 1
+                else:
+                    self.set_phase(truck_ID, LOAD_COMPLETE)
+            elif state == WAIT_TO_UNLOAD:
+                # queued trucks wait for the station manager to hand them a station
+                if truck_ID not in queued and self.check_for_station_availability(truck_ID):
+                    phase_start[truck_ID] = current_time
+                    self.set_phase(truck_ID, UNLOADING)
+            elif state == LOAD_COMPLETE:
+                self.load_complete(truck_ID)
+            else:
+                phase_start[truck_ID] = current_time
+                self.set_phase(truck_ID, MINING_IN_PROGRESS)
+
+    def load_complete(self, truck_ID : int) -> None:
+        """
+        Releases the truck's station and counts the completed load.
+
+        Args:
+            truck_ID (int): Truck ID.
+        Returns:
+            None
+        """
+        self.time_elapsed_unloading[truck_ID] = 0
+        self.station_manager.release_station(self.assigned_station[truck_ID], self.current_time)
+        self.completed_loads[truck_ID] += 1
+        self.set_phase(truck_ID, START_MINING)
+
+    def check_for_station_availability(self, truck_ID : int) -> bool:
+        """
+        Assigns the truck to an available station, or queues it at the
+        station with the least amount of trucks in queue.
+
+        Args:
+            truck_ID (int): Truck ID.
+        Returns:
+            bool: True if there is a station available, False if none available.
+        """
+        available_station = self.station_manager.get_available_station(truck_ID, self.current_time)
+
+        if available_station:
+            if truck_ID in available_station.truck_queue:
+                return False
+            self.station_manager.assign_station(available_station.ID, truck_ID, self.current_time)
+            self.assigned_station[truck_ID] = available_station.ID
+            return True
+
+        station_with_least_queue = self.station_manager.queue_truck(truck_ID, self.current_time)
+        if station_with_least_queue:
+            self.assigned_station[truck_ID] = station_with_least_queue.ID
+        return False
+
+    def start_unloading(self, truck_ID : int, station_ID : int, time : float) -> None:
+        """
+        Starts unloading at a station the station manager handed to the truck
+        when it was released, as if the truck had found it available.
+
+        Args:
+            truck_ID (int): Truck ID.
+            station_ID (int): Station the truck unloads at.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        self.assigned_station[truck_ID] = station_ID
+        self.phase_start[truck_ID] = time
+        self.time_elapsed_unloading[truck_ID] = 0
+        self.set_phase(truck_ID, UNLOADING)
+
+    def get_completed_load_count(self, truck_ID : int) -> int:
+        """
+        Returns the loads completed by one truck.
+
+        Args:
+            truck_ID (int): Truck ID.
+        Returns:
+            int: Returns completed load count.
+        """
+        return self.completed_loads[truck_ID]
+
+    def nbytes(self) -> int:
+        """
+        Returns the memory used by the truck arrays.
+
+        Returns:
+            int: Number of bytes.
+        """
+        columns = (self.mining_duration, self.travel_durations, self.unload_durations, self.phase, self.phase_start,
+                   self.time_elapsed_unloading, self.completed_loads, self.assigned_station)
+        return sum(column.itemsize * len(column) for column in columns)
+
+class truck_view:
+    """
+    Represents one truck of a truck_fleet.
+
+    Views hold no truck data, they read and write the fleet arrays, and are
+    created on demand when a truck is looked up by ID.
+
+    Attributes:
+        fleet (truck_fleet): Fleet the truck belongs to.
+        ID (int): Truck ID.
+
+    Methods:
+        get_completed_load_count(): Returns a sum of all loads completed by truck instance.
+    """
+    __slots__ = ("fleet", "ID")
+
+    def __init__(self, fleet : truck_fleet, truck_ID : int):
+        """
+        Initializes the truck_view class.
+
+        Args:
+            fleet (truck_fleet): Fleet the truck belongs to.
+            truck_ID (int): Truck ID.
+        """
+        self.fleet = fleet
+        self.ID = truck_ID
+
+    @property
+    def state_name(self) -> str:
+        return STATE_NAMES[self.fleet.phase[self.ID]]
+
+    @property
+    def mining_duration(self) -> float:
+        return self.fleet.mining_duration[self.ID]
+
+    @property
+    def completed_load_count(self) -> int:
+        return self.fleet.completed_loads[self.ID]
+
+    @property
+    def assigned_station(self) -> int:
+        station_ID = self.fleet.assigned_station[self.ID]
+        return None if station_ID == NO_STATION else station_ID
+
+    def get_completed_load_count(self) -> int:
+        """
+        Returns a sum of all loads completed by truck instance.
+
+        Returns:
+            int: Returns completed load count.
+        """
+        return self.fleet.completed_loads[self.ID]
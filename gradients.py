@@ -0,0 +1,173 @@
+import logging
+logger = logging.getLogger(__name__)
+
+# duration parameters of lunar_Helium_3_sim the estimates are taken with respect to
+GRADIENT_PARAMETERS = ("truck_unload_duration", "travel_to_unload", "mining_duration_min_hrs", "mining_duration_max_hrs")
+
+class ipa_estimator:
+    """
+    Represents single-run derivative estimates of the total loads and the mean
+    waiting time with respect to the duration parameters, by infinitesimal
+    perturbation analysis (IPA), as an observer of the run.
+
+    Every truck carries the derivative of the time of its current event with
+    respect to each parameter in GRADIENT_PARAMETERS. Mining, travel and
+    unloading add the derivative of their duration: 1 per minute of
+    truck_unload_duration or travel_to_unload, and for a mining duration M
+    drawn uniformly between a and b minutes, 60 * (b - M) / (b - a) per hour
+    of the minimum and 60 * (M - a) / (b - a) per hour of the maximum. A truck
+    that found an idle station starts unloading when it arrives, and a truck
+    that waited starts when its station is released, so it takes the
+    derivative of the truck that released the station (the Lindley
+    recursion). Inputs drawn from a per-cycle distribution, or travel times
+    from a road network, do not depend on the parameters and add nothing.
+
+    The load count only changes in steps, so its derivative is smoothed with
+    each truck's completion times: a truck that completed n loads by its last
+    completion at tau is taken to complete n * T / tau by the end T, and a
+    shift d of tau changes that by -n * T * d / tau^2. Durations drawn as whole
+    minutes are treated as continuous, so the estimates are approximate, most
+    of all when trucks arrive at the minute a station is released.
+
+    Attributes:
+        num_parameters (int): Number of parameters, len(GRADIENT_PARAMETERS).
+        loads (list): Loads completed per truck.
+        last_completion (list): Time of the last completed load per truck.
+
+    Methods:
+        update_current_time(): Ignored, changes carry their own time.
+        truck_state_changed(): Adds the duration derivatives of a truck's finished state.
+        station_changed(): Keeps the derivative of the last release of a station.
+        summary(): Returns the derivative estimates.
+    """
+
+    def __init__(self,
+                mining_durations : list,
+                num_unload_stations : int,
+                mining_duration_min : float,
+                mining_duration_max : float,
+                unload_fixed : bool = True,
+                travel_fixed : bool = True,
+                mining_fixed : bool = True):
+        """
+        Initializes the ipa_estimator class.
+
+        Args:
+            mining_durations (list): Mining duration of each truck in minutes.
+            num_unload_stations (int): Number of unloading stations.
+            mining_duration_min (float): Mining duration minimum in minutes.
+            mining_duration_max (float): Mining duration maximum in minutes.
+            unload_fixed (bool): Unloading takes truck_unload_duration.
+            travel_fixed (bool): Travel takes travel_to_unload.
+            mining_fixed (bool): Mining durations are drawn between the minimum and maximum.
+        """
+        num_trucks = len(mining_durations)
+        self.num_parameters = len(GRADIENT_PARAMETERS)
+        self._unload = 1.0 if unload_fixed else 0.0
+        self._travel = 1.0 if travel_fixed else 0.0
+
+        # derivative of each truck's mining duration with respect to the minimum and maximum hours
+        self._mining = []
+        spread = mining_duration_max - mining_duration_min
+        for duration in mining_durations:
+            if not mining_fixed:
+                self._mining.append((0.0, 0.0))
+            elif spread > 0:
+                self._mining.append((60 * (mining_duration_max - duration) / spread,
+                                     60 * (duration - mining_duration_min) / spread))
+            else:
+                # both bounds move the one duration, split evenly
+                self._mining.append((30.0, 30.0))
+
+        zeros = [0.0] * self.num_parameters
+        self._derivative = [list(zeros) for n in range(num_trucks)]
+        self._arrival = [(0, zeros)] * num_trucks
+        self._station = [None] * num_trucks
+        self._release = [zeros] * num_unload_stations
+        self._wait_derivative = list(zeros)
+        self._waits = 0
+
+        self.loads = [0] * num_trucks
+        self.last_completion = [0] * num_trucks
+        self._completion_derivative = [zeros] * num_trucks
+
+    def update_current_time(self, current_time : float) -> None:
+        pass
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        """
+        Adds the derivative of the state the truck finished to the derivative
+        of its event time.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (str): Name of the new state.
+            time (float): Time of the change.
+        Returns:
+            None
+        """
+        derivative = self._derivative[truck_ID]
+        if state == "travel_to_unload":
+            mining_min, mining_max = self._mining[truck_ID]
+            derivative[2] += mining_min
+            derivative[3] += mining_max
+        elif state == "wait_to_unload":
+            derivative[1] += self._travel
+            self._arrival[truck_ID] = (time, list(derivative))
+        elif state == "unloading":
+            arrival_time, arrival = self._arrival[truck_ID]
+            # a station is checked the minute after arriving, a later start waited for a release
+            if time > arrival_time + 1 and self._station[truck_ID] is not None:
+                derivative[:] = self._release[self._station[truck_ID]]
+            wait_derivative = self._wait_derivative
+            for index in range(self.num_parameters):
+                wait_derivative[index] += derivative[index] - arrival[index]
+            self._waits += 1
+        elif state == "load_complete":
+            derivative[0] += self._unload
+        elif state == "start_mining":
+            self.loads[truck_ID] += 1
+            self.last_completion[truck_ID] = time
+            self._completion_derivative[truck_ID] = list(derivative)
+
+    def station_changed(self, station : object) -> None:
+        """
+        Keeps the derivative of the truck releasing a station, and the station
+        a truck was assigned to.
+
+        Args:
+            station (unload_stations): Station that changed.
+        Returns:
+            None
+        """
+        if station.truck_ID is None:
+            return
+        if station.is_available:
+            self._release[station.ID] = list(self._derivative[station.truck_ID])
+        else:
+            self._station[station.truck_ID] = station.ID
+
+    def summary(self, end_time : float) -> dict:
+        """
+        Returns the derivative estimates at the end of the run.
+
+        Args:
+            end_time (float): End of the run in minutes.
+        Returns:
+            dict: Dictionary containing
+                - total_loads: parameter name mapped to the derivative of the total loads,
+                  per minute for durations and per hour for the mining range.
+                - mean_wait: parameter name mapped to the derivative of the mean waiting time
+                  to unload, in minutes per minute or per hour.
+        """
+        loads_derivative = [0.0] * self.num_parameters
+        for loads, completion, derivative in zip(self.loads, self.last_completion, self._completion_derivative):
+            if not loads or completion <= 0:
+                continue
+            scale = loads * end_time / completion ** 2
+            for index in range(self.num_parameters):
+                loads_derivative[index] -= scale * derivative[index]
+
+        waits = max(self._waits, 1)
+        return {"total_loads": dict(zip(GRADIENT_PARAMETERS, loads_derivative)),
+                "mean_wait": {name: value / waits for name, value in zip(GRADIENT_PARAMETERS, self._wait_derivative)}}
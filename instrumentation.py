@@ -0,0 +1,204 @@
+from fleet import STATE_NAMES
+from run_statistics import running_stats
+
+import functools
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+TRUCK_HANDLERS = ("start_mining", "mining_in_progress", "travel_to_unload", "wait_to_unload",
+                  "unloading", "load_complete", "check_for_station_availability")
+FLEET_METHODS = ("step", "start_unloading", "load_complete", "check_for_station_availability")
+STATION_MANAGER_METHODS = ("get_available_station", "assign_station", "queue_truck", "release_station",
+                           "block_station", "hand_off", "station_updated")
+
+class sim_instrumentation:
+    """
+    Represents hot path counters of a simulation run.
+
+    Instrumented objects get a timing wrapper on each of their own methods, set
+    on the instance, so nothing is recorded and no time is spent when a
+    simulation is not instrumented. Times are cumulative: a handler's time
+    includes the station_manager calls it makes.
+
+    Collected counters:
+        - Call count and cumulative time of every truck state handler and
+          station_manager method.
+        - Wasted calls per state: calls after which the truck was in the same
+          state with no unloading progress, e.g. a mining truck that is not done.
+        - Station index lookups: entries skipped in the station_manager indexes,
+          the remaining cost of finding a station.
+        - Queue length a truck joined in station_manager.queue_truck().
+
+    Attributes:
+        calls (dict): Method name mapped to [call count, cumulative seconds].
+        wasted_calls (dict): State name mapped to the number of wasted calls.
+        queue_length_at_join (running_stats): Queue length including the queued truck.
+        station_manager (object): Instrumented station_manager.
+        fleet_state_calls (int): Truck states run by truck_fleet.step().
+
+    Methods:
+        instrument_trucks(): Wraps the state handlers of mining_truck objects.
+        instrument_fleet(): Wraps the methods of a truck_fleet.
+        instrument_station_manager(): Wraps the methods of a station_manager.
+        summary(): Returns the counters.
+    """
+    def __init__(self):
+        """
+        Initializes an empty sim_instrumentation.
+        """
+        self.calls = {}
+        self.wasted_calls = {}
+        self.queue_length_at_join = running_stats()
+        self.station_manager = None
+        self.fleet_state_calls = 0
+
+    def _record(self, name : str) -> list:
+        """
+        Returns the [call count, cumulative seconds] record of a method.
+        """
+        return self.calls.setdefault(name, [0, 0.0])
+
+    def instrument_trucks(self, trucks : list) -> None:
+        """
+        Wraps the state handlers of mining_truck objects.
+
+        Args:
+            trucks (list): List of mining_truck objects.
+        Returns:
+            None
+        """
+        for truck in trucks:
+            for name in TRUCK_HANDLERS:
+                setattr(truck, name, self._wrap_handler(truck, name))
+            # the current state is still the plain method
+            truck.state = getattr(truck, truck.state.__name__)
+
+    def _wrap_handler(self, truck : object, name : str) -> object:
+        """
+        Returns a wrapper of a truck state handler that counts calls, time and wasted calls.
+        """
+        method = getattr(truck, name)
+        record = self._record(f"mining_truck.{name}")
+        wasted_calls = self.wasted_calls
+        perf_counter = time.perf_counter
+
+        @functools.wraps(method)
+        def handler(*args):
+            state = truck.state
+            elapsed_unloading = truck.time_elapsed_unloading
+            start = perf_counter()
+            result = method(*args)
+            record[1] += perf_counter() - start
+            record[0] += 1
+            if name != "check_for_station_availability" and truck.state is state and \
+                    truck.time_elapsed_unloading == elapsed_unloading:
+                wasted_calls[name] = wasted_calls.get(name, 0) + 1
+            return result
+        return handler
+
+    def instrument_fleet(self, fleet : object) -> None:
+        """
+        Wraps the methods of a truck_fleet. Its state handlers run inline in
+        step(), so step() is timed as a whole and wasted calls are found by
+        comparing the truck states before and after each step.
+
+        Args:
+            fleet (truck_fleet): Fleet to instrument.
+        Returns:
+            None
+        """
+        for name in FLEET_METHODS:
+            setattr(fleet, name, self._wrap(getattr(fleet, name), f"truck_fleet.{name}"))
+
+        step = fleet.step
+        wasted_calls = self.wasted_calls
+
+        @functools.wraps(step)
+        def counted_step():
+            phase = fleet.phase.tolist()
+            elapsed_unloading = fleet.time_elapsed_unloading.tolist()
+            step()
+            self.fleet_state_calls += len(phase)
+            for state, new_state, elapsed, new_elapsed in zip(phase, fleet.phase, elapsed_unloading,
+                                                              fleet.time_elapsed_unloading):
+                if state == new_state and elapsed == new_elapsed:
+                    name = STATE_NAMES[state]
+                    wasted_calls[name] = wasted_calls.get(name, 0) + 1
+        fleet.step = counted_step
+
+    def instrument_station_manager(self, manager : object) -> None:
+        """
+        Wraps the methods of a station_manager.
+
+        Args:
+            manager (station_manager): Station manager to instrument.
+        Returns:
+            None
+        """
+        self.station_manager = manager
+        for name in STATION_MANAGER_METHODS:
+            setattr(manager, name, self._wrap(getattr(manager, name), f"station_manager.{name}"))
+
+        queue_truck = manager.queue_truck
+        queue_length_at_join = self.queue_length_at_join
+
+        @functools.wraps(queue_truck)
+        def counted_queue_truck(truck_id, time=None):
+            station = queue_truck(truck_id, time)
+            if station is not None:
+                queue_length_at_join.add(len(station.truck_queue))
+            return station
+        manager.queue_truck = counted_queue_truck
+
+    def _wrap(self, method : object, name : str) -> object:
+        """
+        Returns a wrapper of a method that counts calls and time.
+        """
+        record = self._record(name)
+        perf_counter = time.perf_counter
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            result = method(*args, **kwargs)
+            record[1] += perf_counter() - start
+            record[0] += 1
+            return result
+        return wrapper
+
+    def summary(self) -> dict:
+        """
+        Returns the counters.
+
+        Returns:
+            dict: Dictionary containing
+                - calls: count, time_s and mean_time_us per method, slowest first.
+                - wasted_calls: wasted calls per state.
+                - wasted_fraction: wasted calls over all truck state calls.
+                - index_entries_skipped: entries skipped in the station indexes.
+                - queue_length_at_join: count, mean and max queue length joined.
+        """
+        calls = {name: {"count": count,
+                        "time_s": total_time,
+                        "mean_time_us": total_time / count * 1e6 if count else 0.0}
+                 for name, (count, total_time) in sorted(self.calls.items(), key=lambda item: -item[1][1])}
+
+        state_calls = self.fleet_state_calls + sum(
+            count for name, (count, total_time) in self.calls.items()
+            if name.startswith("mining_truck.") and name != "mining_truck.check_for_station_availability")
+        wasted = sum(self.wasted_calls.values())
+
+        skipped = None
+        if self.station_manager is not None:
+            manager = self.station_manager
+            indexes = [manager._idle, manager._ready, *manager._by_queue_length.values()]
+            skipped = sum(index.skipped for index in indexes)
+
+        return {"calls": calls,
+                "wasted_calls": dict(self.wasted_calls),
+                "wasted_fraction": wasted / state_calls if state_calls else 0.0,
+                "index_entries_skipped": skipped,
+                "queue_length_at_join": {"count": self.queue_length_at_join.count,
+                                         "mean": self.queue_length_at_join.mean,
+                                         "max": self.queue_length_at_join.max}}
@@ -1,14 +1,76 @@
 import logging
+import logging.handlers
+import queue
 from datetime import datetime
 
 # Configure the logger
-def configure_logger() -> None:
-    log_name = datetime.now().strftime("%Y-%m-%d-%H-%M_lunar_helium_3_sim.log")
-    logging.basicConfig(
-        level=logging.DEBUG,  # Set the logging level
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
-        handlers=[
-            logging.FileHandler(log_name),  # Log to a file
-            logging.StreamHandler()  # Log to console
-        ]
-    )
+def configure_logger(mode : str = "debug",
+                     module_levels : dict = None,
+                     log_file : bool = True,
+                     console : bool = True) -> object:
+    """
+    Configures the root logger for the simulation.
+
+    Modes:
+        debug: Logs everything to a file and the console, as the log is written.
+        quiet: Production mode. Only warnings and errors are logged, and info and
+               debug calls return before building their message. A module can
+               still be opened up to a lower level with module_levels.
+        background: Logs everything, but file and console output is written by a
+                    background thread so logging never blocks the simulation.
+
+    Args:
+        mode (str): One of "debug", "quiet" or "background".
+        module_levels (dict): Log level per module, e.g. {"lunar_mining_truck": "WARNING"} (Optional).
+        log_file (bool): Log to a file.
+        console (bool): Log to the console.
+    Returns:
+        logging.handlers.QueueListener: Background writer in background mode, else None.
+                                        Call its stop() before exiting to flush the queue.
+    """
+    if mode not in ("debug", "quiet", "background"):
+        raise ValueError(f"Unknown logging mode: {mode}")
+
+    # e.g. module_levels={"lunar_mining_truck": "WARNING", "station_manager": "INFO", "simulator": "INFO"}
+    levels = {}
+    for name, module_level in (module_levels or {}).items():
+        level = module_level if isinstance(module_level, int) else logging.getLevelName(str(module_level).upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level for {name}: {module_level}")
+        levels[name] = level
+    module_levels = levels
+
+    handlers = []
+    if log_file:
+        log_name = datetime.now().strftime("%Y-%m-%d-%H-%M_lunar_helium_3_sim.log")
+        # the file is only created by the first record, so quiet runs without warnings leave no empty log
+        handlers.append(logging.FileHandler(log_name, delay=True))  # Log to a file
+    if console:
+        handlers.append(logging.StreamHandler())  # Log to console
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')  # Log format
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    listener = None
+    if mode == "background":
+        # the simulation thread only puts records on the queue
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        handlers = [logging.handlers.QueueHandler(log_queue)]
+
+    # level=WARNING for quiet mode, DEBUG otherwise
+    level = logging.WARNING if mode == "quiet" else logging.DEBUG
+    logging.basicConfig(level=level, handlers=handlers, force=True)
+
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    # disabled levels are rejected before any logger level lookup
+    disable_level = logging.NOTSET
+    if mode == "quiet":
+        disable_level = min([logging.INFO] + [module_level - 10 for module_level in module_levels.values()])
+    logging.disable(max(disable_level, logging.NOTSET))
+
+    return listener
@@ -17,10 +17,14 @@ class mining_truck:
         travel_to_unload (int): Travel to unload station duration.
         mining_duration (int): Mining duration.
         station_manager (object): station_manager object.
+        observer (object): Object told about every state change, e.g. sim_statistics (Optional).
+        durations (cycle_durations): Draws new durations when a state starts (Optional).
+                                     The durations stay fixed when not set.
 
     Methods:
         update_current_time(): Updates the current time on the truck state machine.
         get_completed_load_count(): Returns a sum of all loads completed by truck instance.
+        set_state(): Moves the truck to a new state and tells the observer.
 
         start_mining(): First state on the mining process. 
         mining_in_progress(): Second state in mining process.
@@ -30,6 +34,7 @@ class mining_truck:
         load_complete(): Final state in mining process.
 
         check_for_station_availability(): Returns ture if station is available, else returns False
+        start_unloading(): Starts unloading at a station the station manager handed over.
     """
 
     def __init__(self,
@@ -66,6 +71,9 @@ class mining_truck:
         self.time_elapsed_traveling = 0
         self.completed_load_count = 0
         self.assigned_station = None
+        self.handed_off_at = None
+        self.observer = None
+        self.durations = None
 
         # Set initial state to start_mining
         self.state = self.start_mining
@@ -90,6 +98,22 @@ class mining_truck:
         """ 
         return self.completed_load_count
 
+    def set_state(self, state : object) -> None:
+        """
+        Moves the truck to a new state, draws its duration if durations are
+        drawn every cycle, and tells the observer, if any.
+
+        Args:
+            state (method): Next state method.
+        Returns:
+            None
+        """
+        self.state = state
+        if self.durations is not None:
+            self.durations.draw(self, state.__name__)
+        if self.observer is not None:
+            self.observer.truck_state_changed(self.ID, state.__name__, self.current_time)
+
     def start_mining(self) -> None:
         """
         First state in the mining process. Always goes to next state (mining_in_progress)
@@ -99,9 +123,9 @@ class mining_truck:
         """ 
         # set operation_start_time to current time
         self.operation_start_time = self.current_time
-        logger.info(f"Truck ({self.ID}) is going to start mining with a duration time of {self.mining_duration}")
         # next state
-        self.state = self.mining_in_progress
+        self.set_state(self.mining_in_progress)
+        logger.info("Truck (%s) is going to start mining with a duration time of %s", self.ID, self.mining_duration)
         
     def mining_in_progress(self) -> None:
         """
@@ -115,16 +139,18 @@ class mining_truck:
         self.time_elapsed_mining = self.current_time - self.operation_start_time
 
         if self.time_elapsed_mining < self.mining_duration:
-            logger.info(f"Truck ({self.ID}) is mining with elapsed time of: {self.time_elapsed_mining}")
+            logger.info("Truck (%s) is mining with elapsed time of: %s", self.ID, self.time_elapsed_mining)
             self.state = self.mining_in_progress
         else:
-            logger.info(f"Truck ({self.ID}) is done mining.")
+            logger.info("Truck (%s) is done mining.", self.ID)
             # restart elapsed mining time and set next state
             self.time_elapsed_mining = 0
             # reset start time
             self.operation_start_time = self.current_time
             # next state
-            self.state = self.travel_to_unload
+            self.set_state(self.travel_to_unload)
+            self.travel_to_unload_duration = self.station_manager.truck_departing(self.ID, self.current_time,
+                                                                                  self.travel_to_unload_duration)
 
     def travel_to_unload(self) -> None:
         """
@@ -136,31 +162,33 @@ class mining_truck:
             None
         """ 
         self.time_elapsed_traveling = self.current_time - self.operation_start_time
-        logger.info(f"Truck ({self.ID}) is traveling to unload site with elapsed time of: {self.time_elapsed_traveling}")
+        logger.info("Truck (%s) is traveling to unload site with elapsed time of: %s", self.ID, self.time_elapsed_traveling)
         
         if self.time_elapsed_traveling < self.travel_to_unload_duration:
             self.state = self.travel_to_unload
         else:
             self.time_elapsed_traveling = 0
             # next state
-            self.state = self.wait_to_unload
+            self.set_state(self.wait_to_unload)
 
     def wait_to_unload(self) -> None:
         """
-        Fourth state in the mining process. Goes to next state (unloading) when a station
-        becomes available. It will remain in this state until a station with the least amount of
-        trucks in queue becomes available.
+        Fourth state in the mining process. Goes to next state (unloading) if a station
+        is available when the truck arrives, else queues the truck. A queued truck does
+        nothing until the station manager hands it a station with start_unloading().
 
         Returns:
             None
         """ 
-        logger.info(f"Truck ({self.ID}) is in waiting to unload")
+        if self.ID in self.station_manager.truck_station:
+            return
+        logger.info("Truck (%s) is in waiting to unload", self.ID)
         if self.check_for_station_availability():
             # go to next state
-            logger.info(f"Truck ({self.ID}) is unloading now.")
+            logger.info("Truck (%s) is unloading now.", self.ID)
 
             self.operation_start_time = self.current_time
-            self.state = self.unloading
+            self.set_state(self.unloading)
         else:
             self.state = self.wait_to_unload
     
@@ -173,14 +201,17 @@ class mining_truck:
         Returns:
             None
         """ 
+        if self.handed_off_at == self.current_time:
+            # handed a station this minute, unloading starts on the next one
+            return
         if self.time_elapsed_unloading < self.unload_duration:
-            logger.info(f"Truck ({self.ID}) is unloading with elapsed time of {self.time_elapsed_unloading} at station ({self.assigned_station})")
+            logger.info("Truck (%s) is unloading with elapsed time of %s at station (%s)", self.ID, self.time_elapsed_unloading, self.assigned_station)
             self.time_elapsed_unloading += 1
             self.state = self.unloading
         else:
             # next state
-            logger.info(f"Truck ({self.ID}) is done unloading.")
-            self.state = self.load_complete
+            logger.info("Truck (%s) is done unloading.", self.ID)
+            self.set_state(self.load_complete)
 
     def load_complete(self) -> None:
         """
@@ -194,14 +225,14 @@ class mining_truck:
         # restart elapsed unloading time 
         self.time_elapsed_unloading = 0
 
-        logger.debug(f"releasing station ({self.assigned_station})")
-        self.station_manager.release_station(self.assigned_station)   
+        logger.debug("releasing station (%s)", self.assigned_station)
+        self.station_manager.release_station(self.assigned_station, self.current_time)
 
         self.completed_load_count += 1
-        logger.info(f"Truck ({self.ID}) has completed {self.completed_load_count} loads.")
+        logger.info("Truck (%s) has completed %s loads.", self.ID, self.completed_load_count)
 
         # next state
-        self.state = self.start_mining
+        self.set_state(self.start_mining)
 
     def check_for_station_availability(self) -> bool:
         """
@@ -212,25 +243,45 @@ class mining_truck:
             bool: True if there is a station available, False if none available.
         """ 
         # Ask StationManager for an available station
-        available_station = self.station_manager.get_available_station()
+        available_station = self.station_manager.get_available_station(self.ID, self.current_time)
         
         if available_station:
             if self.ID in available_station.truck_queue:
                 return False
             
             # Assign the truck to the available station
-            available_station.assign_truck(self.ID)
+            self.station_manager.assign_station(available_station.ID, self.ID, self.current_time)
             self.assigned_station = available_station.ID
-            logger.info(f"Truck ({self.ID}) is going to start unloading at station ({available_station.ID})")
+            logger.info("Truck (%s) is going to start unloading at station (%s)", self.ID, available_station.ID)
             return True
         
         # If no available station, queue the truck at the station with the least queue
-        station_with_least_queue = self.station_manager.queue_truck(self.ID)
+        station_with_least_queue = self.station_manager.queue_truck(self.ID, self.current_time)
         if not station_with_least_queue:
             pass
         else:
             self.assigned_station = station_with_least_queue.ID
 
-        logger.info(f"Truck ({self.ID}) is currently in the queue for station ({self.assigned_station}).")
+        logger.info("Truck (%s) is currently in the queue for station (%s).", self.ID, self.assigned_station)
         
         return False
+
+    def start_unloading(self, station_ID : int, time : float) -> None:
+        """
+        Starts unloading at a station the station manager handed to the truck
+        when it was released. The truck leaves its queue and unloads as if it
+        had found the station available at the input time.
+
+        Args:
+            station_ID (int): Station the truck unloads at.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        self.update_current_time(time)
+        self.assigned_station = station_ID
+        self.handed_off_at = time
+        self.operation_start_time = time
+        self.time_elapsed_unloading = 0
+        logger.info("Truck (%s) is handed station (%s) and is unloading now.", self.ID, station_ID)
+        self.set_state(self.unloading)
@@ -0,0 +1,217 @@
+from simulator import lunar_Helium_3_sim
+
+import math
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+
+# squared coefficient of variation of the time a truck holds a station, which is fixed
+SERVICE_SCV = 0.0
+
+class mva_estimator:
+    """
+    Represents an analytic estimate of the mining operation as a closed queueing
+    network, solved exactly like mean value analysis (MVA) would, without
+    running a simulation.
+
+    The N trucks circulate between a delay stage (mining, travel and the one
+    minute state hand-offs) and one station with S parallel unload servers. In
+    the simulation a truck holds a station for the unload duration plus 2
+    minutes, and a whole cycle without waiting takes mining + travel + unload + 4
+    minutes. Each truck keeps its mining duration for the whole run, so the
+    delay stage uses the mean cycle time that gives the right throughput with no
+    waiting (the harmonic mean over the mining durations), not the mean mining
+    duration.
+
+    The network has a product form solution, so the distribution of trucks at
+    the station is computed directly in O(N) instead of with the MVA recursion,
+    which is slow and numerically unstable for many servers.
+
+    The product form assumes exponential service, but a truck holds a station
+    for a fixed time, and a queue behind a fixed service time is shorter. The
+    waiting time in the queue is scaled with the Allen-Cunneen factor
+    (1 + cs^2) / 2 for the squared coefficient of variation cs^2 = 0 of the
+    service time, which halves it. This is close to the simulation at moderate
+    and heavy load with several stations. It underestimates the wait by up to
+    about a quarter when the stations are nearly saturated or there is only
+    one station, where the number of trucks, not the service time variability,
+    sets the queue.
+
+    As in the model, no station stays idle while a truck is queued: the station
+    manager hands a released station to a queued truck in the same minute
+    (station_manager.hand_off). The estimate still ignores the simulation's
+    whole minute timing and the one minute station check of an arriving truck,
+    so use compare_to_simulation() to check how far it is from a simulation for
+    the configurations it screens.
+
+    Attributes:
+        num_mining_trucks (int): Number of mining trucks in operation.
+        num_unload_stations (int): Number of unloading stations in operation.
+        sim_duration_hrs (int): Simulator duration in hours.
+        truck_unload_duration (int): Truck unloading duration in minutes.
+        travel_to_unload (int): Travel to unload duration in minutes.
+        mining_duration_min_hrs (int): Mining duration minimum amount of hours.
+        mining_duration_max_hrs (int): Mining duration max amount of hours.
+
+    Methods:
+        solve(): Returns the expected loads, station utilization and mean wait.
+        compare_to_simulation(): Returns the gap between the estimate and a short simulation.
+    """
+
+    def __init__(self,
+                num_mining_trucks : int,
+                num_unload_stations : int,
+                sim_duration_hrs : int,
+                truck_unload_duration : int,
+                travel_to_unload : int,
+                mining_duration_min_hrs : int,
+                mining_duration_max_hrs : int):
+        """
+        Initializes the mva_estimator class with the lunar_Helium_3_sim parameters.
+
+        Args:
+            num_mining_trucks (int): Number of mining trucks in operation.
+            num_unload_stations (int): Number of unloading stations in operation.
+            sim_duration_hrs (int): Simulator duration in hours.
+            truck_unload_duration (int): Truck unloading duration in minutes.
+            travel_to_unload (int): Travel to unload duration in minutes.
+            mining_duration_min_hrs (int): Mining duration minimum amount of hours.
+            mining_duration_max_hrs (int): Mining duration max amount of hours.
+        """
+        if num_unload_stations < 1:
+            raise ValueError(f"At least one unload station is needed: {num_unload_stations}")
+
+        self.num_mining_trucks = num_mining_trucks
+        self.num_unload_stations = num_unload_stations
+        self.sim_duration_hrs = sim_duration_hrs
+        self.truck_unload_duration = truck_unload_duration
+        self.travel_to_unload = travel_to_unload
+        self.mining_duration_min_hrs = mining_duration_min_hrs
+        self.mining_duration_max_hrs = mining_duration_max_hrs
+
+        # minutes a truck holds a station, and of a cycle outside the station
+        self.station_time = truck_unload_duration + 2
+        self.delay_time = 1 / self._mean_cycle_rate() - self.station_time
+
+    def _mean_cycle_rate(self) -> float:
+        """
+        Returns the mean over the mining durations of 1 / cycle time with no
+        waiting, for integer durations drawn with randint or uniform ones.
+        """
+        cycle_overhead = self.travel_to_unload + self.truck_unload_duration + 4
+        low = self.mining_duration_min_hrs * 60
+        high = self.mining_duration_max_hrs * 60
+        if high <= low:
+            return 1 / (low + cycle_overhead)
+        if float(low).is_integer() and float(high).is_integer():
+            durations = np.arange(int(low), int(high) + 1)
+            return float(np.mean(1 / (durations + cycle_overhead)))
+        return math.log((high + cycle_overhead) / (low + cycle_overhead)) / (high - low)
+
+    def solve(self) -> dict:
+        """
+        Returns the expected loads, station utilization and mean wait.
+
+        Returns:
+            dict: Dictionary containing
+                - throughput_per_hr: loads per hour in steady state.
+                - expected_loads: loads completed in sim_duration_hrs.
+                - station_utilization: busy fraction of each station.
+                - mean_wait: minutes in wait_to_unload per load, including the
+                  one minute station check, as in sim_statistics.
+                - mean_queue_length: mean number of trucks waiting for a station.
+                - cycle_time: mean minutes per truck cycle.
+        """
+        trucks = self.num_mining_trucks
+        if trucks == 0:
+            return {"throughput_per_hr": 0.0, "expected_loads": 0.0,
+                    "station_utilization": 0.0, "mean_wait": 0.0, "mean_queue_length": 0.0,
+                    "cycle_time": 0.0}
+
+        distribution = self._station_distribution()
+        at_station = np.arange(trucks + 1)
+        throughput = float(np.dot(np.minimum(at_station, self.num_unload_stations), distribution)) / self.station_time
+        # Little's law at the station
+        residence = float(np.dot(at_station, distribution)) / throughput
+
+        # no load completes before the fastest truck's first cycle, and the
+        # cycle running at the end is half done on average
+        first_cycle = self.mining_duration_min_hrs * 60 + self.travel_to_unload + 2 + self.station_time / 2
+        startup_loss = min(trucks / 2, throughput * first_cycle)
+        sim_duration = self.sim_duration_hrs * 60
+
+        # Allen-Cunneen correction of the exponential service queueing time
+        queueing = max(residence - self.station_time, 0.0) * (1 + SERVICE_SCV) / 2
+        return {"throughput_per_hr": throughput * 60,
+                "expected_loads": max(throughput * sim_duration - startup_loss, 0.0),
+                "station_utilization": min(throughput * self.station_time / self.num_unload_stations, 1.0),
+                "mean_wait": queueing + 1,
+                "mean_queue_length": throughput * queueing,
+                "cycle_time": trucks / throughput}
+
+    def _station_distribution(self) -> np.ndarray:
+        """
+        Returns the probability of k = 0 .. N trucks at the station. With a
+        delay stage and one multi-server station the network has a product
+        form solution, the same MVA computes step by step:
+            P(k) ~ Z^(N - k) / (N - k)! * D^k / b(k)
+        with b(k) = k! for k <= S and S! * S^(k - S) above. It is computed
+        with logarithms so large fleets do not overflow.
+
+        Returns:
+            np.ndarray: Probability per number of trucks at the station.
+        """
+        trucks, servers = self.num_mining_trucks, self.num_unload_stations
+        k = np.arange(trucks + 1)
+        # log(m!) for m = 0 .. N
+        log_factorial = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, trucks + 1)))))
+        log_servers = np.where(k <= servers, log_factorial[np.minimum(k, servers)],
+                               log_factorial[min(servers, trucks)] + (k - servers) * math.log(servers))
+        log_weight = (trucks - k) * math.log(self.delay_time) - log_factorial[trucks - k] + \
+            k * math.log(self.station_time) - log_servers
+        weight = np.exp(log_weight - log_weight.max())
+        return weight / weight.sum()
+
+    def compare_to_simulation(self,
+                              check_duration_hrs : float = None,
+                              num_replications : int = 3,
+                              seed : int = 0,
+                              engine : str = "event") -> dict:
+        """
+        Runs a few short simulations with the same parameters and returns the
+        relative gap of the estimate to their mean, as (estimate - simulated) / simulated.
+
+        Args:
+            check_duration_hrs (float): Duration of the simulations, defaults to
+                                        sim_duration_hrs up to 72 hours (Optional).
+            num_replications (int): Number of simulations.
+            seed (int): Seed of the first simulation, the others use the next seeds.
+            engine (str): Simulation engine.
+        Returns:
+            dict: Dictionary containing
+                - estimate: solve() for the check duration.
+                - simulated: mean expected_loads, station_utilization and mean_wait of the simulations.
+                - gap: relative gap of each of them.
+        """
+        duration = check_duration_hrs if check_duration_hrs is not None else min(self.sim_duration_hrs, 72)
+        parameters = dict(num_mining_trucks=self.num_mining_trucks, num_unload_stations=self.num_unload_stations,
+                          sim_duration_hrs=duration, truck_unload_duration=self.truck_unload_duration,
+                          travel_to_unload=self.travel_to_unload,
+                          mining_duration_min_hrs=self.mining_duration_min_hrs,
+                          mining_duration_max_hrs=self.mining_duration_max_hrs)
+        estimate = mva_estimator(**parameters).solve()
+
+        simulated = {"expected_loads": 0.0, "station_utilization": 0.0, "mean_wait": 0.0}
+        for replication in range(num_replications):
+            sim = lunar_Helium_3_sim(**parameters, engine=engine, seed=seed + replication, collect_statistics=True)
+            sim.run()
+            summary = sim.statistics.summary()
+            stations = summary["stations"]
+            simulated["expected_loads"] += sim.total_loads / num_replications
+            simulated["station_utilization"] += sum(station["busy_fraction"] for station in stations) / \
+                len(stations) / num_replications
+            simulated["mean_wait"] += (summary["waiting_time"]["mean"] or 0.0) / num_replications
+
+        gap = {name: (estimate[name] - value) / value if value else None for name, value in simulated.items()}
+        logger.info(f"MVA estimate gap to {num_replications} simulations of {duration} hours: {gap}")
+        return {"estimate": estimate, "simulated": simulated, "gap": gap}
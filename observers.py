@@ -0,0 +1,56 @@
+class observer_group:
+    """
+    Represents several simulation observers used as one.
+
+    Trucks, the truck_fleet, the station_manager and the engines only hold a
+    single observer. This class forwards every call to each observer in order,
+    e.g. to collect sim_statistics and record a trace in the same run.
+
+    Attributes:
+        observers (list): List of observer objects.
+
+    Methods:
+        update_current_time(): Forwards the current simulation time.
+        truck_state_changed(): Forwards a truck state change.
+        station_changed(): Forwards a station change.
+    """
+    def __init__(self, observers : list):
+        """
+        Initializes the observer_group class with a list of observers.
+
+        Args:
+            observers (list): List of observer objects.
+        """
+        self.observers = list(observers)
+
+    def update_current_time(self, current_time : float) -> None:
+        """
+        Forwards the current simulation time.
+
+        Args:
+            current_time (float): current time from simulator
+        """
+        for observer in self.observers:
+            observer.update_current_time(current_time)
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        """
+        Forwards a truck state change.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (str): Name of the new state.
+            time (float): Time of the change.
+        """
+        for observer in self.observers:
+            observer.truck_state_changed(truck_ID, state, time)
+
+    def station_changed(self, station : object) -> None:
+        """
+        Forwards a station change.
+
+        Args:
+            station (unload_stations): Station that changed.
+        """
+        for observer in self.observers:
+            observer.station_changed(station)
@@ -0,0 +1,369 @@
+from sweep import run_one, derive_seed, check_config
+from run_statistics import running_stats
+
+import math
+import time
+import queue
+import statistics
+import multiprocessing
+import logging
+logger = logging.getLogger(__name__)
+
+def t_cdf(t : float, degrees_of_freedom : int) -> float:
+    """
+    Returns the cumulative probability of the Student t distribution, from
+    its finite series in the angle atan(t / sqrt(degrees_of_freedom)).
+
+    Args:
+        t (float): Value of the t statistic.
+        degrees_of_freedom (int): Degrees of freedom, at least 1.
+    Returns:
+        float: Probability of a t value below t.
+    """
+    v = degrees_of_freedom
+    theta = math.atan(t / math.sqrt(v))
+    cos_squared = math.cos(theta) ** 2
+    # term k of the series is the previous one times (k - 1) / k * cos^2
+    term = total = 1.0
+    for k in range(3 if v % 2 else 2, v - 1, 2):
+        term *= (k - 1) / k * cos_squared
+        total += term
+    if v % 2:
+        within = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if v > 1 else 0.0))
+    else:
+        within = math.sin(theta) * total
+    return (1 + within) / 2
+
+def t_quantile(probability : float, degrees_of_freedom : int) -> float:
+    """
+    Returns the quantile of the Student t distribution. Exact for 1 and 2
+    degrees of freedom. Otherwise a Cornish-Fisher expansion around the normal
+    quantile, accurate to 1e-8 from 100 degrees of freedom, refined below that
+    with Newton steps on t_cdf() to machine precision.
+
+    Args:
+        probability (float): Cumulative probability, between 0 and 1.
+        degrees_of_freedom (int): Degrees of freedom, at least 1.
+    Returns:
+        float: t quantile.
+    """
+    if degrees_of_freedom < 1:
+        raise ValueError(f"Degrees of freedom should be at least 1: {degrees_of_freedom}")
+    if degrees_of_freedom == 1:
+        return math.tan(math.pi * (probability - 0.5))
+    if degrees_of_freedom == 2:
+        return (2 * probability - 1) / math.sqrt(2 * probability * (1 - probability))
+
+    z = statistics.NormalDist().inv_cdf(probability)
+    v = degrees_of_freedom
+    t = (z
+         + (z**3 + z) / (4 * v)
+         + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * v**2)
+         + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * v**3)
+         + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * v**4))
+    if v >= 100:
+        return t
+
+    log_density_scale = math.lgamma((v + 1) / 2) - math.lgamma(v / 2) - 0.5 * math.log(v * math.pi)
+    for n in range(20):
+        density = math.exp(log_density_scale - (v + 1) / 2 * math.log1p(t * t / v))
+        step = (t_cdf(t, v) - probability) / density
+        t -= step
+        if abs(step) <= 1e-14 * max(abs(t), 1.0):
+            break
+    return t
+
+def confidence_interval(stats : running_stats, confidence : float = 0.95) -> tuple:
+    """
+    Returns the Student t confidence interval of the mean of the values in a running_stats.
+
+    Args:
+        stats (running_stats): Values to estimate the mean of.
+        confidence (float): Confidence level, between 0 and 1.
+    Returns:
+        tuple: Tuple containing
+            - float: mean
+            - float: half width of the interval, infinite with less than two values
+    """
+    if stats.count < 2:
+        return stats.mean, math.inf
+    standard_error = math.sqrt(stats.variance() / stats.count)
+    return stats.mean, t_quantile((1 + confidence) / 2, stats.count - 1) * standard_error
+
+class replication_state:
+    """
+    Represents the replications of one configuration in an adaptive run.
+
+    Attributes:
+        config_index (int): Index of the configuration.
+        config (dict): lunar_Helium_3_sim parameters.
+        total_loads (running_stats): total_loads of the completed replications.
+        launched (int): Number of replications sent to a worker.
+        wall_time_s (float): Wall time of the completed replications.
+
+    Methods:
+        precision_ratio(): Returns how far the interval is from the precision target.
+        result(): Returns the estimate, interval and replications used.
+    """
+    def __init__(self, config_index : int, config : dict):
+        """
+        Initializes the replication_state class.
+
+        Args:
+            config_index (int): Index of the configuration.
+            config (dict): lunar_Helium_3_sim parameters.
+        """
+        self.config_index = config_index
+        self.config = config
+        self.total_loads = running_stats()
+        self.launched = 0
+        self.wall_time_s = 0.0
+
+    def precision_ratio(self, half_width : float, relative_precision : float, confidence : float) -> float:
+        """
+        Returns the interval half width divided by the target half width, so the
+        target is met at 1 or less. With both targets, the larger ratio is returned.
+        With no target, the relative half width is returned.
+
+        Args:
+            half_width (float): Target half width (Optional).
+            relative_precision (float): Target half width relative to the mean (Optional).
+            confidence (float): Confidence level.
+        Returns:
+            float: Precision ratio.
+        """
+        mean, interval = confidence_interval(self.total_loads, confidence)
+        if interval == 0:
+            return 0.0
+        relative = interval / abs(mean) if mean else math.inf
+        ratios = []
+        if half_width is not None:
+            ratios.append(interval / half_width)
+        if relative_precision is not None:
+            ratios.append(relative / relative_precision)
+        return max(ratios) if ratios else relative
+
+    def result(self, confidence : float, target_met : bool) -> dict:
+        """
+        Returns the estimate, interval and replications used.
+
+        Args:
+            confidence (float): Confidence level.
+            target_met (bool): True if the precision target was met.
+        Returns:
+            dict: Result of the configuration.
+        """
+        mean, interval = confidence_interval(self.total_loads, confidence)
+        return {**self.config,
+                "config_index": self.config_index,
+                "replications": self.total_loads.count,
+                "launched": self.launched,
+                "mean": mean,
+                "half_width": interval,
+                "ci_low": mean - interval,
+                "ci_high": mean + interval,
+                "stdev": math.sqrt(self.total_loads.variance()),
+                "target_met": target_met,
+                "wall_time_s": self.wall_time_s}
+
+def run_adaptive_sweep(configs : list,
+                       half_width : float = None,
+                       relative_precision : float = None,
+                       time_budget_s : float = None,
+                       confidence : float = 0.95,
+                       min_replications : int = 5,
+                       max_replications : int = 1000,
+                       master_seed : int = 0,
+                       processes : int = None) -> list:
+    """
+    Runs replications of every configuration until the confidence interval on
+    total_loads is as tight as asked, or the wall time budget is used up.
+
+    Every configuration first gets min_replications. After that, each free
+    worker goes to the configuration that needs the most replications to meet
+    its target, estimated from its current interval, so noisy configurations
+    get more replications and stable ones stop at min_replications. Work still
+    running when every target is met or the budget is used up is stopped.
+
+    Replication k of configuration i always uses derive_seed(master_seed, i, k),
+    so it can be reproduced with lunar_Helium_3_sim(**config, seed=seed).
+
+    Args:
+        configs (list): List of lunar_Helium_3_sim parameter dicts.
+        half_width (float): Target half width of the interval in loads (Optional).
+        relative_precision (float): Target half width relative to the mean, e.g. 0.01 (Optional).
+        time_budget_s (float): Wall time budget in seconds (Optional).
+        confidence (float): Confidence level of the interval.
+        min_replications (int): Replications per configuration before checking the target.
+        max_replications (int): Maximum replications per configuration.
+        master_seed (int): Seed every run seed is derived from.
+        processes (int): Number of worker processes, defaults to every core (Optional).
+    Returns:
+        list: Result per configuration, in configuration order, with mean,
+              half_width, ci_low, ci_high, stdev, replications, launched and
+              target_met. Replications finished after their configuration met
+              its target are not used.
+    """
+    if half_width is None and relative_precision is None and time_budget_s is None:
+        raise ValueError("Set a half_width, relative_precision or time_budget_s target")
+    if min_replications < 2:
+        raise ValueError(f"At least 2 replications are needed for an interval: {min_replications}")
+    for config in configs:
+        check_config(config)
+
+    processes = processes or multiprocessing.cpu_count()
+    states = [replication_state(config_index, config) for config_index, config in enumerate(configs)]
+    has_target = half_width is not None or relative_precision is not None
+    done = [False] * len(states)
+    deadline = time.perf_counter() + time_budget_s if time_budget_s is not None else None
+
+    def is_done(state : replication_state) -> bool:
+        if state.total_loads.count >= max_replications:
+            return True
+        return has_target and state.total_loads.count >= min_replications and \
+            state.precision_ratio(half_width, relative_precision, confidence) <= 1
+
+    def next_state() -> replication_state:
+        # finish the first replications of every configuration first
+        candidates = [state for state in states if not done[state.config_index] and state.launched < max_replications]
+        starting = [state for state in candidates if state.launched < min_replications]
+        if starting:
+            return min(starting, key=lambda state: state.launched)
+
+        best, best_ratio = None, 0
+        for state in candidates:
+            if state.total_loads.count < 2:
+                continue
+            ratio = state.precision_ratio(half_width, relative_precision, confidence)
+            # replications needed to meet the target, as the half width shrinks with sqrt(n)
+            needed = math.ceil(state.total_loads.count * ratio**2) if has_target else math.inf
+            missing = min(needed, max_replications) - state.launched
+            if missing > 0 and (best is None or ratio > best_ratio):
+                best, best_ratio = state, ratio
+        return best
+
+    results = queue.SimpleQueue()
+    with multiprocessing.Pool(processes) as pool:
+        in_flight = 0
+        while True:
+            # no replication starts after the time budget, it would only be stopped
+            while in_flight < processes and (deadline is None or time.perf_counter() < deadline):
+                state = next_state()
+                if state is None:
+                    break
+                replication = state.launched
+                task = (state.config_index, replication,
+                        derive_seed(master_seed, state.config_index, replication), state.config)
+                pool.apply_async(run_one, (task,), callback=results.put, error_callback=results.put)
+                state.launched += 1
+                in_flight += 1
+            if in_flight == 0:
+                break
+
+            timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            try:
+                row = results.get(timeout=timeout)
+            except queue.Empty:
+                logger.info("Time budget used up, stopping the running replications")
+                break
+            in_flight -= 1
+            if isinstance(row, BaseException):
+                raise row
+            if done[row["config_index"]]:
+                # finished while the configuration was already done, not used
+                continue
+
+            state = states[row["config_index"]]
+            state.total_loads.add(row["total_loads"])
+            state.wall_time_s += row["wall_time_s"]
+            if is_done(state):
+                done[state.config_index] = True
+                logger.debug(f"Configuration {state.config_index} done after {state.total_loads.count} replications")
+                if all(done):
+                    break
+        # leaving the pool stops the replications that are still running
+
+    return [state.result(confidence, has_target and state.total_loads.count >= min_replications and
+                         state.precision_ratio(half_width, relative_precision, confidence) <= 1)
+            for state in states]
+
+def run_adaptive(config : dict, **kwargs) -> dict:
+    """
+    Runs replications of one configuration until the confidence interval on
+    total_loads is as tight as asked. See run_adaptive_sweep() for the arguments.
+
+    Args:
+        config (dict): lunar_Helium_3_sim parameters.
+        **kwargs: Targets and options of run_adaptive_sweep().
+    Returns:
+        dict: Result with mean, half_width, ci_low, ci_high, stdev, replications, launched and target_met.
+    """
+    return run_adaptive_sweep([config], **kwargs)[0]
+
+def run_paired(config_a : dict,
+               config_b : dict,
+               num_replications : int,
+               confidence : float = 0.95,
+               master_seed : int = 0,
+               processes : int = None) -> dict:
+    """
+    Compares two configurations with common random numbers. Replication k of
+    both configurations runs with the same seed and common_random_numbers, so
+    each truck gets the same mining durations in both, and the interval is
+    computed on the paired differences of total_loads (B minus A).
+
+    Args:
+        config_a (dict): lunar_Helium_3_sim parameters of the first configuration.
+        config_b (dict): lunar_Helium_3_sim parameters of the second configuration.
+        num_replications (int): Number of replication pairs, at least 2.
+        confidence (float): Confidence level of the interval.
+        master_seed (int): Seed every run seed is derived from.
+        processes (int): Number of worker processes, defaults to every core (Optional).
+    Returns:
+        dict: Dictionary containing
+            - replications: number of replication pairs.
+            - mean_a, mean_b: mean total_loads of each configuration.
+            - difference: mean paired difference.
+            - half_width, ci_low, ci_high: interval of the difference.
+            - unpaired_half_width: interval half width without pairing.
+            - variance_reduction: variance of the unpaired difference divided
+              by the variance of the paired difference.
+    """
+    if num_replications < 2:
+        raise ValueError(f"At least 2 replications are needed for an interval: {num_replications}")
+    check_config(config_a)
+    check_config(config_b)
+
+    configs = [{**config, "common_random_numbers": True} for config in (config_a, config_b)]
+    tasks = [(config_index, replication, derive_seed(master_seed, 0, replication), config)
+             for replication in range(num_replications)
+             for config_index, config in enumerate(configs)]
+
+    loads = [[None] * num_replications, [None] * num_replications]
+    with multiprocessing.Pool(processes) as pool:
+        for row in pool.imap_unordered(run_one, tasks):
+            loads[row["config_index"]][row["replication"]] = row["total_loads"]
+
+    stats_a, stats_b, differences = running_stats(), running_stats(), running_stats()
+    for loads_a, loads_b in zip(*loads):
+        stats_a.add(loads_a)
+        stats_b.add(loads_b)
+        differences.add(loads_b - loads_a)
+
+    difference, interval = confidence_interval(differences, confidence)
+    unpaired_variance = stats_a.variance() + stats_b.variance()
+    unpaired_interval = t_quantile((1 + confidence) / 2, num_replications - 1) * \
+        math.sqrt(unpaired_variance / num_replications)
+    variance_reduction = unpaired_variance / differences.variance() if differences.variance() else math.inf
+
+    logger.info(f"Paired difference in loads: {difference:.2f} +/- {interval:.2f} "
+                f"(unpaired +/- {unpaired_interval:.2f}) over {num_replications} replications")
+    return {"replications": num_replications,
+            "mean_a": stats_a.mean,
+            "mean_b": stats_b.mean,
+            "difference": difference,
+            "half_width": interval,
+            "ci_low": difference - interval,
+            "ci_high": difference + interval,
+            "unpaired_half_width": unpaired_interval,
+            "variance_reduction": variance_reduction}
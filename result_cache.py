@@ -0,0 +1,250 @@
+from simulator import lunar_Helium_3_sim, ENGINE_VERSION
+
+import hashlib
+import inspect
+import json
+import sqlite3
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    config TEXT NOT NULL,
+    seed TEXT NOT NULL,
+    engine_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+# lunar_Helium_3_sim parameters that only observe a run, without changing its results
+OUTPUT_ONLY = ("instrument", "trace_path", "telemetry")
+
+# defaults of the other optional lunar_Helium_3_sim parameters, filled into every key
+DEFAULTS = {name: parameter.default
+            for name, parameter in inspect.signature(lunar_Helium_3_sim.__init__).parameters.items()
+            if parameter.default is not inspect.Parameter.empty and name != "seed" and name not in OUTPUT_ONLY}
+
+def canonical_value(value : object) -> object:
+    """
+    Returns a value with every number, at any depth, as a float and every
+    tuple as a list, so the int or float spelling of the same number and the
+    container type of a spec do not matter.
+
+    Args:
+        value (object): Parameter value.
+    Returns:
+        object: Canonical value.
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(name): canonical_value(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical_value(item) for item in value]
+    return value
+
+def cache_key(config : dict, seed : int, engine_version : str = ENGINE_VERSION) -> str:
+    """
+    Returns the canonical hash of a run: its lunar_Helium_3_sim parameters,
+    seed and engine version. Parameter order, int or float spelling of the
+    same number at any depth, parameters left at their default and the
+    OUTPUT_ONLY parameters do not change the key.
+
+    Args:
+        config (dict): lunar_Helium_3_sim parameters, without the seed.
+        seed (int): Seed of the run.
+        engine_version (str): Version of the simulation rules.
+    Returns:
+        str: Hex digest.
+    """
+    canonical = {name: canonical_value(value) for name, value in {**DEFAULTS, **config}.items()
+                 if name not in OUTPUT_ONLY}
+    text = json.dumps([canonical, str(seed), engine_version], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class result_cache:
+    """
+    Represents an on-disk store of simulation results in an SQLite file.
+
+    Results are keyed by cache_key(), so a result is only reused for the same
+    parameters, seed and ENGINE_VERSION. Runs without a seed are never cached.
+
+    New results and last use times are kept in memory and written in one
+    transaction every batch_size changes, or on flush() and close(). After each
+    write the least recently used results are evicted until the stored results
+    fit in max_bytes.
+
+    The file uses SQLite's write-ahead log, so readers never block the writer,
+    and a busy writer is waited for, so any number of processes, e.g. sweep
+    workers, can open their own result_cache on the same file. A result_cache
+    object itself must not be shared between processes.
+
+    Attributes:
+        path (str): SQLite file.
+        max_bytes (int): Largest total size of the stored results.
+        batch_size (int): Number of pending changes written at a time.
+
+    Methods:
+        get(): Returns a cached result, or None.
+        put(): Stores a result.
+        flush(): Writes the pending changes and evicts old results.
+        size(): Returns the number of results and their total size.
+        close(): Flushes and closes the file.
+    """
+
+    def __init__(self, path : str, max_bytes : int = 256 * 1024 * 1024, batch_size : int = 100):
+        """
+        Initializes the result_cache class and creates the file if needed.
+
+        Args:
+            path (str): SQLite file.
+            max_bytes (int): Largest total size of the stored results.
+            batch_size (int): Number of pending changes written at a time.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+        self._pending = {}
+        self._touched = {}
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(SCHEMA)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, config : dict, seed : int) -> dict:
+        """
+        Returns the cached result of a run, or None.
+
+        Args:
+            config (dict): lunar_Helium_3_sim parameters, without the seed.
+            seed (int): Seed of the run.
+        Returns:
+            dict: Cached result, or None if the run is not cached.
+        """
+        if seed is None:
+            return None
+        key = cache_key(config, seed)
+        if key in self._pending:
+            self.hits += 1
+            return json.loads(self._pending[key][4])
+
+        row = self._connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        self._flush_if_full()
+        return json.loads(row[0])
+
+    def put(self, config : dict, seed : int, result : dict) -> None:
+        """
+        Stores the result of a run. It is written with the next batch.
+
+        Args:
+            config (dict): lunar_Helium_3_sim parameters, without the seed.
+            seed (int): Seed of the run.
+            result (dict): Result to store, e.g. total_loads, truck_loads,
+                           station_served and statistics. Must be JSON serializable.
+        Returns:
+            None
+        """
+        if seed is None:
+            return
+        key = cache_key(config, seed)
+        text = json.dumps(result, separators=(",", ":"))
+        self._pending[key] = (key, json.dumps(config, sort_keys=True), str(seed), ENGINE_VERSION,
+                              text, len(text), time.time())
+        self._flush_if_full()
+
+    def _flush_if_full(self) -> None:
+        """
+        Flushes when batch_size changes are pending.
+        """
+        if len(self._pending) + len(self._touched) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the pending results and last use times in one transaction, then
+        evicts the least recently used results over max_bytes.
+
+        Returns:
+            None
+        """
+        if not self._pending and not self._touched:
+            return
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   list(self._pending.values()))
+            connection.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                   [(last_used, key) for key, last_used in self._touched.items()])
+            self._evict()
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        logger.debug(f"Wrote {len(self._pending)} results to {self.path}")
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        """
+        Deletes the least recently used results until the rest fit in max_bytes.
+        Runs inside the flush transaction.
+        """
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        evicted = []
+        for key, size in self._connection.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+        self._connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} results from {self.path}")
+
+    def size(self) -> tuple:
+        """
+        Returns the number of stored results and their total size, after flushing.
+
+        Returns:
+            tuple: Tuple containing
+                - int: number of results
+                - int: total size in bytes
+        """
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+
+    def close(self) -> None:
+        """
+        Flushes the pending changes and closes the file.
+
+        Returns:
+            None
+        """
+        if self._connection is None:
+            return
+        self.flush()
+        self._connection.close()
+        self._connection = None
@@ -0,0 +1,371 @@
+from collections import OrderedDict
+
+import hashlib
+import heapq
+import json
+import math
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+
+# free-flow shortest travel times of the networks used last, by road_network.key()
+TRAVEL_TIME_CACHE_SIZE = 32
+_travel_time_cache = OrderedDict()
+
+def shortest_travel_times(num_nodes : int, segments : list) -> np.ndarray:
+    """
+    Returns the shortest travel time between every pair of nodes of a network
+    of two-way segments, with the Floyd-Warshall algorithm.
+
+    Args:
+        num_nodes (int): Number of nodes.
+        segments (list): (from node index, to node index, travel time) of each segment.
+    Returns:
+        np.ndarray: Travel times with shape (nodes, nodes), infinite between unconnected nodes.
+    """
+    distances = np.full((num_nodes, num_nodes), np.inf)
+    np.fill_diagonal(distances, 0.0)
+    for start, end, travel_time in segments:
+        if travel_time < distances[start, end]:
+            distances[start, end] = distances[end, start] = travel_time
+    for node in range(num_nodes):
+        np.minimum(distances, distances[:, node, None] + distances[None, node, :], out=distances)
+    return distances
+
+def cached_travel_times(key : str, num_nodes : int, segments : list) -> np.ndarray:
+    """
+    Returns the shortest_travel_times() of a network, computed once per key
+    and kept for the TRAVEL_TIME_CACHE_SIZE networks used last. The array is
+    read-only, copy it to change it.
+
+    Args:
+        key (str): Network key, see road_network.key().
+        num_nodes (int): Number of nodes.
+        segments (list): (from node index, to node index, travel time) of each segment.
+    Returns:
+        np.ndarray: Travel times with shape (nodes, nodes).
+    """
+    distances = _travel_time_cache.get(key)
+    if distances is not None:
+        _travel_time_cache.move_to_end(key)
+        return distances
+
+    distances = shortest_travel_times(num_nodes, segments)
+    distances.setflags(write=False)
+    _travel_time_cache[key] = distances
+    if len(_travel_time_cache) > TRAVEL_TIME_CACHE_SIZE:
+        _travel_time_cache.popitem(last=False)
+    logger.debug("Computed the shortest travel times of %s nodes", num_nodes)
+    return distances
+
+class road_network:
+    """
+    Represents the haul roads between the dig sites and the unload stations.
+
+    The roads are two-way segments between named nodes: dig sites, stations
+    and any junctions in between. Trucks work at the dig sites in turn, truck
+    ID modulo the number of sites, and drive the fastest route to the station
+    they are sent to.
+
+    The shortest travel time between every pair of nodes is computed once per
+    network and cached (see cached_travel_times()), so a trip is a lookup in
+    travel_times, a (sites, stations) array.
+
+    With congestion, every truck on the road counts on each segment of its
+    route until it arrives, and a segment takes
+        travel_time * (1 + alpha * (trucks / capacity) ** beta)
+    minutes, the delay rounded down to whole minutes (the BPR function). Trips
+    are expired at the next departure after their arrival. The travel times
+    only change when the delay of a segment gains or loses a minute, and then
+    only the entries whose shortest route can change are updated.
+
+    Attributes:
+        dig_sites (list): Node name of each dig site.
+        stations (list): Node name of each unload station, by station ID.
+        segments (list): [from node, to node, travel time in minutes, capacity in trucks] of each segment.
+        congestion (bool): Slow segments down with the trucks on them.
+        alpha (float): Delay of a segment at capacity, as a fraction of its travel time.
+        beta (float): How fast the delay grows with the trucks on a segment.
+        travel_times (np.ndarray): Current travel time from each dig site to each station.
+
+    Methods:
+        key(): Returns the key of the network layout.
+        spec(): Returns the parameters of the network.
+        site_of(): Returns the dig site of a truck.
+        dispatch(): Sends a departing truck to a station and returns its travel time.
+        route(): Returns the segments of the fastest route from a dig site to a station.
+        segment_time(): Returns the current travel time of a segment.
+        getstate(): Returns the trucks on the road.
+        setstate(): Restores the trucks on the road.
+    """
+
+    def __init__(self,
+                dig_sites : list,
+                stations : list,
+                segments : list,
+                congestion : bool = False,
+                alpha : float = 0.15,
+                beta : float = 4):
+        """
+        Initializes the road_network class and looks up its travel times.
+
+        Args:
+            dig_sites (list): Node name of each dig site.
+            stations (list): Node name of each unload station, by station ID.
+            segments (list): [from node, to node, travel time in minutes, capacity in trucks] of each segment.
+            congestion (bool): Slow segments down with the trucks on them.
+            alpha (float): Delay of a segment at capacity, as a fraction of its travel time.
+            beta (float): How fast the delay grows with the trucks on a segment.
+        """
+        if not dig_sites or not stations:
+            raise ValueError("A road network needs at least one dig site and one station")
+        if alpha < 0 or beta <= 0:
+            raise ValueError(f"Congestion parameters have to be positive: alpha {alpha}, beta {beta}")
+
+        self.dig_sites = list(dig_sites)
+        self.stations = list(stations)
+        self.segments = [list(segment) for segment in segments]
+        self.congestion = congestion
+        self.alpha = alpha
+        self.beta = beta
+
+        self._node = {}
+        for name in self.dig_sites + self.stations:
+            self._node.setdefault(name, len(self._node))
+        for segment in self.segments:
+            if len(segment) != 4:
+                raise ValueError(f"Segments need two nodes, a travel time and a capacity: {segment}")
+            start, end, travel_time, capacity = segment
+            if travel_time <= 0 or capacity <= 0:
+                raise ValueError(f"Segment travel time and capacity have to be positive: {segment}")
+            self._node.setdefault(start, len(self._node))
+            self._node.setdefault(end, len(self._node))
+
+        self._ends = [(self._node[start], self._node[end]) for start, end, travel_time, capacity in self.segments]
+        self._free = [segment[2] for segment in self.segments]
+        self._capacity = [segment[3] for segment in self.segments]
+        self._time = list(self._free)
+        self._load = [0] * len(self.segments)
+        self._adjacent = [[] for name in self._node]
+        for index, (start, end) in enumerate(self._ends):
+            self._adjacent[start].append((end, index))
+            self._adjacent[end].append((start, index))
+
+        self._sites = np.array([self._node[name] for name in self.dig_sites])
+        self._station_nodes = np.array([self._node[name] for name in self.stations])
+        # shared with every network of the same layout until congestion changes it
+        self._distances = cached_travel_times(self.key(), len(self._node),
+                                              [(start, end, travel_time) for (start, end), travel_time
+                                               in zip(self._ends, self._free)])
+        self.travel_times = self._distances[np.ix_(self._sites, self._station_nodes)]
+        if not np.isfinite(self.travel_times).all():
+            raise ValueError("Every station has to be reachable from every dig site")
+        # the same travel times as lists, the cheapest to read one trip at a time
+        self._travel_rows = self.travel_times.tolist()
+
+        # (site, station) mapped to the segment indexes of its fastest route
+        self._routes = {}
+        # heap of (arrival, sequence, segment indexes) of the trucks on the road
+        self._trips = []
+        self._sequence = 0
+
+    def key(self) -> str:
+        """
+        Returns the key of the network layout: its nodes and free-flow segments.
+
+        Returns:
+            str: Hex digest.
+        """
+        layout = json.dumps([self.dig_sites, self.stations, self.segments], sort_keys=True, default=str)
+        return hashlib.sha256(layout.encode()).hexdigest()
+
+    def spec(self) -> dict:
+        """
+        Returns the parameters of the network, to create it again.
+
+        Returns:
+            dict: Keyword arguments of road_network.
+        """
+        return {"dig_sites": list(self.dig_sites),
+                "stations": list(self.stations),
+                "segments": [list(segment) for segment in self.segments],
+                "congestion": self.congestion,
+                "alpha": self.alpha,
+                "beta": self.beta}
+
+    def site_of(self, truck_ID : int) -> int:
+        """
+        Returns the dig site a truck works at.
+
+        Args:
+            truck_ID (int): Truck ID.
+        Returns:
+            int: Dig site index.
+        """
+        return truck_ID % len(self.dig_sites)
+
+    def dispatch(self, truck_ID : int, time : float, policy : object) -> float:
+        """
+        Sends a truck that finished mining to the station where the dispatch
+        policy expects it to start unloading first, given the travel times from
+        its dig site, and puts it on the road.
+
+        Args:
+            truck_ID (int): Truck ID.
+            time (float): Current time.
+            policy (expected_wait_policy): Policy committing the truck to a station.
+        Returns:
+            float: Travel time to the station in minutes.
+        """
+        if self.congestion:
+            self._expire(time)
+        site = self.site_of(truck_ID)
+        travel_times = self._travel_rows[site]
+        station_ID = policy.reserve_route(truck_ID, time, travel_times)
+        travel_time = travel_times[station_ID]
+        if self.congestion:
+            self._depart(self.route(site, station_ID), time + travel_time)
+        return travel_time
+
+    def route(self, site : int, station_ID : int) -> tuple:
+        """
+        Returns the segments of the current fastest route from a dig site to a
+        station, cached until the travel times of the route change.
+
+        Args:
+            site (int): Dig site index.
+            station_ID (int): Station ID.
+        Returns:
+            tuple: Segment indexes in driving order.
+        """
+        route = self._routes.get((site, station_ID))
+        if route is not None:
+            return route
+
+        distances = self._distances
+        node = self._sites[site]
+        target = self._station_nodes[station_ID]
+        route = []
+        while node != target:
+            for neighbor, index in self._adjacent[node]:
+                if math.isclose(self._time[index] + distances[neighbor, target], distances[node, target]):
+                    route.append(index)
+                    node = neighbor
+                    break
+        route = tuple(route)
+        self._routes[(site, station_ID)] = route
+        return route
+
+    def segment_time(self, index : int) -> float:
+        """
+        Returns the current travel time of a segment.
+
+        Args:
+            index (int): Segment index.
+        Returns:
+            float: Travel time in minutes.
+        """
+        return self._time[index]
+
+    def getstate(self) -> dict:
+        """
+        Returns the trucks on the road, as JSON serializable lists and numbers.
+
+        Returns:
+            dict: [arrival, segment indexes] of every trip.
+        """
+        return {"trips": [[arrival, list(route)] for arrival, sequence, route in sorted(self._trips)]}
+
+    def setstate(self, state : dict) -> None:
+        """
+        Restores the trucks on the road from getstate() and the segment times they give.
+
+        Args:
+            state (dict): State from getstate().
+        Returns:
+            None
+        """
+        self._trips = []
+        self._load = [0] * len(self.segments)
+        for index in range(len(self.segments)):
+            self._set_time(index)
+        for arrival, route in state["trips"]:
+            self._depart(tuple(route), arrival)
+
+    def _depart(self, route : tuple, arrival : float) -> None:
+        """
+        Counts a truck on every segment of its route until its arrival.
+        """
+        self._sequence += 1
+        heapq.heappush(self._trips, (arrival, self._sequence, route))
+        for index in route:
+            self._load[index] += 1
+            self._set_time(index)
+
+    def _expire(self, time : float) -> None:
+        """
+        Takes the trucks that arrived by the input time off the road.
+        """
+        trips = self._trips
+        while trips and trips[0][0] <= time:
+            arrival, sequence, route = heapq.heappop(trips)
+            for index in route:
+                self._load[index] -= 1
+                self._set_time(index)
+
+    def _set_time(self, index : int) -> None:
+        """
+        Sets the travel time of a segment from its load, and updates the travel
+        times it changes.
+        """
+        free = self._free[index]
+        delay = math.floor(free * self.alpha * (self._load[index] / self._capacity[index]) ** self.beta)
+        new_time = free + delay
+        old_time = self._time[index]
+        if new_time == old_time:
+            return
+        self._time[index] = new_time
+
+        if not self._distances.flags.writeable:
+            self._distances = self._distances.copy()
+        distances = self._distances
+        start, end = self._ends[index]
+        if new_time < old_time:
+            # a faster segment only shortens the routes through it
+            through = np.minimum(distances[:, start, None] + new_time + distances[None, end, :],
+                                 distances[:, end, None] + new_time + distances[None, start, :])
+            changed = through < distances
+            distances[changed] = through[changed]
+            stale = [pair for pair in self._routes
+                     if changed[self._sites[pair[0]], self._station_nodes[pair[1]]]]
+        else:
+            # a slower segment only changes the routes that used it, found again from their start
+            used = np.isclose(distances[:, start, None] + old_time + distances[None, end, :], distances) | \
+                   np.isclose(distances[:, end, None] + old_time + distances[None, start, :], distances)
+            used &= np.isfinite(distances)
+            for source in np.nonzero(used.any(axis=1))[0]:
+                distances[source] = self._dijkstra(source)
+                distances[:, source] = distances[source]
+            stale = [pair for pair, route in self._routes.items() if index in route]
+        for pair in stale:
+            del self._routes[pair]
+        self.travel_times = distances[np.ix_(self._sites, self._station_nodes)]
+        self._travel_rows = self.travel_times.tolist()
+
+    def _dijkstra(self, source : int) -> np.ndarray:
+        """
+        Returns the current shortest travel times from one node to every node.
+        """
+        distances = np.full(len(self._node), np.inf)
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            for neighbor, index in self._adjacent[node]:
+                candidate = distance + self._time[index]
+                if candidate < distances[neighbor]:
+                    distances[neighbor] = candidate
+                    heapq.heappush(heap, (candidate, neighbor))
+        return distances
@@ -1,24 +1,346 @@
-# import yaml
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
 import logging
 
-from simulator import lunar_Helium_3_sim
+from simulator import lunar_Helium_3_sim, DISPATCH_POLICIES
 from log_setup import configure_logger
 
-# Configure the logger
-configure_logger()
 logger = logging.getLogger(__name__)
 
+class stack_sampler:
+    """
+    Represents a sampling profiler that records the call stack of one thread
+    at a fixed interval from a background thread, and writes the samples as
+    folded stacks, one "frame;frame;frame count" line per distinct stack, the
+    input of flamegraph.pl, speedscope and similar tools.
 
-sim_1 = lunar_Helium_3_sim(
-                num_mining_trucks = 10,
-                num_unload_stations = 2,
-                sim_duration_hrs = 72,
-                truck_unload_duration = 5,
-                travel_to_unload = 30,
-                mining_duration_min_hrs = 1,
-                mining_duration_max_hrs = 5)
+    Unlike cProfile, sampling adds no cost to each call, so the stacks show
+    where the time of a normal run goes.
 
-# an example of how to run multiple sims and get an average of completed loads
-# per configuration.
+    Attributes:
+        interval (float): Time between samples in seconds.
+        samples (dict): Folded stack mapped to its number of samples.
 
-sim_1.run()
+    Methods:
+        start(): Starts sampling the calling thread.
+        stop(): Stops sampling.
+        folded(): Returns the folded stack lines.
+    """
+
+    def __init__(self, interval : float = 0.001):
+        """
+        Initializes the stack_sampler class.
+
+        Args:
+            interval (float): Time between samples in seconds.
+        """
+        self.interval = interval
+        self.samples = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Starts sampling the calling thread.
+
+        Returns:
+            None
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, args=(threading.get_ident(),), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops sampling.
+
+        Returns:
+            None
+        """
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self, thread_id : int) -> None:
+        """
+        Records the stack of the sampled thread until stopped.
+        """
+        samples = self.samples
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                folded = ";".join(reversed(stack))
+                samples[folded] = samples.get(folded, 0) + 1
+
+    def folded(self) -> list:
+        """
+        Returns the folded stack lines, most sampled first.
+
+        Returns:
+            list: "frame;frame;frame count" strings, the root frame first.
+        """
+        return [f"{stack} {count}" for stack, count in sorted(self.samples.items(), key=lambda item: -item[1])]
+
+def run_once(config : dict) -> tuple:
+    """
+    Runs one simulation.
+
+    Args:
+        config (dict): Keyword arguments of lunar_Helium_3_sim.
+    Returns:
+        tuple: Tuple containing
+            - float: wall time in seconds
+            - int: total loads
+            - lunar_Helium_3_sim: the finished simulation
+    """
+    sim = lunar_Helium_3_sim(**config)
+    start = time.perf_counter()
+    total_loads = sim.run()
+    return time.perf_counter() - start, total_loads, sim
+
+def time_runs(config : dict, repeat : int = 1) -> dict:
+    """
+    Runs a configuration repeat times and summarizes the wall time.
+
+    Args:
+        config (dict): Keyword arguments of lunar_Helium_3_sim.
+        repeat (int): Number of runs.
+    Returns:
+        dict: Dictionary containing
+            - runs: wall_time_s and total_loads of each run.
+            - best_wall_time_s and mean_wall_time_s.
+            - sim_minutes_per_s: simulated minutes per wall clock second of the best run.
+            - statistics: statistics summary of the last run, with collect_statistics.
+            - gradients: derivative estimates of the last run, with estimate_gradients.
+    """
+    if repeat < 1:
+        raise ValueError(f"Repeat has to be at least 1: {repeat}")
+
+    runs = []
+    for n in range(repeat):
+        wall_time, total_loads, sim = run_once(config)
+        runs.append({"wall_time_s": wall_time, "total_loads": total_loads})
+    wall_times = [run["wall_time_s"] for run in runs]
+    best = min(wall_times)
+    timing = {"runs": runs,
+              "best_wall_time_s": best,
+              "mean_wall_time_s": sum(wall_times) / repeat,
+              "sim_minutes_per_s": sim.sim_duration / best if best else float("inf")}
+    if sim.statistics is not None:
+        timing["statistics"] = sim.statistics.summary()
+    if sim.gradients is not None:
+        timing["gradients"] = sim.gradients
+    return timing
+
+def profile_run(config : dict, prefix : str, top : int = 30, interval : float = 0.001) -> dict:
+    """
+    Profiles a configuration with two more runs: one under cProfile, written
+    as pstats data and as a text report, and one with a stack_sampler, written
+    as folded stacks for a flamegraph.
+
+    Args:
+        config (dict): Keyword arguments of lunar_Helium_3_sim.
+        prefix (str): Path prefix of the output files.
+        top (int): Number of functions in the text report.
+        interval (float): Time between stack samples in seconds.
+    Returns:
+        dict: Paths of the pstats, text report and folded stack files, and the
+              number of stack samples.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    run_once(config)
+    profiler.disable()
+
+    paths = {"pstats": f"{prefix}.prof", "report": f"{prefix}.txt", "folded": f"{prefix}.folded"}
+    profiler.dump_stats(paths["pstats"])
+    with open(paths["report"], "w") as report_file:
+        stats = pstats.Stats(profiler, stream=report_file)
+        stats.sort_stats("cumulative").print_stats(top)
+        stats.sort_stats("tottime").print_stats(top)
+
+    # the sampler thread can only take a sample when the interpreter switches threads
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(interval, switch_interval))
+    sampler = stack_sampler(interval)
+    sampler.start()
+    try:
+        run_once(config)
+    finally:
+        sampler.stop()
+        sys.setswitchinterval(switch_interval)
+    with open(paths["folded"], "w") as folded_file:
+        folded_file.writelines(line + "\n" for line in sampler.folded())
+
+    return {**paths, "samples": sum(sampler.samples.values())}
+
+def memory_run(config : dict, top : int = 10, frames : int = 1) -> dict:
+    """
+    Measures the memory of one more run with tracemalloc: the peak, and the
+    allocation sites holding the most memory at the end of the run, while the
+    simulation is still alive.
+
+    Args:
+        config (dict): Keyword arguments of lunar_Helium_3_sim.
+        top (int): Number of allocation sites.
+        frames (int): Frames kept per allocation, more frames group by call path.
+    Returns:
+        dict: Dictionary containing
+            - peak_memory_bytes and final_memory_bytes.
+            - top_allocations: site, size_bytes and count per allocation site.
+    """
+    tracemalloc.start(frames)
+    try:
+        wall_time, total_loads, sim = run_once(config)
+        snapshot = tracemalloc.take_snapshot()
+        final, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    key = "traceback" if frames > 1 else "lineno"
+    sites = [{"site": " <- ".join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in stat.traceback),
+              "size_bytes": stat.size,
+              "count": stat.count}
+             for stat in snapshot.statistics(key)[:top]]
+    return {"peak_memory_bytes": peak, "final_memory_bytes": final, "top_allocations": sites}
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Returns the command line parser, one option per lunar_Helium_3_sim parameter
+    plus the run, profiling and logging options.
+
+    Returns:
+        argparse.ArgumentParser: Parser.
+    """
+    parser = argparse.ArgumentParser(description="Run the lunar Helium-3 mining simulation.")
+    parser.add_argument("--trucks", type=int, default=10, help="number of mining trucks")
+    parser.add_argument("--stations", type=int, default=2, help="number of unload stations")
+    parser.add_argument("--hours", type=float, default=72, help="simulation duration in hours")
+    parser.add_argument("--unload", type=float, default=5, help="unloading duration in minutes")
+    parser.add_argument("--travel", type=float, default=30, help="travel duration in minutes")
+    parser.add_argument("--mining-min", type=float, default=1, help="shortest mining duration in hours")
+    parser.add_argument("--mining-max", type=float, default=5, help="longest mining duration in hours")
+    parser.add_argument("--engine", choices=("tick", "event", "fleet"), default="tick")
+    parser.add_argument("--seed", type=int, help="seed of the runs, unseeded when not set")
+    parser.add_argument("--common-random-numbers", action="store_true")
+    parser.add_argument("--dispatch-policy", choices=DISPATCH_POLICIES, default="shortest_queue")
+    parser.add_argument("--assign-on-departure", action="store_true")
+    for name in ("mining", "travel", "unload"):
+        parser.add_argument(f"--{name}-distribution", type=json.loads, metavar="SPEC",
+                            help=f'{name} duration distribution as JSON, e.g. \'["uniform", 20, 40]\'')
+    parser.add_argument("--road-network", type=json.loads, metavar="SPEC",
+                        help="road_network keyword arguments as JSON, needs --dispatch-policy expected_wait")
+    parser.add_argument("--statistics", action="store_true", help="collect and print run statistics")
+    parser.add_argument("--gradients", action="store_true",
+                        help="estimate and print the derivatives of the loads and waiting time")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs, the best is reported")
+    parser.add_argument("--profile", metavar="PREFIX", nargs="?", const="run_sim_profile",
+                        help="write PREFIX.prof, PREFIX.txt and PREFIX.folded from two more runs")
+    parser.add_argument("--memory", action="store_true",
+                        help="report peak memory and top allocation sites from one more run")
+    parser.add_argument("--top", type=int, default=20, help="functions and allocation sites reported")
+    parser.add_argument("--output", help="write the timing, profile and memory summary as JSON")
+    parser.add_argument("--log", choices=("debug", "quiet", "background"),
+                        help="logging mode, quiet when profiling and debug otherwise")
+    parser.add_argument("--no-log-file", action="store_true", help="only log to the console")
+    return parser
+
+def sim_config(args : argparse.Namespace) -> dict:
+    """
+    Returns the lunar_Helium_3_sim keyword arguments of parsed command line arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+    Returns:
+        dict: Simulation parameters.
+    """
+    return {"num_mining_trucks": args.trucks,
+            "num_unload_stations": args.stations,
+            "sim_duration_hrs": args.hours,
+            "truck_unload_duration": args.unload,
+            "travel_to_unload": args.travel,
+            "mining_duration_min_hrs": args.mining_min,
+            "mining_duration_max_hrs": args.mining_max,
+            "engine": args.engine,
+            "seed": args.seed,
+            "common_random_numbers": args.common_random_numbers,
+            "collect_statistics": args.statistics,
+            "dispatch_policy": args.dispatch_policy,
+            "assign_on_departure": args.assign_on_departure,
+            "mining_distribution": args.mining_distribution,
+            "travel_distribution": args.travel_distribution,
+            "unload_distribution": args.unload_distribution,
+            "road_network": args.road_network,
+            "estimate_gradients": args.gradients}
+
+def main(argv : list = None) -> int:
+    """
+    Runs the simulation from the command line, with optional CPU and memory
+    profiling, and prints a timing summary.
+
+    Args:
+        argv (list): Command line arguments (Optional).
+    Returns:
+        int: Exit status.
+    """
+    args = build_parser().parse_args(argv)
+    profiling = args.profile is not None or args.memory
+    # debug logging would dominate a profile, so profiles are quiet unless asked
+    listener = configure_logger(args.log or ("quiet" if profiling else "debug"), log_file=not args.no_log_file)
+
+    try:
+        config = sim_config(args)
+        summary = {"config": config, "timing": time_runs(config, args.repeat)}
+        timing = summary["timing"]
+        # results go to stdout, so quiet logging keeps them and the log only holds warnings
+        print(f"{args.repeat} run(s) of {args.trucks} trucks, {args.stations} stations, {args.hours:g} hours: "
+              f"best {timing['best_wall_time_s']:.3f} s, mean {timing['mean_wall_time_s']:.3f} s, "
+              f"{timing['sim_minutes_per_s']:.0f} sim min/s, "
+              f"loads {[run['total_loads'] for run in timing['runs']]}")
+        if "statistics" in timing:
+            waiting = timing["statistics"]["waiting_time"]
+            if waiting["count"]:
+                print(f"Waiting time: mean {waiting['mean']:.2f} min, p50 {waiting['p50']:g}, p90 {waiting['p90']:g}, "
+                      f"p99 {waiting['p99']:g}, max {waiting['max']} over {waiting['count']} waits")
+            else:
+                print("Waiting time: no truck started unloading")
+            print(f"Station busy fractions: "
+                  f"{[round(station['busy_fraction'], 3) for station in timing['statistics']['stations']]}")
+        if "gradients" in timing:
+            for metric, derivatives in timing["gradients"].items():
+                print(f"d {metric}: " + ", ".join(f"{name} {value:.4g}" for name, value in derivatives.items()))
+
+        if args.profile is not None:
+            summary["profile"] = profile_run(config, args.profile, top=args.top)
+            print(f"Profile written to {summary['profile']['pstats']} and {summary['profile']['report']}, "
+                  f"{summary['profile']['samples']} stack samples to {summary['profile']['folded']}")
+
+        if args.memory:
+            summary["memory"] = memory_run(config, top=args.top)
+            print(f"Peak memory {summary['memory']['peak_memory_bytes']} bytes, "
+                  f"{summary['memory']['final_memory_bytes']} bytes at the end of the run")
+            for site in summary["memory"]["top_allocations"]:
+                print(f"{site['size_bytes']:>12} bytes in {site['count']:>8} blocks at {site['site']}")
+
+        if args.output is not None:
+            with open(args.output, "w") as output_file:
+                json.dump(summary, output_file, indent=2)
+    finally:
+        if listener is not None:
+            listener.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
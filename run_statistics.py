@@ -0,0 +1,367 @@
+import math
+import logging
+logger = logging.getLogger(__name__)
+
+class running_stats:
+    """
+    Represents the count, mean, variance, minimum and maximum of a stream of
+    values, updated one value at a time (Welford's method).
+
+    Methods:
+        add(): Adds a value.
+        variance(): Returns the sample variance.
+    """
+    def __init__(self):
+        """
+        Initializes an empty running_stats.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.sum_squares = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value : float) -> None:
+        """
+        Adds a value.
+
+        Args:
+            value (float): Value to add.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.sum_squares += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def variance(self) -> float:
+        """
+        Returns the sample variance.
+
+        Returns:
+            float: Sample variance, 0 with less than two values.
+        """
+        return self.sum_squares / (self.count - 1) if self.count > 1 else 0.0
+
+class p2_quantile:
+    """
+    Represents a streaming estimate of one quantile using the P-square algorithm
+    (Jain and Chlamtac, 1985). Only five markers are stored, whatever the
+    number of values.
+
+    Attributes:
+        quantile (float): Quantile to estimate, between 0 and 1.
+
+    Methods:
+        add(): Adds a value.
+        value(): Returns the current quantile estimate.
+    """
+    def __init__(self, quantile : float):
+        """
+        Initializes the p2_quantile class for the input quantile.
+
+        Args:
+            quantile (float): Quantile to estimate, between 0 and 1.
+        """
+        self.quantile = quantile
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value : float) -> None:
+        """
+        Adds a value.
+
+        Args:
+            value (float): Value to add.
+        """
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # find the cell the value falls in, extending the outer markers if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # move the middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+               (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i : int, step : int) -> float:
+        """
+        Returns the piecewise-parabolic height of marker i moved by step.
+        """
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> float:
+        """
+        Returns the current quantile estimate.
+
+        Returns:
+            float: Quantile estimate, None if no value was added.
+        """
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # exact quantile of the few values seen so far
+            rank = self.quantile * (self.count - 1)
+            low = math.floor(rank)
+            high = min(low + 1, self.count - 1)
+            return self.heights[low] + (rank - low) * (self.heights[high] - self.heights[low])
+        return self.heights[2]
+
+class time_weighted_value:
+    """
+    Represents a value that changes over time, such as a queue length, with
+    its time-weighted mean and maximum.
+
+    Methods:
+        set(): Sets a new value from the input time.
+        mean(): Returns the time-weighted mean up to the input time.
+    """
+    def __init__(self, value : float = 0, start_time : float = 0):
+        """
+        Initializes the time_weighted_value class.
+
+        Args:
+            value (float): Initial value.
+            start_time (float): Time the value starts at.
+        """
+        self.value = value
+        self.max = value
+        self.start_time = start_time
+        self.last_time = start_time
+        self.area = 0.0
+
+    def set(self, value : float, time : float) -> None:
+        """
+        Sets a new value from the input time.
+
+        Args:
+            value (float): New value.
+            time (float): Time of the change.
+        """
+        self.area += self.value * (time - self.last_time)
+        self.last_time = time
+        self.value = value
+        if value > self.max:
+            self.max = value
+
+    def mean(self, time : float) -> float:
+        """
+        Returns the time-weighted mean up to the input time.
+
+        Args:
+            time (float): Current time.
+        Returns:
+            float: Time-weighted mean.
+        """
+        duration = time - self.start_time
+        if duration <= 0:
+            return self.value
+        return (self.area + self.value * (time - self.last_time)) / duration
+
+class sim_statistics:
+    """
+    Represents online statistics of a simulation run.
+
+    Statistics are updated when a truck changes state or a station changes,
+    and use memory that depends on the number of trucks and stations only, not
+    on the simulation duration. summary() can be read at any time during a run.
+
+    Collected statistics:
+        - Time spent in each state per truck and for the whole fleet.
+        - Busy fraction of each station.
+        - Time-weighted mean and maximum queue length of each station.
+        - Waiting time to unload: count, mean, variance, min, max and quantiles.
+
+    Attributes:
+        num_trucks (int): Number of trucks.
+        num_stations (int): Number of stations.
+        quantiles (tuple): Waiting time quantiles to estimate.
+
+    Methods:
+        update_current_time(): Updates the current simulation time.
+        truck_state_changed(): Records a truck state change.
+        station_changed(): Records a station availability or queue change.
+        reset(): Discards everything collected before a time, e.g. a warm-up period.
+        summary(): Returns the statistics so far.
+    """
+
+    def __init__(self,
+                num_trucks : int,
+                num_stations : int,
+                quantiles : tuple = (0.5, 0.9, 0.99)):
+        """
+        Initializes the sim_statistics class.
+
+        Args:
+            num_trucks (int): Number of trucks.
+            num_stations (int): Number of stations.
+            quantiles (tuple): Waiting time quantiles to estimate.
+        """
+        self.num_trucks = num_trucks
+        self.num_stations = num_stations
+        self.quantiles = quantiles
+        self.current_time = 0
+        self.start_time = 0
+
+        # every truck starts in start_mining at time 0
+        self.truck_state = ["start_mining"] * num_trucks
+        self.truck_state_start = [0] * num_trucks
+        self.truck_state_time = [{} for n in range(num_trucks)]
+
+        self.station_busy = [time_weighted_value() for m in range(num_stations)]
+        self.station_queue = [time_weighted_value() for m in range(num_stations)]
+
+        self.waiting_time = running_stats()
+        self.waiting_quantiles = [p2_quantile(quantile) for quantile in quantiles]
+
+    def update_current_time(self, current_time : float) -> None:
+        """
+        Updates the current simulation time.
+
+        Args:
+            current_time (float): current time from simulator
+        Returns:
+            None
+        """
+        self.current_time = current_time
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        """
+        Records a truck state change.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (str): Name of the new state.
+            time (float): Time of the change.
+        Returns:
+            None
+        """
+        previous_state = self.truck_state[truck_ID]
+        duration = time - self.truck_state_start[truck_ID]
+        state_time = self.truck_state_time[truck_ID]
+        state_time[previous_state] = state_time.get(previous_state, 0) + duration
+
+        if previous_state == "wait_to_unload":
+            self.waiting_time.add(duration)
+            for quantile in self.waiting_quantiles:
+                quantile.add(duration)
+
+        self.truck_state[truck_ID] = state
+        self.truck_state_start[truck_ID] = time
+
+    def station_changed(self, station : object) -> None:
+        """
+        Records a station availability or queue change at the current time.
+
+        Args:
+            station (unload_stations): Station that changed.
+        Returns:
+            None
+        """
+        busy = 0 if station.is_available else 1
+        if busy != self.station_busy[station.ID].value:
+            self.station_busy[station.ID].set(busy, self.current_time)
+        queue_length = len(station.truck_queue)
+        if queue_length != self.station_queue[station.ID].value:
+            self.station_queue[station.ID].set(queue_length, self.current_time)
+
+    def reset(self, time : float) -> None:
+        """
+        Discards everything collected before the input time, so the statistics
+        only cover the time from there on. Trucks and stations keep their
+        current state, which counts from the input time, e.g. a truck waiting at
+        the reset only adds the waiting time after it.
+
+        Args:
+            time (float): Time the statistics start from.
+        Returns:
+            None
+        """
+        self.current_time = time
+        self.start_time = time
+        self.truck_state_start = [time] * self.num_trucks
+        self.truck_state_time = [{} for n in range(self.num_trucks)]
+        self.station_busy = [time_weighted_value(busy.value, time) for busy in self.station_busy]
+        self.station_queue = [time_weighted_value(queue.value, time) for queue in self.station_queue]
+        self.waiting_time = running_stats()
+        self.waiting_quantiles = [p2_quantile(quantile) for quantile in self.quantiles]
+
+    def summary(self) -> dict:
+        """
+        Returns the statistics from the start, or the last reset(), up to the current time.
+
+        Returns:
+            dict: Dictionary containing
+                - time: current time.
+                - start_time: time the statistics start from.
+                - truck_state_time: minutes in each state for the whole fleet.
+                - trucks: minutes in each state per truck.
+                - stations: busy_fraction, mean_queue_length and max_queue_length per station.
+                - waiting_time: count, mean, variance, min, max and the quantiles.
+        """
+        time = self.current_time
+        trucks = []
+        for truck_ID in range(self.num_trucks):
+            state_time = dict(self.truck_state_time[truck_ID])
+            state = self.truck_state[truck_ID]
+            state_time[state] = state_time.get(state, 0) + time - self.truck_state_start[truck_ID]
+            trucks.append(state_time)
+
+        fleet_state_time = {}
+        for state_time in trucks:
+            for state, duration in state_time.items():
+                fleet_state_time[state] = fleet_state_time.get(state, 0) + duration
+
+        stations = [{"busy_fraction": busy.mean(time),
+                     "mean_queue_length": queue.mean(time),
+                     "max_queue_length": queue.max}
+                    for busy, queue in zip(self.station_busy, self.station_queue)]
+
+        waiting_time = {"count": self.waiting_time.count,
+                        "mean": self.waiting_time.mean,
+                        "variance": self.waiting_time.variance(),
+                        "min": self.waiting_time.min,
+                        "max": self.waiting_time.max}
+        for quantile in self.waiting_quantiles:
+            waiting_time[f"p{quantile.quantile * 100:g}"] = quantile.value()
+
+        return {"time": time,
+                "start_time": self.start_time,
+                "truck_state_time": fleet_state_time,
+                "trucks": trucks,
+                "stations": stations,
+                "waiting_time": waiting_time}
@@ -0,0 +1,450 @@
+from simulator import lunar_Helium_3_sim, substream_seed
+from fleet import STATE_NAMES
+
+import math
+import multiprocessing
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+# truck states a truck can leave its site from: it holds no station and is in no queue it needs
+TRANSFERABLE_STATES = ("start_mining", "mining_in_progress")
+
+def remove_trucks(snapshot : dict, truck_IDs : list) -> dict:
+    """
+    Returns a copy of a snapshot without the input trucks. The other trucks
+    are renumbered in order, in the truck columns and in the station queues,
+    and the removed trucks are dropped from any queue they were still in.
+
+    Args:
+        snapshot (dict): Snapshot from lunar_Helium_3_sim.snapshot().
+        truck_IDs (list): IDs of the trucks to remove.
+    Returns:
+        dict: Snapshot with fewer trucks.
+    """
+    removed = set(truck_IDs)
+    num_trucks = len(snapshot["trucks"]["state"])
+    kept = [truck_ID for truck_ID in range(num_trucks) if truck_ID not in removed]
+    new_ID = {old_ID: new_ID for new_ID, old_ID in enumerate(kept)}
+
+    trucks = {name: [column[truck_ID] for truck_ID in kept] for name, column in snapshot["trucks"].items()}
+    stations = dict(snapshot["stations"])
+    stations["truck_queue"] = [[new_ID[truck_ID] for truck_ID in queue if truck_ID in new_ID]
+                               for queue in stations["truck_queue"]]
+    stations["truck_ID"] = [new_ID.get(truck_ID) for truck_ID in stations["truck_ID"]]
+    # per truck random substreams, duration samplers and station reservations follow their truck
+    streams = [[name, new_ID[index], *state] for name, index, *state in snapshot.get("streams", [])
+               if index in new_ID]
+    durations = [[name, truck_ID if truck_ID is None else new_ID[truck_ID], state]
+                 for name, truck_ID, state in snapshot.get("durations", [])
+                 if truck_ID is None or truck_ID in new_ID]
+    dispatch = snapshot.get("dispatch")
+    if dispatch is not None:
+        dispatch = {**dispatch, "reservations": [[new_ID[truck_ID], station_ID, start]
+                                                 for truck_ID, station_ID, start in dispatch["reservations"]
+                                                 if truck_ID in new_ID]}
+    return {**snapshot,
+            "streams": streams,
+            "durations": durations,
+            "dispatch": dispatch,
+            "config": {**snapshot["config"], "num_mining_trucks": len(kept)},
+            "trucks": trucks,
+            "stations": stations}
+
+class site_shard:
+    """
+    Represents one mining site of a sharded_sim, with its own trucks, stations
+    and station_manager in one lunar_Helium_3_sim.
+
+    Trucks leave the site when a transfer asks for them, taken from the trucks
+    that are mining and started most recently, so the least mining is lost.
+    Their loads stay counted at the site. Arriving trucks start mining at the
+    site with a mining duration drawn at the site. Both go through a snapshot
+    of the site, so the rest of the site continues exactly as if it never stopped.
+
+    Attributes:
+        site_ID (int): Index of the site.
+        sim (lunar_Helium_3_sim): Simulation of the site.
+        departed_loads (int): Loads completed by trucks that left the site.
+        departures (int): Trucks that left the site.
+        arrivals (int): Trucks that arrived at the site.
+
+    Methods:
+        window(): Applies transfers and runs the site up to the end of a window.
+        status(): Returns the state of the site.
+        finish(): Finishes the run and returns the results of the site.
+    """
+
+    def __init__(self, site_ID : int, config : dict):
+        """
+        Initializes the site_shard class and sets up its simulation.
+
+        Args:
+            site_ID (int): Index of the site.
+            config (dict): lunar_Helium_3_sim parameters of the site.
+        """
+        self.site_ID = site_ID
+        self.sim = lunar_Helium_3_sim(**config)
+        self.sim.setup()
+        self.departed_loads = 0
+        self.departures = 0
+        self.arrivals = 0
+
+    def window(self, arrivals : int, departures : int, until : float) -> dict:
+        """
+        Adds the arriving trucks, removes up to the requested number of
+        departing trucks, then runs the site up to the end of the window.
+
+        Args:
+            arrivals (int): Trucks arriving at the current time.
+            departures (int): Trucks asked to leave at the current time.
+            until (float): End of the window in minutes.
+        Returns:
+            dict: status() of the site, with the number of trucks that left as departed.
+        """
+        departed = 0
+        if arrivals or departures:
+            departed = self._transfer(arrivals, departures)
+        self.sim.advance(until)
+        return {**self.status(), "departed": departed}
+
+    def _transfer(self, arrivals : int, departures : int) -> int:
+        """
+        Restores the site from a snapshot with the departing trucks removed and
+        the arriving trucks added.
+
+        Returns:
+            int: Number of trucks that left.
+        """
+        snapshot = self.sim.snapshot()
+        trucks = snapshot["trucks"]
+        candidates = [truck_ID for truck_ID, state in enumerate(trucks["state"]) if state in TRANSFERABLE_STATES]
+        candidates.sort(key=lambda truck_ID: (-(trucks["operation_start_time"][truck_ID] or 0), -truck_ID))
+        leaving = candidates[:departures]
+
+        self.departed_loads += sum(trucks["completed_load_count"][truck_ID] for truck_ID in leaving)
+        snapshot = remove_trucks(snapshot, leaving)
+        num_trucks = snapshot["config"]["num_mining_trucks"] + arrivals
+        self.sim = lunar_Helium_3_sim.from_snapshot(snapshot, num_mining_trucks=num_trucks)
+
+        self.departures += len(leaving)
+        self.arrivals += arrivals
+        logger.debug(f"Site ({self.site_ID}) at {snapshot['time']}: {len(leaving)} trucks left, {arrivals} arrived")
+        return len(leaving)
+
+    def status(self) -> dict:
+        """
+        Returns the state of the site.
+
+        Returns:
+            dict: Dictionary containing
+                - site: site index.
+                - time: current time in minutes.
+                - num_mining_trucks: trucks at the site.
+                - loads: loads completed at the site so far.
+                - waiting: trucks waiting for a station.
+                - idle_stations: stations with no truck and no queue.
+        """
+        sim = self.sim
+        if sim.engine == "fleet":
+            states = [STATE_NAMES[state] for state in sim.mining_trucks.phase]
+        else:
+            states = [truck.state.__name__ for truck in sim.mining_trucks]
+        return {"site": self.site_ID,
+                "time": sim.current_time,
+                "num_mining_trucks": len(states),
+                "loads": self.departed_loads + sum(truck.get_completed_load_count() for truck in sim.mining_trucks),
+                "waiting": states.count("wait_to_unload"),
+                "idle_stations": sum(1 for station in sim.unloading_stations
+                                     if station.is_available and not station.truck_queue)}
+
+    def finish(self) -> dict:
+        """
+        Finishes the run of the site and returns its results.
+
+        Returns:
+            dict: Dictionary containing
+                - site: site index.
+                - total_loads: loads completed at the site, by every truck that was there.
+                - num_mining_trucks: trucks at the site at the end.
+                - truck_loads: loads of each truck at the site at the end.
+                - station_served: trucks served by each station.
+                - departures: trucks that left the site.
+                - arrivals: trucks that arrived at the site.
+        """
+        loads = self.sim.finish()
+        return {"site": self.site_ID,
+                "total_loads": loads + self.departed_loads,
+                "num_mining_trucks": len(self.sim.mining_trucks),
+                "truck_loads": [truck.get_completed_load_count() for truck in self.sim.mining_trucks],
+                "station_served": [station.get_total_trucks_served() for station in self.sim.unloading_stations],
+                "departures": self.departures,
+                "arrivals": self.arrivals}
+
+def run_shard(connection : object, site_ID : int, config : dict) -> None:
+    """
+    Runs a site_shard in a worker process, calling the methods the coordinator
+    sends over the connection until it sends None.
+
+    Args:
+        connection (multiprocessing.connection.Connection): Worker end of a pipe.
+        site_ID (int): Index of the site.
+        config (dict): lunar_Helium_3_sim parameters of the site.
+    Returns:
+        None
+    """
+    shard = None
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        name, args = message
+        try:
+            if shard is None:
+                shard = site_shard(site_ID, config)
+            connection.send((True, getattr(shard, name)(*args)))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
+
+class sharded_sim:
+    """
+    Represents a mining operation split into sites, each simulated as a
+    site_shard with its own trucks, stations and station_manager, in its own
+    process.
+
+    Sites only interact through truck transfers, which take transfer_time
+    minutes between sites. The sites run in lockstep windows of at most
+    transfer_time minutes: at each window start the coordinator hands every
+    site its arriving trucks and the trucks asked to leave, and every site runs
+    to the end of the window on its own. A truck that leaves during a window
+    start always arrives at a later window start, so a site never needs
+    anything from another site while it runs a window (conservative
+    synchronization), and the run is the same with or without processes.
+
+    Transfers come from a schedule of (time, from site, to site, trucks), run at
+    the first window start at or after their time, and from an optional policy
+    called at every window start with the status of every site. Trucks are only
+    taken while they are mining, so a transfer can wait for the next window.
+
+    Attributes:
+        sites (list): lunar_Helium_3_sim parameters of each site.
+        sim_duration_hrs (float): Simulation duration of every site in hours.
+        transfer_time (float): Minutes a truck takes to move between sites.
+        window (float): Minutes between synchronizations.
+        transfers (list): Scheduled transfers as (time in minutes, from site, to site, trucks).
+        policy (function): Returns transfers from (time, list of site statuses) (Optional).
+        seed (int): Seed every site seed is derived from (Optional).
+        processes (bool): Run each site in its own process.
+
+    Methods:
+        run(): Runs every site and returns the merged report.
+    """
+
+    def __init__(self,
+                sites : list,
+                sim_duration_hrs : float,
+                transfer_time : float = 60,
+                window : float = None,
+                transfers : list = (),
+                policy : object = None,
+                seed : int = None,
+                processes : bool = True):
+        """
+        Initializes the sharded_sim class.
+
+        Args:
+            sites (list): lunar_Helium_3_sim parameters of each site, without sim_duration_hrs and seed.
+            sim_duration_hrs (float): Simulation duration of every site in hours.
+            transfer_time (float): Minutes a truck takes to move between sites.
+            window (float): Minutes between synchronizations, at most and by default transfer_time.
+            transfers (list): Scheduled transfers as (time in minutes, from site, to site, trucks).
+            policy (function): Returns transfers as (from site, to site, trucks) from
+                               (time, list of site statuses) at every window start (Optional).
+            seed (int): Seed every site seed is derived from (Optional).
+            processes (bool): Run each site in its own process, or all in this one.
+        """
+        window = transfer_time if window is None else window
+        if not 0 < window <= transfer_time:
+            raise ValueError(f"Window has to be positive and at most the transfer time {transfer_time}: {window}")
+        for transfer in transfers:
+            at, from_site, to_site, trucks = transfer
+            if not (0 <= from_site < len(sites) and 0 <= to_site < len(sites)) or from_site == to_site:
+                raise ValueError(f"Transfer between unknown or identical sites: {transfer}")
+            if trucks < 1:
+                raise ValueError(f"Transfer has to move at least one truck: {transfer}")
+
+        self.sites = sites
+        self.sim_duration_hrs = sim_duration_hrs
+        self.transfer_time = transfer_time
+        self.window = window
+        self.transfers = sorted(transfers)
+        self.policy = policy
+        self.seed = seed
+        self.processes = processes
+
+    def site_config(self, site_ID : int) -> dict:
+        """
+        Returns the lunar_Helium_3_sim parameters of a site, with the shared
+        duration and a seed derived from the seed.
+
+        Args:
+            site_ID (int): Index of the site.
+        Returns:
+            dict: lunar_Helium_3_sim parameters.
+        """
+        seed = substream_seed(self.seed, "site", site_ID) if self.seed is not None else None
+        return {"engine": "event", **self.sites[site_ID], "sim_duration_hrs": self.sim_duration_hrs, "seed": seed}
+
+    def run(self) -> dict:
+        """
+        Runs every site to the end and merges their results.
+
+        Returns:
+            dict: Dictionary containing
+                - total_loads: loads completed at every site.
+                - sites: finish() results of each site.
+                - transfers: completed transfers as dicts with departure, arrival,
+                  from_site, to_site and trucks.
+                - windows: number of synchronization windows.
+                - wall_time_s: run time.
+        """
+        start = time.perf_counter()
+        shards = self._start_shards()
+        try:
+            report = self._run_windows(shards)
+        finally:
+            self._stop_shards(shards)
+        report["wall_time_s"] = time.perf_counter() - start
+
+        logger.info(f"Total loads completed at {len(self.sites)} sites: {report['total_loads']}, "
+                    f"{len(report['transfers'])} transfers in {report['windows']} windows")
+        for site in report["sites"]:
+            logger.info(f"Site ({site['site']}) completed {site['total_loads']} loads, "
+                        f"{site['departures']} trucks left and {site['arrivals']} arrived")
+        return report
+
+    def _run_windows(self, shards : list) -> dict:
+        """
+        Runs the synchronization windows and returns the merged report.
+        """
+        sim_duration = self.sim_duration_hrs * 60
+        num_windows = math.ceil(sim_duration / self.window)
+        scheduled = list(self.transfers)
+        pending = []
+        in_transit = []
+        completed = []
+        statuses = [None] * len(shards)
+
+        for window_index in range(num_windows):
+            now = window_index * self.window
+            while scheduled and scheduled[0][0] <= now:
+                at, from_site, to_site, trucks = scheduled.pop(0)
+                pending.append([from_site, to_site, trucks])
+            if self.policy is not None and window_index > 0:
+                pending.extend([list(transfer) for transfer in self.policy(now, statuses)])
+
+            arrivals = [0] * len(shards)
+            for transit in [transit for transit in in_transit if transit["arrival"] <= now]:
+                arrivals[transit["to_site"]] += transit["trucks"]
+                in_transit.remove(transit)
+            departures = [0] * len(shards)
+            for from_site, to_site, trucks in pending:
+                departures[from_site] += trucks
+
+            until = min(now + self.window, sim_duration)
+            statuses = self._call(shards, "window", [(arrivals[site_ID], departures[site_ID], until)
+                                                     for site_ID in range(len(shards))])
+
+            # hand the trucks that left to the pending transfers, first come first served
+            departed = [status["departed"] for status in statuses]
+            for transfer in pending:
+                from_site, to_site, trucks = transfer
+                moved = min(trucks, departed[from_site])
+                if moved:
+                    departed[from_site] -= moved
+                    transfer[2] -= moved
+                    transit = {"departure": now, "arrival": now + self.transfer_time,
+                               "from_site": from_site, "to_site": to_site, "trucks": moved}
+                    in_transit.append(transit)
+                    completed.append(transit)
+            pending = [transfer for transfer in pending if transfer[2] > 0]
+
+        if pending or in_transit:
+            logger.warning(f"{sum(t[2] for t in pending)} trucks still waiting to leave and "
+                           f"{sum(t['trucks'] for t in in_transit)} in transit at the end of the run")
+        results = self._call(shards, "finish", [()] * len(shards))
+        return {"total_loads": sum(result["total_loads"] for result in results),
+                "sites": results,
+                "transfers": completed,
+                "windows": num_windows}
+
+    def _start_shards(self) -> list:
+        """
+        Creates a site_shard per site, in its own process or in this one.
+        """
+        if not self.processes:
+            return [site_shard(site_ID, self.site_config(site_ID)) for site_ID in range(len(self.sites))]
+
+        shards = []
+        for site_ID in range(len(self.sites)):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_shard, args=(child, site_ID, self.site_config(site_ID)),
+                                              name=f"site_shard-{site_ID}", daemon=True)
+            process.start()
+            child.close()
+            shards.append((process, parent))
+        return shards
+
+    def _call(self, shards : list, name : str, args : list) -> list:
+        """
+        Calls a site_shard method on every shard, in parallel when they run in
+        processes, and returns the results by site.
+        """
+        if not self.processes:
+            return [getattr(shard, name)(*shard_args) for shard, shard_args in zip(shards, args)]
+
+        for (process, connection), shard_args in zip(shards, args):
+            connection.send((name, shard_args))
+        results = []
+        for process, connection in shards:
+            succeeded, result = connection.recv()
+            if not succeeded:
+                raise result
+            results.append(result)
+        return results
+
+    def _stop_shards(self, shards : list) -> None:
+        """
+        Stops the shard processes.
+        """
+        if not self.processes:
+            return
+        for process, connection in shards:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process, connection in shards:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+def run_sharded(sites : list, sim_duration_hrs : float, **kwargs) -> dict:
+    """
+    Runs a sharded_sim, one process per site, and returns its merged report.
+    See sharded_sim for the other arguments.
+
+    Example:
+        run_sharded([site_a, site_b], sim_duration_hrs=720, transfer_time=90,
+                    transfers=[(24 * 60, 0, 1, 5)], seed=2024)
+
+    Args:
+        sites (list): lunar_Helium_3_sim parameters of each site.
+        sim_duration_hrs (float): Simulation duration of every site in hours.
+        **kwargs: Other sharded_sim arguments.
+    Returns:
+        dict: Result of sharded_sim.run().
+    """
+    return sharded_sim(sites, sim_duration_hrs, **kwargs).run()
@@ -1,11 +1,48 @@
 from lunar_mining_truck import mining_truck as n_truck
 from stations import unload_stations as m_unload_station
-from station_manager import station_manager
+from station_manager import station_manager, expected_wait_policy
+from event_engine import event_engine
+from fleet import truck_fleet, STATE_NAMES, NO_STATION
+from run_statistics import sim_statistics
+from trace_recorder import trace_recorder
+from observers import observer_group
+from instrumentation import sim_instrumentation
+from telemetry import telemetry_publisher
+from gradients import ipa_estimator
 
+from collections import deque
+import hashlib
 import random
 import logging
 
 logger = logging.getLogger(__name__)
+
+# version of the simulation rules. Bump it when a change can give different
+# results for the same parameters and seed, so cached results are not reused.
+ENGINE_VERSION = "2"
+
+# station dispatch policies, see station_manager
+DISPATCH_POLICIES = ("shortest_queue", "expected_wait")
+
+# parameters a fork can change, see lunar_Helium_3_sim.from_snapshot()
+FORK_PARAMETERS = ("num_mining_trucks", "num_unload_stations", "sim_duration_hrs",
+                   "truck_unload_duration", "travel_to_unload", "engine", "instrument")
+
+def substream_seed(seed : int, stream : str, index : int) -> int:
+    """
+    Derives the seed of one random substream from the run seed. The same
+    inputs always give the same seed, and different substreams get unrelated seeds.
+
+    Args:
+        seed (int): Seed of the run.
+        stream (str): Name of the stochastic input, e.g. "mining".
+        index (int): Index of the substream, e.g. the truck ID.
+    Returns:
+        int: 64 bit seed for the substream.
+    """
+    digest = hashlib.sha256(f"{seed}:{stream}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
 class lunar_Helium_3_sim:
     """
     Represents a Lunar Helium-3 Simulator.
@@ -22,10 +59,63 @@ class lunar_Helium_3_sim:
         travel_to_unload (int): Travel to unload duration in minutes.
         mining_duration_min_hrs (int): Mining duration minimum amount of hours.
         mining_duration_max_hrs (int): Mining duration max amount of hours.
+        engine (str): Simulation engine, "tick" (every minute), "event" (next event)
+                      or "fleet" (every minute, trucks stored as arrays).
+        seed (int): Seed for this run's random generator (Optional). Uses the
+                    global random module when not set.
+        collect_statistics (bool): Collect truck state, station and waiting time
+                                   statistics in a sim_statistics while running.
+        trace_path (str): Directory to record a trace_recorder state interval trace to (Optional).
+        common_random_numbers (bool): Draw every stochastic input of every truck from
+                                      its own substream of the seed, so configurations
+                                      run with the same seed see the same randomness.
+        instrument (bool): Count calls, time and wasted calls of the truck state handlers
+                           and station_manager methods in a sim_instrumentation.
+        telemetry (telemetry_server): Server to stream the fleet state to while running (Optional).
+        mining_distribution (tuple): Distribution spec of the mining duration in minutes, drawn
+                                     every cycle instead of once per truck (Optional), see
+                                     distributions.duration_distribution.
+        travel_distribution (tuple): Distribution spec of the travel duration in minutes, drawn
+                                     every cycle instead of travel_to_unload (Optional).
+        unload_distribution (tuple): Distribution spec of the unloading duration in minutes, drawn
+                                     every cycle instead of truck_unload_duration (Optional).
+        dispatch_policy (str): How arriving trucks pick a station, "shortest_queue" (an idle station,
+                               else the shortest queue) or "expected_wait" (the station with the
+                               earliest expected end of its committed work).
+        assign_on_departure (bool): With "expected_wait", commit trucks to a station when they
+                                    finish mining instead of when they arrive.
+        road_network (dict): Keyword arguments of a road_network (Optional). Trucks are then
+                             routed from their dig site to a station when they finish mining,
+                             and travel the cached route time instead of travel_to_unload.
+        network (road_network): Road network of the run, created with the station manager.
+        estimate_gradients (bool): Estimate the derivatives of the total loads and the mean waiting
+                                   time with respect to each duration parameter in an ipa_estimator
+                                   while running.
+        gradients (dict): Derivative estimates of the finished run, see ipa_estimator.summary().
     Methods:
         create_stations(): Generates a list of unloading_stations objects.
         create_trucks(): Generates a list of mining_truck objects.
+        create_fleet(): Generates a truck_fleet.
+        create_station_manager(): Generates the station_manager with its dispatch policy.
+        draw_mining_duration(): Draws the mining duration of one truck.
+        attach_durations(): Attaches the per-cycle duration samplers.
+        stream(): Returns the random substream of one stochastic input.
         run(): Runs simulaiton.
+        setup(): Creates the simulation objects at time 0.
+        snapshot(): Returns the complete state of the simulation at the current time.
+        from_snapshot(): Creates a simulation from a snapshot, with changed parameters.
+        fork(): Creates a copy of the simulation, with changed parameters.
+        advance(): Runs the simulation up to a given time.
+        finish(): Closes the observers and reports the results.
+        run_ticks(): Runs every truck state every minute.
+        run_fleet_ticks(): Runs every truck state of the truck_fleet every minute.
+        attach_observers(): Attaches statistics, trace, telemetry and gradient observers.
+        add_observer(): Attaches another observer to a set up simulation.
+        wire_observer(): Gives the observer to the trucks, station manager and event engine.
+        attach_instrumentation(): Attaches hot path counters.
+        attach_handoff(): Lets the station manager hand released stations to queued trucks.
+        report(): Logs and returns the total loads.
+        restore(): Creates the simulation objects in the state of a snapshot.
     """
 
     def __init__(self,
@@ -35,7 +125,21 @@ class lunar_Helium_3_sim:
                 truck_unload_duration : int,
                 travel_to_unload : int,
                 mining_duration_min_hrs : int,
-                mining_duration_max_hrs : int):
+                mining_duration_max_hrs : int,
+                engine : str = "tick",
+                seed : int = None,
+                collect_statistics : bool = False,
+                trace_path : str = None,
+                common_random_numbers : bool = False,
+                instrument : bool = False,
+                telemetry : object = None,
+                mining_distribution : tuple = None,
+                travel_distribution : tuple = None,
+                unload_distribution : tuple = None,
+                dispatch_policy : str = "shortest_queue",
+                assign_on_departure : bool = False,
+                road_network : dict = None,
+                estimate_gradients : bool = False):
         """
         Initializes the lunar_Helium_3_sim class with all simulator attributes.
 
@@ -47,12 +151,90 @@ class lunar_Helium_3_sim:
             travel_to_unload (int): Travel to unload duration in minutes.
             mining_duration_min_hrs (int): Mining duration minimum amount of hours.
             mining_duration_max_hrs (int): Mining duration max amount of hours.
+            engine (str): Simulation engine, "tick" (every minute), "event" (next event)
+                          or "fleet" (every minute, trucks stored as arrays).
+            seed (int): Seed for this run's random generator (Optional). Uses the
+                        global random module when not set.
+            collect_statistics (bool): Collect truck state, station and waiting time
+                                       statistics in a sim_statistics while running.
+            trace_path (str): Directory to record a trace_recorder state interval trace to (Optional).
+            common_random_numbers (bool): Draw every stochastic input of every truck from
+                                          its own substream of the seed, so configurations
+                                          run with the same seed see the same randomness.
+            instrument (bool): Count calls, time and wasted calls of the truck state handlers
+                               and station_manager methods in a sim_instrumentation.
+            telemetry (telemetry_server): Server to stream the fleet state to while running (Optional).
+            mining_distribution (tuple): Distribution spec of the mining duration in minutes, drawn
+                                         every cycle instead of once per truck (Optional), see
+                                         distributions.duration_distribution.
+            travel_distribution (tuple): Distribution spec of the travel duration in minutes, drawn
+                                         every cycle instead of travel_to_unload (Optional).
+            unload_distribution (tuple): Distribution spec of the unloading duration in minutes, drawn
+                                         every cycle instead of truck_unload_duration (Optional).
+            dispatch_policy (str): How arriving trucks pick a station, "shortest_queue" or "expected_wait".
+            assign_on_departure (bool): With "expected_wait", commit trucks to a station when they
+                                        finish mining instead of when they arrive.
+            road_network (dict): Keyword arguments of a road_network (Optional), with one station
+                                 node per unload station. Needs the "expected_wait" dispatch
+                                 policy, which then always commits trucks on departure.
+            estimate_gradients (bool): Estimate the derivatives of the total loads and the mean waiting
+                                       time with respect to each duration parameter in an ipa_estimator
+                                       while running.
         """
-        
+        if engine not in ("tick", "event", "fleet"):
+            raise ValueError(f"Unknown simulation engine: {engine}")
+        if dispatch_policy not in DISPATCH_POLICIES:
+            raise ValueError(f"Unknown dispatch policy: {dispatch_policy}")
+        if assign_on_departure and dispatch_policy == "shortest_queue":
+            raise ValueError("assign_on_departure needs the expected_wait dispatch policy")
+        if common_random_numbers and seed is None:
+            raise ValueError("common_random_numbers needs a seed")
+        if road_network is not None:
+            if dispatch_policy != "expected_wait":
+                raise ValueError("A road network needs the expected_wait dispatch policy")
+            if travel_distribution is not None:
+                raise ValueError("Travel durations come from the road network, not a travel distribution")
+            # NumPy is only needed for road networks and distributions
+            from road_network import road_network as r_network
+
+            # also computes the travel times once for every run with this network
+            num_network_stations = len(r_network(**road_network).stations)
+            if num_network_stations != num_unload_stations:
+                raise ValueError(f"The road network has {num_network_stations} stations, "
+                                 f"not {num_unload_stations}")
+
         self.num_mining_trucks = num_mining_trucks
         self.num_unload_stations = num_unload_stations
         self.truck_unload_duration = truck_unload_duration
         self.travel_to_unload = travel_to_unload
+        self.engine = engine
+        self.seed = seed
+        self.random = random.Random(seed) if seed is not None else random
+        self.collect_statistics = collect_statistics
+        self.trace_path = trace_path
+        self.common_random_numbers = common_random_numbers
+        self.instrument = instrument
+        self.telemetry = telemetry
+        self.dispatch_policy = dispatch_policy
+        self.assign_on_departure = assign_on_departure
+        self.road_network = road_network
+        self.network = None
+        self.estimate_gradients = estimate_gradients
+        self.streams = {}
+
+        # per-cycle duration distributions, by CYCLE_INPUTS name
+        self.distributions = {name: spec for name, spec in (("mining", mining_distribution),
+                                                            ("travel", travel_distribution),
+                                                            ("unload", unload_distribution))
+                              if spec is not None}
+        if self.distributions:
+            from distributions import duration_distribution
+        if "unload" in self.distributions:
+            distribution = duration_distribution(unload_distribution)
+            if distribution.kind != "lognormal" and distribution.minimum() <= 0:
+                raise ValueError(f"Unloading durations have to be positive: {unload_distribution}")
+        for spec in self.distributions.values():
+            duration_distribution(spec)
 
        # convert time to minutes
         self.mining_duration_min = mining_duration_min_hrs * 60
@@ -64,7 +246,16 @@ class lunar_Helium_3_sim:
         self.mining_trucks = []
         self.unloading_stations = []
         self.station_manager = None
-
+        self.statistics = None
+        self.gradient_estimator = None
+        self.gradients = None
+        self.trace = None
+        self.telemetry_publisher = None
+        self.observer = None
+        self.instrumentation = None
+        self.durations = None
+        self.event_engine = None
+        self.current_time = 0
 
     def create_stations(self) -> None:
         """
@@ -75,6 +266,29 @@ class lunar_Helium_3_sim:
         """
         return [m_unload_station(station_ID=m) for m in range(self.num_unload_stations)]
 
+    def create_station_manager(self) -> station_manager:
+        """
+        Generates the station_manager of the stations, with the expected_wait_policy
+        when dispatch_policy is "expected_wait", and the road network when one is given.
+
+        Returns:
+            station_manager: Station manager.
+        """
+        policy = None
+        if self.dispatch_policy == "expected_wait":
+            unload_duration = self.truck_unload_duration
+            if "unload" in self.distributions:
+                from distributions import duration_distribution
+                unload_duration = duration_distribution(self.distributions["unload"]).mean()
+            # a truck holds its station two minutes longer than it unloads, the
+            # minutes it takes to finish unloading and to release the station
+            policy = expected_wait_policy(unload_duration + 2,
+                                          self.assign_on_departure or self.road_network is not None)
+        if self.road_network is not None:
+            from road_network import road_network as r_network
+            self.network = r_network(**self.road_network)
+        return station_manager(self.unloading_stations, policy, self.network)
+
     def create_trucks(self) -> None:
         """
         Generates a list of mining_truck objects.
@@ -83,35 +297,508 @@ class lunar_Helium_3_sim:
             None
         """
         for n in range(self.num_mining_trucks):
-            truck_mining_duration = random.randint(self.mining_duration_min,
-                                                    self.mining_duration_max)
-
             self.mining_trucks.append(n_truck(truck_ID = n, 
                                         stations = self.unloading_stations,
-                                        mining_duration = truck_mining_duration, 
+                                        mining_duration = self.draw_mining_duration(n), 
                                         travel_to_unload = self.travel_to_unload,
                                         unload_duration = self.truck_unload_duration,
                                         station_manager = self.station_manager))
 
         return self.mining_trucks
 
+    def create_fleet(self) -> truck_fleet:
+        """
+        Generates a truck_fleet with the same mining durations create_trucks() would draw.
+
+        Returns:
+            truck_fleet: Fleet of all mining trucks.
+        """
+        return truck_fleet(mining_durations = [self.draw_mining_duration(n) for n in range(self.num_mining_trucks)],
+                           unload_duration = self.truck_unload_duration,
+                           travel_to_unload = self.travel_to_unload,
+                           station_manager = self.station_manager)
+
+    def draw_mining_duration(self, truck_ID : int) -> float:
+        """
+        Draws the mining duration of one truck in minutes, from the truck's
+        "mining" substream with common_random_numbers, or from the run's
+        random generator otherwise. With a mining_distribution the truck draws
+        a duration every time it starts mining instead, and this returns 0.
+
+        Args:
+            truck_ID (int): Truck ID.
+        Returns:
+            float: Mining duration.
+        """
+        if "mining" in self.distributions:
+            return 0
+        generator = self.stream("mining", truck_ID) if self.common_random_numbers else self.random
+        if float(self.mining_duration_min).is_integer() and float(self.mining_duration_max).is_integer():
+            return generator.randint(int(self.mining_duration_min), int(self.mining_duration_max))
+        return generator.uniform(self.mining_duration_min, self.mining_duration_max)
+
+    def stream(self, name : str, index : int) -> random.Random:
+        """
+        Returns the random substream of one stochastic input, e.g. the mining
+        durations of one truck. The substream only depends on the seed, the
+        name and the index, not on the other inputs or on the configuration.
+
+        Args:
+            name (str): Name of the stochastic input.
+            index (int): Index of the substream, e.g. the truck ID.
+        Returns:
+            random.Random: Random generator of the substream.
+        """
+        key = (name, index)
+        if key not in self.streams:
+            self.streams[key] = random.Random(substream_seed(self.seed, name, index))
+        return self.streams[key]
+
     def run(self):
         """
-        Runs Simulation.
+        Runs Simulation. A simulation restored from a snapshot runs from the
+        snapshot time.
+
+        Returns:
+            None
+        """
+        if self.station_manager is None:
+            self.setup()
+        self.advance(self.sim_duration)
+        return self.finish()
+
+    def setup(self) -> None:
+        """
+        Creates the stations, station manager, trucks and observers at time 0.
 
         Returns:
             None
         """
         # initialize trucks
         self.unloading_stations = self.create_stations()
-        self.station_manager = station_manager(self.unloading_stations)
-        self.mining_trucks = self.create_trucks()
+        self.station_manager = self.create_station_manager()
+        if self.engine == "fleet":
+            self.mining_trucks = self.create_fleet()
+        else:
+            self.mining_trucks = self.create_trucks()
 
-        current_time = 0
+        self.attach_durations()
+        self.attach_observers()
+        self.attach_instrumentation()
+
+        self.current_time = 0
+        if self.engine == "event":
+            self.event_engine = event_engine(self.mining_trucks, self.station_manager, self.sim_duration, self.observer)
+        self.attach_handoff()
+
+    def advance(self, until : float) -> None:
+        """
+        Runs the simulation from the current time up to, not including, the input
+        time or the end of the simulation. Can be called repeatedly.
+
+        Args:
+            until (float): Time to stop at in minutes.
+        Returns:
+            None
+        """
+        until = min(until, self.sim_duration)
+        if self.engine == "fleet":
+            self.run_fleet_ticks(until)
+        elif self.engine == "event":
+            self.event_engine.advance(until)
+        else:
+            self.run_ticks(until)
+        self.current_time = max(self.current_time, until)
+
+    def finish(self) -> int:
+        """
+        Closes the observers and reports the results.
+
+        Returns:
+            int: Total loads completed.
+        """
+        if self.observer is not None:
+            self.observer.update_current_time(self.sim_duration)
+        if self.trace is not None:
+            self.trace.close(self.sim_duration)
+        if self.telemetry_publisher is not None:
+            self.telemetry_publisher.close(self.sim_duration)
+        if self.gradient_estimator is not None:
+            self.gradients = self.gradient_estimator.summary(self.sim_duration)
+
+        return self.report()
+
+    def snapshot(self) -> dict:
+        """
+        Returns the complete state of the simulation at the current time, after
+        every minute before it has run: parameters, random generator and
+        substreams, every truck's state, timers and load count, and every station's
+        occupancy, queue and served count. The snapshot only holds lists,
+        numbers and strings, see snapshot.dumps_snapshot() to serialize it.
+
+        Observers are not part of the snapshot. With per-cycle distributions the
+        durations each truck drew and the state of the duration samplers are,
+        and with the expected_wait dispatch policy its station estimates, and with
+        a road network the trucks on the road.
+
+        Returns:
+            dict: Simulation snapshot.
+        """
+        if self.station_manager is None:
+            raise ValueError("Simulation has to be set up before taking a snapshot")
+
+        time = self.current_time
+        if self.event_engine is not None:
+            # the event engine only updates unloading timers when it runs a truck
+            self.event_engine.sync_trucks(time - 1)
+
+        if self.engine == "fleet":
+            fleet = self.mining_trucks
+            trucks = {"state": [STATE_NAMES[state] for state in fleet.phase],
+                      "operation_start_time": list(fleet.phase_start),
+                      "time_elapsed_unloading": list(fleet.time_elapsed_unloading),
+                      "completed_load_count": list(fleet.completed_loads),
+                      "assigned_station": [None if station_ID == NO_STATION else station_ID
+                                           for station_ID in fleet.assigned_station],
+                      "mining_duration": list(fleet.mining_duration),
+                      "travel_duration": list(fleet.travel_durations),
+                      "unload_duration": list(fleet.unload_durations)}
+        else:
+            trucks = {"state": [truck.state.__name__ for truck in self.mining_trucks],
+                      "operation_start_time": [truck.operation_start_time for truck in self.mining_trucks],
+                      "time_elapsed_unloading": [truck.time_elapsed_unloading for truck in self.mining_trucks],
+                      "completed_load_count": [truck.completed_load_count for truck in self.mining_trucks],
+                      "assigned_station": [truck.assigned_station for truck in self.mining_trucks],
+                      "mining_duration": [truck.mining_duration for truck in self.mining_trucks],
+                      "travel_duration": [truck.travel_to_unload_duration for truck in self.mining_trucks],
+                      "unload_duration": [truck.unload_duration for truck in self.mining_trucks]}
+        if self.durations is None and self.network is None:
+            # fixed durations come from the parameters, which a fork can change
+            del trucks["travel_duration"], trucks["unload_duration"]
+
+        stations = {"is_available": [station.is_available for station in self.unloading_stations],
+                    "truck_ID": [station.truck_ID for station in self.unloading_stations],
+                    "truck_queue": [list(station.truck_queue) for station in self.unloading_stations],
+                    "truck_count": [station.truck_count for station in self.unloading_stations]}
+
+        streams = []
+        for (name, index), generator in self.streams.items():
+            stream_version, stream_state, stream_gauss_next = generator.getstate()
+            streams.append([name, index, stream_version, list(stream_state), stream_gauss_next])
+        version, internal_state, gauss_next = self.random.getstate()
+        return {"config": {"num_mining_trucks": self.num_mining_trucks,
+                           "num_unload_stations": self.num_unload_stations,
+                           "sim_duration_hrs": self.sim_duration / 60,
+                           "truck_unload_duration": self.truck_unload_duration,
+                           "travel_to_unload": self.travel_to_unload,
+                           "mining_duration_min_hrs": self.mining_duration_min / 60,
+                           "mining_duration_max_hrs": self.mining_duration_max / 60,
+                           "engine": self.engine,
+                           "seed": self.seed,
+                           "common_random_numbers": self.common_random_numbers,
+                           "mining_distribution": self._spec("mining"),
+                           "travel_distribution": self._spec("travel"),
+                           "unload_distribution": self._spec("unload"),
+                           "dispatch_policy": self.dispatch_policy,
+                           "assign_on_departure": self.assign_on_departure,
+                           "road_network": self.road_network},
+                "time": time,
+                "random_state": [version, list(internal_state), gauss_next],
+                "streams": streams,
+                "durations": self.durations.getstate() if self.durations is not None else [],
+                "dispatch": self.station_manager.policy.getstate() if self.station_manager.policy is not None else None,
+                "network": self.network.getstate() if self.network is not None else None,
+                "trucks": trucks,
+                "stations": stations}
+
+    def _spec(self, name : str) -> list:
+        """
+        Returns the distribution spec of a per-cycle input as a list, or None.
+        """
+        spec = self.distributions.get(name)
+        return list(spec) if spec is not None else None
+
+    @classmethod
+    def from_snapshot(cls, snapshot : dict, **changes) -> "lunar_Helium_3_sim":
+        """
+        Creates a simulation in the state of the snapshot, ready to continue
+        from the snapshot time with run() or advance().
+
+        Parameters in FORK_PARAMETERS can be changed for the continuation.
+        Stations and trucks can only be added: new stations start available
+        and new trucks start mining at the snapshot time, with mining durations
+        drawn from the restored random generator.
+
+        Continuing a snapshot gives the same counts as a run that never stopped
+        with the tick and fleet engines, and with the event engine when every
+        duration is an integer number of minutes.
+
+        Args:
+            snapshot (dict): Snapshot from snapshot().
+            **changes: Parameters to change, from FORK_PARAMETERS.
+        Returns:
+            lunar_Helium_3_sim: Restored simulation.
+        """
+        for name in changes:
+            if name not in FORK_PARAMETERS:
+                raise ValueError(f"Parameter {name} cannot be changed in a fork")
+        config = {**snapshot["config"], **changes}
+        for name in ("num_mining_trucks", "num_unload_stations"):
+            if config[name] < snapshot["config"][name]:
+                raise ValueError(f"{name} cannot go down in a fork: {config[name]} < {snapshot['config'][name]}")
+
+        sim = cls(**config)
+        sim.restore(snapshot)
+        return sim
+
+    def fork(self, **changes) -> "lunar_Helium_3_sim":
+        """
+        Creates a copy of the simulation at the current time, with changed
+        parameters. The simulation itself is not changed.
+
+        Args:
+            **changes: Parameters to change, from FORK_PARAMETERS.
+        Returns:
+            lunar_Helium_3_sim: Forked simulation.
+        """
+        return lunar_Helium_3_sim.from_snapshot(self.snapshot(), **changes)
+
+    def restore(self, snapshot : dict) -> None:
+        """
+        Creates the stations, station manager and trucks in the state of the
+        snapshot, using the parameters of this simulation.
+
+        Args:
+            snapshot (dict): Snapshot from snapshot().
+        Returns:
+            None
+        """
+        time = snapshot["time"]
+        version, internal_state, gauss_next = snapshot["random_state"]
+        self.random = random.Random()
+        self.random.setstate((version, tuple(internal_state), gauss_next))
+        for name, index, version, internal_state, gauss_next in snapshot.get("streams", []):
+            self.stream(name, index).setstate((version, tuple(internal_state), gauss_next))
+
+        # restore stations before the manager indexes them
+        self.unloading_stations = self.create_stations()
+        saved_stations = snapshot["stations"]
+        for station_ID in range(len(saved_stations["is_available"])):
+            station = self.unloading_stations[station_ID]
+            station.is_available = saved_stations["is_available"][station_ID]
+            station.truck_ID = saved_stations["truck_ID"][station_ID]
+            station.truck_queue = deque(saved_stations["truck_queue"][station_ID])
+            station.truck_count = saved_stations["truck_count"][station_ID]
+        self.station_manager = self.create_station_manager()
+
+        saved_trucks = snapshot["trucks"]
+        num_saved_trucks = len(saved_trucks["state"])
+        mining_durations = saved_trucks["mining_duration"] + \
+            [self.draw_mining_duration(n) for n in range(num_saved_trucks, self.num_mining_trucks)]
+
+        if self.engine == "fleet":
+            self.mining_trucks = truck_fleet(mining_durations = mining_durations,
+                                             unload_duration = self.truck_unload_duration,
+                                             travel_to_unload = self.travel_to_unload,
+                                             station_manager = self.station_manager)
+            fleet = self.mining_trucks
+            for truck_ID in range(num_saved_trucks):
+                fleet.phase[truck_ID] = STATE_NAMES.index(saved_trucks["state"][truck_ID])
+                fleet.phase_start[truck_ID] = saved_trucks["operation_start_time"][truck_ID] or 0
+                fleet.time_elapsed_unloading[truck_ID] = saved_trucks["time_elapsed_unloading"][truck_ID]
+                fleet.completed_loads[truck_ID] = saved_trucks["completed_load_count"][truck_ID]
+                station_ID = saved_trucks["assigned_station"][truck_ID]
+                fleet.assigned_station[truck_ID] = NO_STATION if station_ID is None else station_ID
+                if "travel_duration" in saved_trucks:
+                    fleet.travel_durations[truck_ID] = saved_trucks["travel_duration"][truck_ID]
+                    fleet.unload_durations[truck_ID] = saved_trucks["unload_duration"][truck_ID]
+        else:
+            self.mining_trucks = [n_truck(truck_ID = n,
+                                          stations = self.unloading_stations,
+                                          mining_duration = mining_durations[n],
+                                          travel_to_unload = self.travel_to_unload,
+                                          unload_duration = self.truck_unload_duration,
+                                          station_manager = self.station_manager)
+                                  for n in range(self.num_mining_trucks)]
+            for truck in self.mining_trucks[:num_saved_trucks]:
+                truck.state = getattr(truck, saved_trucks["state"][truck.ID])
+                truck.operation_start_time = saved_trucks["operation_start_time"][truck.ID]
+                truck.time_elapsed_unloading = saved_trucks["time_elapsed_unloading"][truck.ID]
+                truck.completed_load_count = saved_trucks["completed_load_count"][truck.ID]
+                truck.assigned_station = saved_trucks["assigned_station"][truck.ID]
+                if "travel_duration" in saved_trucks:
+                    truck.travel_to_unload_duration = saved_trucks["travel_duration"][truck.ID]
+                    truck.unload_duration = saved_trucks["unload_duration"][truck.ID]
+
+        self.attach_durations()
+        if self.durations is not None:
+            self.durations.setstate(snapshot.get("durations", []))
+        if self.station_manager.policy is not None and snapshot.get("dispatch") is not None:
+            self.station_manager.policy.setstate(snapshot["dispatch"], time)
+        if self.network is not None and snapshot.get("network") is not None:
+            self.network.setstate(snapshot["network"])
+
+        self.attach_instrumentation()
+
+        self.current_time = time
+        if self.engine == "event":
+            self.event_engine = event_engine(self.mining_trucks, self.station_manager, self.sim_duration)
+            self.event_engine.resume(time)
+        self.attach_handoff()
+
+    def attach_observers(self) -> None:
+        """
+        Creates the sim_statistics, trace_recorder, telemetry_publisher and
+        ipa_estimator that were asked for and attaches them to the trucks and
+        the station manager.
+
+        Returns:
+            None
+        """
+        observers = []
+        if self.collect_statistics:
+            self.statistics = sim_statistics(self.num_mining_trucks, self.num_unload_stations)
+            observers.append(self.statistics)
+        if self.trace_path is not None:
+            self.trace = trace_recorder(self.trace_path, self.num_mining_trucks, self.num_unload_stations)
+            observers.append(self.trace)
+        if self.telemetry is not None:
+            self.telemetry_publisher = telemetry_publisher(self.telemetry, self.num_mining_trucks,
+                                                           self.num_unload_stations, self.telemetry.interval)
+            observers.append(self.telemetry_publisher)
+        if self.estimate_gradients:
+            if self.engine == "fleet":
+                mining_durations = [float(duration) for duration in self.mining_trucks.mining_duration]
+            else:
+                mining_durations = [truck.mining_duration for truck in self.mining_trucks]
+            self.gradient_estimator = ipa_estimator(mining_durations, self.num_unload_stations,
+                                                    self.mining_duration_min, self.mining_duration_max,
+                                                    unload_fixed="unload" not in self.distributions,
+                                                    travel_fixed="travel" not in self.distributions
+                                                                 and self.road_network is None,
+                                                    mining_fixed="mining" not in self.distributions)
+            observers.append(self.gradient_estimator)
+        if not observers:
+            return
+
+        self.observer = observers[0] if len(observers) == 1 else observer_group(observers)
+        self.wire_observer()
+
+    def add_observer(self, observer : object) -> None:
+        """
+        Attaches another observer to a simulation that is set up, next to the
+        statistics, trace and telemetry observers, e.g. steady_state.load_series.
+
+        Args:
+            observer (object): Object with update_current_time(), truck_state_changed()
+                               and station_changed().
+        Returns:
+            None
+        """
+        if self.station_manager is None:
+            raise ValueError("Simulation has to be set up before adding an observer")
+
+        if self.observer is None:
+            self.observer = observer
+        elif isinstance(self.observer, observer_group):
+            self.observer.observers.append(observer)
+        else:
+            self.observer = observer_group([self.observer, observer])
+        self.wire_observer()
+
+    def wire_observer(self) -> None:
+        """
+        Gives the observer to the trucks, the station manager and the event engine.
+
+        Returns:
+            None
+        """
+        self.station_manager.observer = self.observer
+        if self.engine == "fleet":
+            self.mining_trucks.observer = self.observer
+        else:
+            for truck in self.mining_trucks:
+                truck.observer = self.observer
+        if self.event_engine is not None:
+            self.event_engine.observer = self.observer
+
+    def attach_durations(self) -> None:
+        """
+        Creates the cycle_durations of the distributions that were given and
+        attaches it to the trucks, which then draw a duration every time they
+        start mining, traveling or unloading. Durations are drawn from blocks
+        seeded by the run seed, one shared block per input, or one per truck
+        with common_random_numbers.
+
+        Returns:
+            None
+        """
+        if not self.distributions:
+            return
+        from distributions import cycle_durations
+
+        def seed_for(name : str, truck_ID : int) -> int:
+            if self.seed is None:
+                return None
+            return substream_seed(self.seed, f"{name}_duration", "all" if truck_ID is None else truck_ID)
+
+        self.durations = cycle_durations(self.distributions, seed_for, per_truck=self.common_random_numbers)
+        if self.engine == "fleet":
+            self.mining_trucks.durations = self.durations
+        else:
+            for truck in self.mining_trucks:
+                truck.durations = self.durations
+
+    def attach_instrumentation(self) -> None:
+        """
+        Creates a sim_instrumentation when instrument is set, and wraps the
+        methods of the trucks and the station manager with its counters.
+
+        Returns:
+            None
+        """
+        if not self.instrument:
+            return
+        self.instrumentation = sim_instrumentation()
+        self.instrumentation.instrument_station_manager(self.station_manager)
+        if self.engine == "fleet":
+            self.instrumentation.instrument_fleet(self.mining_trucks)
+        else:
+            self.instrumentation.instrument_trucks(self.mining_trucks)
+
+    def attach_handoff(self) -> None:
+        """
+        Sets the station manager to hand every released station straight to the
+        next queued truck, which starts unloading through the engine.
+
+        Returns:
+            None
+        """
+        if self.engine == "event":
+            self.station_manager.on_handoff = self.event_engine.start_unloading
+        elif self.engine == "fleet":
+            self.station_manager.on_handoff = self.mining_trucks.start_unloading
+        else:
+            trucks = self.mining_trucks
+            self.station_manager.on_handoff = lambda truck_ID, station_ID, time: \
+                trucks[truck_ID].start_unloading(station_ID, time)
+
+    def run_ticks(self, until : float) -> None:
+        """
+        Runs the state machine of every truck every minute.
+
+        Args:
+            until (float): Time to stop at in minutes.
+        Returns:
+            None
+        """
+        current_time = self.current_time
         # Start state machine
-        while current_time < self.sim_duration:
+        while current_time < until:
 
-            logger.info(f"current time is: {current_time}")
+            logger.info("current time is: %s", current_time)
+            if self.observer is not None:
+                self.observer.update_current_time(current_time)
             if current_time == 0:
                 # set all initial states to start_mining
                 for truck in self.mining_trucks:
@@ -122,21 +809,70 @@ class lunar_Helium_3_sim:
                 for truck in self.mining_trucks:
                     truck.update_current_time(current_time)
                     truck.state()
-                # if there is a truck in a queue, serve it next
-                truck_in_queue, station = self.station_manager.manage_queue()
-                if truck_in_queue is not None:
-                    self.mining_trucks[truck_in_queue].unloading()
 
             # update time (every minute)
             current_time += 1
+        self.current_time = current_time
+
+    def run_fleet_ticks(self, until : float) -> None:
+        """
+        Runs the state of every truck in the truck_fleet every minute.
+
+        Args:
+            until (float): Time to stop at in minutes.
+        Returns:
+            None
+        """
+        fleet = self.mining_trucks
+        current_time = self.current_time
+        while current_time < until:
+
+            logger.info("current time is: %s", current_time)
+            if self.observer is not None:
+                self.observer.update_current_time(current_time)
+            fleet.update_current_time(current_time)
+            if current_time == 0:
+                # set all initial states to start_mining
+                fleet.start_mining()
+            else:
+                fleet.step()
+
+            # update time (every minute)
+            current_time += 1
+        self.current_time = current_time
+
+    def report(self) -> int:
+        """
+        Logs completed loads per truck and trucks served per station, plus the
+        collected statistics when collect_statistics is set.
+
+        Returns:
+            int: Total loads completed.
+        """
+        summary = self.statistics.summary() if self.statistics is not None else None
 
         # Print out total loads
         for truck in self.mining_trucks:
             logger.info(f"Truck ({truck.ID}) unloaded: {truck.get_completed_load_count()} loads")
+            if summary is not None:
+                logger.info(f"Truck ({truck.ID}) time in each state: {summary['trucks'][truck.ID]}")
             self.total_loads += truck.get_completed_load_count()
 
         for station in self.unloading_stations:
             logger.info(f"Station ({station.ID}) served: {station.get_total_trucks_served()} trucks")
+            if summary is not None:
+                station_summary = summary["stations"][station.ID]
+                logger.info(f"Station ({station.ID}) utilization: {station_summary['busy_fraction']:.1%}, "
+                            f"mean queue length: {station_summary['mean_queue_length']:.2f}, "
+                            f"max queue length: {station_summary['max_queue_length']}")
+
+        if summary is not None:
+            logger.info(f"Waiting time to unload: {summary['waiting_time']}")
+        if self.instrumentation is not None:
+            logger.info(f"Instrumentation: {self.instrumentation.summary()}")
+        if self.gradients is not None:
+            logger.info(f"Derivative of total loads: {self.gradients['total_loads']}")
+            logger.info(f"Derivative of mean waiting time: {self.gradients['mean_wait']}")
 
         logger.info(f"Total loads completed with {self.num_mining_trucks} trucks and {self.num_unload_stations} unload stations: {self.total_loads}")
         
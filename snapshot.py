@@ -0,0 +1,80 @@
+from simulator import lunar_Helium_3_sim
+
+import json
+import time
+import zlib
+import multiprocessing
+import logging
+logger = logging.getLogger(__name__)
+
+def dumps_snapshot(snapshot : dict) -> bytes:
+    """
+    Serializes a lunar_Helium_3_sim snapshot to compressed JSON.
+
+    Args:
+        snapshot (dict): Snapshot from lunar_Helium_3_sim.snapshot().
+    Returns:
+        bytes: Compressed snapshot.
+    """
+    return zlib.compress(json.dumps(snapshot, separators=(",", ":")).encode())
+
+def loads_snapshot(data : bytes) -> dict:
+    """
+    Reads a snapshot serialized with dumps_snapshot().
+
+    Args:
+        data (bytes): Compressed snapshot.
+    Returns:
+        dict: Simulation snapshot.
+    """
+    return json.loads(zlib.decompress(data))
+
+def run_fork(task : tuple) -> dict:
+    """
+    Restores a simulation from a serialized snapshot with changed parameters
+    and runs it to the end. Runs in a worker process.
+
+    Args:
+        task (tuple): Tuple containing
+            - int: variant_index
+            - bytes: snapshot from dumps_snapshot()
+            - dict: parameters to change
+    Returns:
+        dict: Result row with the changes and the run metrics.
+    """
+    variant_index, data, changes = task
+    start = time.perf_counter()
+    sim = lunar_Helium_3_sim.from_snapshot(loads_snapshot(data), **changes)
+    sim.run()
+
+    return {**changes,
+            "variant_index": variant_index,
+            "total_loads": sim.total_loads,
+            "truck_loads": [truck.get_completed_load_count() for truck in sim.mining_trucks],
+            "station_served": [station.get_total_trucks_served() for station in sim.unloading_stations],
+            "wall_time_s": time.perf_counter() - start}
+
+def run_forks(snapshot : dict, variants : list, processes : int = None):
+    """
+    Runs one continuation of the snapshot per variant on a process pool and
+    yields a result row as soon as each one completes. The snapshot is
+    serialized once and shared by every task.
+
+    Example:
+        sim.setup()
+        sim.advance(48 * 60)
+        rows = run_forks(sim.snapshot(), [{}, {"num_unload_stations": 3}])
+
+    Args:
+        snapshot (dict): Snapshot from lunar_Helium_3_sim.snapshot().
+        variants (list): List of parameter changes, one dict per continuation.
+        processes (int): Number of worker processes, defaults to every core (Optional).
+    Yields:
+        dict: Result row of a completed continuation.
+    """
+    data = dumps_snapshot(snapshot)
+    tasks = ((variant_index, data, changes) for variant_index, changes in enumerate(variants))
+
+    logger.info(f"Running {len(variants)} forks from time {snapshot['time']} with a {len(data)} byte snapshot")
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(run_fork, tasks)
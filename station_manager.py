@@ -1,6 +1,286 @@
+import heapq
 import logging
 logger = logging.getLogger(__name__)
 
+class station_index:
+    """
+    Represents a set of station IDs that can return its lowest ID.
+
+    Removed IDs are left in the heap and skipped when they reach the top. The
+    heap is rebuilt when it holds too many removed IDs.
+
+    Attributes:
+        skipped (int): Number of removed IDs skipped by min() so far.
+
+    Methods:
+        add(): Adds a station ID.
+        discard(): Removes a station ID if present.
+        min(): Returns the lowest station ID, or None if empty.
+    """
+    def __init__(self):
+        """
+        Initializes an empty station_index.
+        """
+        self.members = set()
+        self.heap = []
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, station_id : int) -> bool:
+        return station_id in self.members
+
+    def add(self, station_id : int) -> None:
+        """
+        Adds a station ID.
+
+        Args:
+            station_id (int): Station ID to add.
+        """
+        if station_id not in self.members:
+            self.members.add(station_id)
+            heapq.heappush(self.heap, station_id)
+
+    def discard(self, station_id : int) -> None:
+        """
+        Removes a station ID if present.
+
+        Args:
+            station_id (int): Station ID to remove.
+        """
+        self.members.discard(station_id)
+        if len(self.heap) > 2 * len(self.members) + 16:
+            # a sorted list is a valid heap
+            self.heap = sorted(self.members)
+
+    def min(self) -> int:
+        """
+        Returns the lowest station ID.
+
+        Returns:
+            int: Lowest station ID, or None if empty.
+        """
+        heap = self.heap
+        while heap and heap[0] not in self.members:
+            heapq.heappop(heap)
+            self.skipped += 1
+        return heap[0] if heap else None
+
+class expected_wait_policy:
+    """
+    Represents a dispatch policy that sends every truck to the station where
+    it is expected to wait the least.
+
+    For each station the policy keeps a running estimate of when it has served
+    every truck committed to it, unloading, queued or on the way. A truck
+    arriving at time a waits max(free_at - a, 0) there, so the best station is
+    the one with the earliest free_at, the top of a heap. Committing a truck
+    moves free_at to max(free_at, a) + service, and the estimate is corrected
+    when a truck actually starts unloading and when a station is released, so
+    no call scans the stations or the queues: each decision costs O(log S).
+
+    Removed or changed free_at values are left in the heap and skipped when
+    they reach the top, like station_index.
+
+    With a road network the travel time differs per station, so reserve_route()
+    compares the expected start max(free_at, time + travel) of every station.
+
+    Attributes:
+        service (float): Expected time a truck holds a station, in minutes.
+        assign_on_departure (bool): Commit trucks to a station when they finish
+                                    mining instead of when they arrive.
+        free_at (list): Estimated time each station has served its committed trucks.
+        reservations (dict): Committed truck ID mapped to (station ID, expected start time).
+
+    Methods:
+        attach(): Sets up the estimates for the stations of a station_manager.
+        reserve(): Commits a truck to the best station for its arrival time.
+        reserve_route(): Commits a departing truck to the best station for its travel times.
+        station_for(): Returns the station of a truck, committing it if needed.
+        truck_started(): Corrects the estimate when a truck starts unloading.
+        station_released(): Corrects the estimate when a station is released.
+        getstate(): Returns the estimates.
+        setstate(): Restores the estimates.
+    """
+    def __init__(self, service : float, assign_on_departure : bool = False):
+        """
+        Initializes the expected_wait_policy class.
+
+        Args:
+            service (float): Expected time a truck holds a station, in minutes.
+            assign_on_departure (bool): Commit trucks to a station when they finish mining.
+        """
+        if service <= 0:
+            raise ValueError(f"Service time has to be positive: {service}")
+        self.service = service
+        self.assign_on_departure = assign_on_departure
+        self.free_at = []
+        self.reservations = {}
+        self._committed = []
+        self._heap = []
+
+    def attach(self, manager : object) -> None:
+        """
+        Sets up the estimates for the stations of a station_manager: idle
+        stations are free now, busy ones after one more service.
+
+        Args:
+            manager (station_manager): Manager the policy dispatches for.
+        Returns:
+            None
+        """
+        num_stations = len(manager.stations)
+        self.free_at = [0.0 if station.is_available else self.service for station in manager.stations]
+        self._committed = [0] * num_stations
+        self._rebuild()
+
+    def reserve(self, truck_id : int, arrival_time : float) -> int:
+        """
+        Commits a truck to the station it is expected to wait the least at.
+
+        Args:
+            truck_id (int): Truck ID.
+            arrival_time (float): Time the truck is expected at the stations.
+        Returns:
+            int: Station ID.
+        """
+        heap = self._heap
+        free_at = self.free_at
+        while heap[0][0] != free_at[heap[0][1]]:
+            heapq.heappop(heap)
+        station_id = heap[0][1]
+
+        self._book(truck_id, station_id, arrival_time)
+        return station_id
+
+    def reserve_route(self, truck_id : int, time : float, travel_times : list) -> int:
+        """
+        Commits a departing truck to the station it is expected to start
+        unloading at first, lowest station ID first.
+
+        Args:
+            truck_id (int): Truck ID.
+            time (float): Current time.
+            travel_times (list): Travel time to each station, by station ID.
+        Returns:
+            int: Station ID.
+        """
+        starts = [max(free_at, time + travel_time) for free_at, travel_time in zip(self.free_at, travel_times)]
+        station_id = starts.index(min(starts))
+        self._book(truck_id, station_id, time + travel_times[station_id])
+        return station_id
+
+    def station_for(self, truck_id : int, time : float) -> int:
+        """
+        Returns the station a truck is committed to, committing a truck that
+        arrives without one.
+
+        Args:
+            truck_id (int): Truck ID.
+            time (float): Current time.
+        Returns:
+            int: Station ID.
+        """
+        reservation = self.reservations.get(truck_id)
+        if reservation is not None:
+            return reservation[0]
+        return self.reserve(truck_id, time)
+
+    def truck_started(self, station_id : int, truck_id : int, time : float) -> None:
+        """
+        Moves the estimate of the station by how much later, or earlier, the
+        truck started unloading than expected.
+
+        Args:
+            station_id (int): Station the truck unloads at.
+            truck_id (int): Truck ID.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        reservation = self.reservations.pop(truck_id, None)
+        if reservation is not None:
+            self._committed[reservation[0]] -= 1
+        if reservation is None or reservation[0] != station_id:
+            if reservation is not None:
+                # handed another station, its own no longer has to serve it
+                self._set(reservation[0], max(self.free_at[reservation[0]] - self.service, time))
+            self._set(station_id, max(self.free_at[station_id], time) + self.service)
+            return
+        shift = time - reservation[1]
+        self._set(station_id, max(self.free_at[station_id] + shift, time + self.service))
+
+    def station_released(self, station_id : int, time : float) -> None:
+        """
+        Sets a station with no truck committed to it free from now.
+
+        Args:
+            station_id (int): Station ID.
+            time (float): Current time.
+        Returns:
+            None
+        """
+        if not self._committed[station_id]:
+            self._set(station_id, time)
+
+    def getstate(self) -> dict:
+        """
+        Returns the estimates, as JSON serializable lists and numbers.
+
+        Returns:
+            dict: free_at per station and [truck ID, station ID, start] per reservation.
+        """
+        return {"free_at": list(self.free_at),
+                "reservations": [[truck_id, station_id, start]
+                                 for truck_id, (station_id, start) in self.reservations.items()]}
+
+    def setstate(self, state : dict, time : float = 0) -> None:
+        """
+        Restores the estimates from getstate(). Stations added since start free at the input time.
+
+        Args:
+            state (dict): State from getstate().
+            time (float): Current time.
+        Returns:
+            None
+        """
+        saved = state["free_at"]
+        self.free_at[:len(saved)] = saved
+        for station_id in range(len(saved), len(self.free_at)):
+            self.free_at[station_id] = max(self.free_at[station_id], time)
+        self.reservations = {}
+        self._committed = [0] * len(self.free_at)
+        for truck_id, station_id, start in state["reservations"]:
+            self.reservations[truck_id] = (station_id, start)
+            self._committed[station_id] += 1
+        self._rebuild()
+
+    def _book(self, truck_id : int, station_id : int, arrival_time : float) -> None:
+        """
+        Commits a truck to a station and moves the station estimate.
+        """
+        start = max(self.free_at[station_id], arrival_time)
+        self.reservations[truck_id] = (station_id, start)
+        self._committed[station_id] += 1
+        self._set(station_id, start + self.service)
+
+    def _set(self, station_id : int, free_at : float) -> None:
+        """
+        Sets the estimate of a station and pushes it on the heap.
+        """
+        self.free_at[station_id] = free_at
+        heapq.heappush(self._heap, (free_at, station_id))
+        if len(self._heap) > 4 * len(self.free_at) + 16:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """
+        Rebuilds the heap from the current estimates only.
+        """
+        self._heap = [(free_at, station_id) for station_id, free_at in enumerate(self.free_at)]
+        heapq.heapify(self._heap)
+
 class station_manager:
     """
     Represents a station manager.
@@ -9,69 +289,222 @@ class station_manager:
     This class manages availability of each station and queues statios
     when not available.
 
+    Every station tells the manager when its availability or queue changes, and
+    the manager keeps these indexes up to date so no call has to scan every station:
+        - free_stations: IDs of available stations.
+        - idle stations: available stations with no queue, for get_available_station().
+        - ready stations: available stations with a queue, for manage_queue().
+          hand_off() leaves none when on_handoff is set.
+        - queue length buckets: station IDs per queue length, for queue_truck()
+          and, with the longest queue, for hand_off().
+        - truck_station: queued truck ID mapped to the station it is queued at.
+
+    Queued trucks do not poll for a station. When on_handoff is set, a released
+    station is handed at once to the next truck in its queue, or when its queue
+    is empty to the first truck of the longest queue, and on_handoff tells the
+    engine so the truck starts unloading. Every station that frees up is handed
+    over in the same minute, and no station stays idle while a truck is queued.
+
+    With a road network, stations are apart: departing trucks are routed to a
+    station by the network and the dispatch policy, and a released station is
+    only handed to the trucks queued at it.
+
+    Without a dispatch policy, an arriving truck takes the idle station with
+    the lowest ID, or queues at the station with the shortest queue. A policy,
+    e.g. expected_wait_policy, picks the station instead: the trucks and the
+    engines give their ID and the current time, and the manager tells the
+    policy about departures, unloading starts and releases:
+        - reserve(truck_id, arrival_time): a truck finished mining, only
+          called when the policy has assign_on_departure set.
+        - station_for(truck_id, time): station an arriving truck goes to.
+        - truck_started(station_id, truck_id, time): a truck starts unloading.
+        - station_released(station_id, time): a truck released its station.
+
     Attributes:
         stations (list): A list of station objects.
+        observer (object): Object told about every station change, e.g. sim_statistics (Optional).
+        policy (object): Dispatch policy (Optional), the shortest queue when not set.
+        network (road_network): Roads between the dig sites and the stations (Optional).
+        on_handoff (function): Called with (truck_id, station_id, time) when hand_off()
+                               gives a released station to a queued truck, which starts
+                               unloading in the same minute (Optional). The simulator
+                               always sets it. Without it, a released station keeps its
+                               queue until manage_queue() is called.
 
     Methods:
         get_available_station(): returns first available station.
+        assign_station(): assigns a station to a truck that starts unloading.
         queue_truck(): queues truck inot station's queue list parameter.
         release_station(): releases station by setting available flag to True.
         block_station(): blocks station from being used.
-        manage_queue(): checks if any station has a queue and is available to
-                        serve the next truck in queue.
+        manage_queue(): serves the next queued truck of an available station,
+                        for a manager without on_handoff.
+        hand_off(): hands a released station to the next queued truck through on_handoff.
+        truck_departing(): routes a truck that finished mining and returns its travel time.
+        station_updated(): updates the indexes after a station changed.
     """
-    def __init__(self, stations):
+    def __init__(self, stations, policy : object = None, network : object = None):
         """
         Initializes the station_manager class with a list of station objects.
 
         Args:
             stations (list): A list of station objects.
+            policy (object): Dispatch policy (Optional), e.g. expected_wait_policy.
+            network (road_network): Roads between the dig sites and the stations (Optional),
+                                    needs a policy to route trucks with.
         """
+        if network is not None and policy is None:
+            raise ValueError("A road network needs a dispatch policy to route trucks")
         self.stations = stations
+        self.observer = None
+        self.policy = policy
+        self.network = network
+        self.on_handoff = None
+
+        self.free_stations = set()
+        self.truck_station = {}
+        self._idle = station_index()
+        self._ready = station_index()
+        self._queue_length = {}
+        self._by_queue_length = {}
+        self._min_queue_length = 0
+        self._max_queue_length = 0
+
+        for station in stations:
+            station.station_manager = self
+            for truck_id in station.truck_queue:
+                self.truck_station[truck_id] = station.ID
+            self.station_updated(station)
+        if policy is not None:
+            policy.attach(self)
 
-    def get_available_station(self) -> object:
+    def get_available_station(self, truck_id : int = None, time : float = None) -> object:
         """
-        Find and return an available station with no queue
-        
+        Find and return an available station with no queue. With a dispatch
+        policy, only the station the policy picks for the truck is returned.
+        The lookup changes nothing, see assign_station() to take the station.
+
+        Args:
+            truck_id (int): ID of the truck asking (Optional), used by the dispatch policy.
+            time (float): Current time (Optional), used by the dispatch policy.
         Returns:
             unload_stations: Returns an unload_stations object.
         """
-        for station in self.stations:
-            if station.is_available and not station.truck_queue:
-                # station.is_available = False
-                return station
-        return None
+        if self.policy is not None and truck_id is not None:
+            station = self.stations[self.policy.station_for(truck_id, time)]
+            if not station.is_available or station.truck_queue:
+                return None
+            return station
+
+        station_id = self._idle.min()
+        if station_id is None:
+            return None
+        return self.stations[station_id]
+
+    def assign_station(self, station_id : int, truck_id : int, time : float = None) -> None:
+        """
+        Assigns a station to a truck that starts unloading there, and tells the
+        dispatch policy.
+
+        Args:
+            station_id (int): Station ID.
+            truck_id (int): Truck ID.
+            time (float): Current time (Optional), used by the dispatch policy.
+        Returns:
+            None
+        """
+        self.stations[station_id].assign_truck(truck_id)
+        if self.policy is not None:
+            self.policy.truck_started(station_id, truck_id, time)
 
-    def queue_truck(self, truck_id : int) -> object:
+    def queue_truck(self, truck_id : int, time : float = None) -> object:
         """
-        Queue truck at the station with the smallest queue
+        Queue truck at the station with the smallest queue, or at the station
+        the dispatch policy picks for it.
 
         Args:
             truck_id (int): Truck ID to queue.
+            time (float): Current time (Optional), used by the dispatch policy.
         Returns:
             unload_stations: Returns an unload_stations object with the smallest queue.
         """
         # check if truck_id is already in any of the station queues. Avoids duplicates.
-        id_already_in_queue = any(truck_id in station.truck_queue for station in self.stations)
-        if truck_id and not id_already_in_queue:
-            station_with_least_queue = min(self.stations, key=lambda station: len(station.truck_queue))
+        id_already_in_queue = truck_id in self.truck_station
+        if self.policy is not None and not id_already_in_queue:
+            station = self.stations[self.policy.station_for(truck_id, time)]
+            station.queue_truck(truck_id)
+            return station
+        if not id_already_in_queue:
+            station_id = self._by_queue_length[self._min_queue_length].min()
+            station_with_least_queue = self.stations[station_id]
             station_with_least_queue.queue_truck(truck_id)
         else:
-            logger.info(f"Truck ({truck_id}) is already in the queue.")
+            logger.info("Truck (%s) is already in the queue.", truck_id)
             return None
         return station_with_least_queue
 
-    def release_station(self, station_id : int) -> None:
+    def release_station(self, station_id : int, time : float = None) -> None:
         """
         Makes the input station available to use.
 
         Args:
             station_id (int): Station ID to queue.
+            time (float): Current time (Optional), used by the dispatch policy.
         Returns:
             None
         """
         self.stations[station_id].add_to_served_counter()
         self.stations[station_id].is_available = True
+        if self.policy is not None:
+            self.policy.station_released(station_id, time)
+        if self.on_handoff is not None:
+            self.hand_off(station_id, time)
+
+    def hand_off(self, station_id : int, time : float = None) -> int:
+        """
+        Hands an available station to the first truck in its queue, or when its
+        queue is empty to the first truck of the longest queue, lowest station
+        ID first, and tells on_handoff.
+
+        Args:
+            station_id (int): Station ID.
+            time (float): Current time (Optional).
+        Returns:
+            int: ID of the truck the station was handed to, None if no truck is queued.
+        """
+        station = self.stations[station_id]
+        if not station.is_available:
+            return None
+        queued_at = station
+        if not station.truck_queue:
+            if not self._max_queue_length or self.network is not None:
+                return None
+            queued_at = self.stations[self._by_queue_length[self._max_queue_length].min()]
+
+        truck_id = queued_at.dequeue_truck()
+        self.assign_station(station_id, truck_id, time)
+        self.on_handoff(truck_id, station_id, time)
+        return truck_id
+
+    def truck_departing(self, truck_id : int, time : float, travel_duration : float) -> float:
+        """
+        Commits a truck that finished mining to a station, when the dispatch
+        policy assigns trucks on departure, and returns its travel duration.
+        With a road network, the truck is routed to the station and the travel
+        duration is looked up from the network.
+
+        Args:
+            truck_id (int): Truck ID.
+            time (float): Current time.
+            travel_duration (float): Travel duration without a road network.
+        Returns:
+            float: Travel duration to the station.
+        """
+        if self.network is not None:
+            return self.network.dispatch(truck_id, time, self.policy)
+        if self.policy is not None and self.policy.assign_on_departure:
+            self.policy.reserve(truck_id, time + travel_duration)
+        return travel_duration
 
     def block_station(self, station_id : int) -> None:
         """
@@ -81,25 +514,87 @@ class station_manager:
             station_id (int): Station ID to queue.
         Returns:
             None
-        """ 
+        """
         self.stations[station_id].is_available = False
 
-    def manage_queue(self) -> tuple:
+    def manage_queue(self, time : float = None) -> tuple:
         """
-        Blocks the input station from being available to use.
+        Assigns the available station with a queue and the lowest ID to the next
+        truck in its queue. Only needed when on_handoff is not set, since
+        hand_off() serves a queue as soon as its station is released.
 
+        Args:
+            time (float): Current time (Optional), used by the dispatch policy.
         Returns:
             tuple: Tuple containing
                 - object: truck_in_queue
                 - object: unload_stations instance
-        """ 
-        for station in self.stations:
-            if station.truck_queue:
-                logger.debug(f"Truck queue at station ({station.ID} is: {station.truck_queue})")
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            for station in self.stations:
+                if station.truck_queue:
+                    logger.debug("Truck queue at station (%s is: %s)", station.ID, station.truck_queue)
+
+        station_id = self._ready.min()
+        if station_id is None:
+            return None, None
+
+        station = self.stations[station_id]
+        truck_in_queue = station.dequeue_truck()
+        station.is_available = False
+        if self.policy is not None:
+            self.policy.truck_started(station_id, truck_in_queue, time)
+        return truck_in_queue, station
+
+    def station_updated(self, station : object, queued : int = None, dequeued : int = None) -> None:
+        """
+        Updates the indexes after a station changed its availability or queue.
+        Called by the station itself.
+
+        Args:
+            station (unload_stations): Station that changed.
+            queued (int): Truck ID added to the station queue (Optional).
+            dequeued (int): Truck ID removed from the station queue (Optional).
+        Returns:
+            None
+        """
+        station_id = station.ID
+        if queued is not None:
+            self.truck_station[queued] = station_id
+        if dequeued is not None:
+            self.truck_station.pop(dequeued, None)
+
+        if self.observer is not None:
+            self.observer.station_changed(station)
+
+        queue_length = len(station.truck_queue)
+        if station.is_available:
+            self.free_stations.add(station_id)
+            if queue_length:
+                self._idle.discard(station_id)
+                self._ready.add(station_id)
+            else:
+                self._ready.discard(station_id)
+                self._idle.add(station_id)
+        else:
+            self.free_stations.discard(station_id)
+            self._idle.discard(station_id)
+            self._ready.discard(station_id)
 
-            if station.truck_queue and station.is_available:
-                truck_in_queue = station.dequeue_truck()
-                station.is_available = False
-                return truck_in_queue, station
+        # move the station to the bucket of its new queue length
+        old_length = self._queue_length.get(station_id)
+        if old_length == queue_length:
+            return
+        if old_length is not None:
+            self._by_queue_length[old_length].discard(station_id)
+        self._queue_length[station_id] = queue_length
+        self._by_queue_length.setdefault(queue_length, station_index()).add(station_id)
 
-        return None, None
+        if queue_length < self._min_queue_length:
+            self._min_queue_length = queue_length
+        while not self._by_queue_length.get(self._min_queue_length):
+            self._min_queue_length += 1
+        if queue_length > self._max_queue_length:
+            self._max_queue_length = queue_length
+        while self._max_queue_length and not self._by_queue_length.get(self._max_queue_length):
+            self._max_queue_length -= 1
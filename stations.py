@@ -1,3 +1,5 @@
+from collections import deque
+
 class unload_stations:
     """
     Represents an unloading station.
@@ -7,6 +9,9 @@ class unload_stations:
     Attributes:
         station_ID (int): Station ID.
         truck_ID (int): Truck ID for truck assignment to station (Optional).
+        station_manager (object): station_manager that indexes this station, set by
+                                  the station_manager. It is told about every change
+                                  to availability and to the queue.
 
     Methods:
         assign_truck(): Assignes input truck ID to station.
@@ -27,11 +32,28 @@ class unload_stations:
         """
         self.ID = station_ID
         self.truck_ID = truck_ID
+        self.station_manager = None
 
+        self.truck_queue = deque()
         self.is_available = True
-        self.truck_queue = []
         self.truck_count = 0
 
+    @property
+    def is_available(self) -> bool:
+        """
+        True if no truck is unloading at the station.
+
+        Return:
+            bool: station availability.
+        """
+        return self._is_available
+
+    @is_available.setter
+    def is_available(self, is_available : bool) -> None:
+        self._is_available = is_available
+        if self.station_manager is not None:
+            self.station_manager.station_updated(self)
+
     def assign_truck(self, truck_ID : int) -> None:
         """
         Assignes input truck ID to station.
@@ -62,6 +84,8 @@ class unload_stations:
             truck_ID (int): Current truck ID.
         """
         self.truck_queue.append(truck_ID)
+        if self.station_manager is not None:
+            self.station_manager.station_updated(self, queued=truck_ID)
 
     def dequeue_truck(self) -> object:
         """
@@ -71,7 +95,10 @@ class unload_stations:
             mining_truck: mining truck that was first in queue.
         """
         if self.truck_queue:
-            return self.truck_queue.pop(0)
+            truck_ID = self.truck_queue.popleft()
+            if self.station_manager is not None:
+                self.station_manager.station_updated(self, dequeued=truck_ID)
+            return truck_ID
         return None  # Return None if no trucks are in queue
 
     def add_to_served_counter(self) -> None:
@@ -0,0 +1,230 @@
+from simulator import lunar_Helium_3_sim
+from run_statistics import running_stats
+from replication import confidence_interval
+
+import math
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+
+class load_series:
+    """
+    Represents the loads completed in every interval of a run, as an observer
+    attached with lunar_Helium_3_sim.add_observer().
+
+    Attributes:
+        interval (float): Length of an interval in minutes.
+        loads (list): Loads completed in each interval so far.
+
+    Methods:
+        update_current_time(): Ignored, intervals follow the load times.
+        truck_state_changed(): Counts a completed load in its interval.
+        station_changed(): Ignored.
+        complete(): Returns the loads of the intervals that are over at a time.
+    """
+
+    def __init__(self, interval : float = 60):
+        """
+        Initializes the load_series class.
+
+        Args:
+            interval (float): Length of an interval in minutes.
+        """
+        if interval <= 0:
+            raise ValueError(f"Interval has to be positive: {interval}")
+        self.interval = interval
+        self.loads = []
+
+    def update_current_time(self, current_time : float) -> None:
+        pass
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        """
+        Counts a load in the interval of its time when a truck completes it.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (str): Name of the new state.
+            time (float): Time of the change.
+        Returns:
+            None
+        """
+        if state != "load_complete":
+            return
+        index = int(time // self.interval)
+        if index >= len(self.loads):
+            self.loads.extend([0] * (index + 1 - len(self.loads)))
+        self.loads[index] += 1
+
+    def station_changed(self, station : object) -> None:
+        pass
+
+    def complete(self, time : float) -> list:
+        """
+        Returns the loads of the intervals that are over at the input time.
+
+        Args:
+            time (float): Current time, loads before it are counted.
+        Returns:
+            list: Loads per interval.
+        """
+        count = int(time // self.interval)
+        loads = self.loads[:count]
+        return loads + [0] * (count - len(loads))
+
+def mser(series : list, batch_size : int = 5) -> int:
+    """
+    Returns the length of the warm-up period of a series with the MSER rule
+    (Marginal Standard Error Rule, MSER-5 with the default batch size).
+
+    The series is averaged over batches of batch_size values and the warm-up
+    is the number of leading batches whose removal minimizes the squared
+    standard error of the remaining batch means,
+        sum((mean_i - mean)^2) / (k - d)^2
+    for d removed batches of k. Only the first half of the batches are
+    candidates, a minimum there means the run is too short to tell.
+
+    Args:
+        series (list): Values in time order, e.g. loads per interval.
+        batch_size (int): Number of values averaged per batch.
+    Returns:
+        int: Number of leading values to discard, None when the warm-up is not
+             over in the first half of the series.
+    """
+    if batch_size < 1:
+        raise ValueError(f"Batch size has to be at least 1: {batch_size}")
+    num_batches = len(series) // batch_size
+    if num_batches < 2:
+        return None
+
+    means = np.asarray(series[:num_batches * batch_size], dtype=float).reshape(num_batches, batch_size).mean(axis=1)
+    # sums and sums of squares of every tail of the batch means, so all truncations take O(k)
+    tail_sums = np.cumsum(means[::-1])[::-1]
+    tail_squares = np.cumsum((means ** 2)[::-1])[::-1]
+    candidates = num_batches // 2 + 1
+    remaining = np.arange(num_batches, num_batches - candidates, -1, dtype=float)
+    squared_errors = tail_squares[:candidates] - tail_sums[:candidates] ** 2 / remaining
+    truncation = int(np.argmin(squared_errors / remaining ** 2))
+
+    if truncation == candidates - 1 and candidates > 1:
+        return None
+    return truncation * batch_size
+
+def batch_means(series : list, num_batches : int = 20, confidence : float = 0.95) -> tuple:
+    """
+    Returns the batch means confidence interval of the mean of a steady-state
+    series. The series is split into num_batches batches of equal size, the
+    leftover values at its start dropped, and the batch means are treated as
+    independent.
+
+    Args:
+        series (list): Values in time order, after the warm-up.
+        num_batches (int): Number of batches, at least 2.
+        confidence (float): Confidence level, between 0 and 1.
+    Returns:
+        tuple: Tuple containing
+            - float: mean
+            - float: half width of the interval, infinite with fewer values than batches
+    """
+    if num_batches < 2:
+        raise ValueError(f"Number of batches has to be at least 2: {num_batches}")
+    batch_size = len(series) // num_batches
+    if batch_size == 0:
+        return (sum(series) / len(series) if series else 0.0), math.inf
+
+    stats = running_stats()
+    values = np.asarray(series[len(series) - num_batches * batch_size:], dtype=float)
+    for mean in values.reshape(num_batches, batch_size).mean(axis=1):
+        stats.add(float(mean))
+    return confidence_interval(stats, confidence)
+
+def run_until_steady(config : dict,
+                     interval : float = 60,
+                     relative_precision : float = 0.05,
+                     confidence : float = 0.95,
+                     check_every_hrs : float = 24,
+                     num_batches : int = 20,
+                     min_batch_size : int = 5,
+                     mser_batch_size : int = 5) -> dict:
+    """
+    Runs a simulation until the steady-state throughput is estimated precisely
+    enough, or until its sim_duration_hrs, whichever comes first.
+
+    After every interval the loads per interval are checked for the end of
+    the warm-up with mser(). The first time it is found, the warm-up is kept
+    for the rest of the run and the statistics (when collect_statistics is
+    set) are reset so they leave it out. The reset is at that interval, after
+    the warm-up, which errs on the side of discarding too much. From then on,
+    every check_every_hrs the run stops once the batch_means() half width of
+    the loads per interval after the warm-up is within relative_precision of
+    their mean, with at least min_batch_size intervals per batch.
+
+    Args:
+        config (dict): Keyword arguments of lunar_Helium_3_sim, sim_duration_hrs
+                       being the longest the run can go.
+        interval (float): Length of an interval of the load series in minutes.
+        relative_precision (float): Half width to mean ratio to stop at.
+        confidence (float): Confidence level, between 0 and 1.
+        check_every_hrs (float): Simulated hours between precision checks.
+        num_batches (int): Number of batches of the batch means.
+        min_batch_size (int): Intervals per batch needed to stop.
+        mser_batch_size (int): Batch size of the MSER rule.
+    Returns:
+        dict: Dictionary containing
+            - total_loads: loads completed over the whole run.
+            - converged: whether the precision was reached before the end.
+            - stopped_at_hrs: simulated hours run.
+            - warmup_hrs: detected warm-up length, None when not found.
+            - statistics_start_hrs: time the statistics were reset at, None when not.
+            - loads_per_hr: steady-state throughput.
+            - half_width_per_hr: half width of its confidence interval.
+            - statistics: sim_statistics summary, None without collect_statistics.
+    """
+    if check_every_hrs <= 0:
+        raise ValueError(f"Time between checks has to be positive: {check_every_hrs}")
+
+    sim = lunar_Helium_3_sim(**config)
+    sim.setup()
+    series = load_series(interval)
+    sim.add_observer(series)
+
+    warmup = None
+    statistics_start = None
+    mean = 0.0
+    half_width = math.inf
+    converged = False
+    while sim.current_time < sim.sim_duration:
+        # look for the warm-up every interval, so the statistics are reset soon after it
+        sim.advance(sim.current_time + (interval if warmup is None else check_every_hrs * 60))
+
+        loads = series.complete(sim.current_time)
+        if warmup is None:
+            warmup = mser(loads, mser_batch_size)
+            if warmup is None:
+                continue
+            statistics_start = sim.current_time
+            if sim.statistics is not None:
+                sim.statistics.reset(statistics_start)
+            logger.info(f"Warm-up of {warmup * interval / 60:g} hours found at {statistics_start / 60:g} hours")
+
+        steady = loads[warmup:]
+        mean, half_width = batch_means(steady, num_batches, confidence)
+        if len(steady) >= num_batches * min_batch_size and mean > 0 and half_width <= relative_precision * mean:
+            converged = True
+            break
+
+    stopped_at = sim.current_time
+    sim.sim_duration = stopped_at
+    total_loads = sim.finish()
+
+    per_hr = 60 / interval
+    logger.info(f"Steady-state throughput after {stopped_at / 60:g} hours: {mean * per_hr:.3f} "
+                f"+/- {half_width * per_hr:.3f} loads per hour, converged: {converged}")
+    return {"total_loads": total_loads,
+            "converged": converged,
+            "stopped_at_hrs": stopped_at / 60,
+            "warmup_hrs": None if warmup is None else warmup * interval / 60,
+            "statistics_start_hrs": None if statistics_start is None else statistics_start / 60,
+            "loads_per_hr": mean * per_hr,
+            "half_width_per_hr": half_width * per_hr,
+            "statistics": sim.statistics.summary() if sim.statistics is not None else None}
@@ -0,0 +1,180 @@
+from simulator import lunar_Helium_3_sim
+from result_cache import result_cache
+
+import csv
+import time
+import hashlib
+import itertools
+import multiprocessing
+import logging
+logger = logging.getLogger(__name__)
+
+# run outputs kept in a result_cache
+CACHED_COLUMNS = ("total_loads", "truck_loads", "station_served", "statistics", "gradients", "wall_time_s")
+
+# metrics columns added to the configuration columns of each result row
+METRIC_COLUMNS = ["config_index", "replication", "seed", "total_loads",
+                  "truck_loads", "station_served", "wall_time_s"]
+
+def check_config(config : dict) -> None:
+    """
+    Checks a configuration can be run with a derived seed.
+
+    Args:
+        config (dict): lunar_Helium_3_sim parameters.
+    Returns:
+        None
+    """
+    if "seed" in config:
+        raise ValueError(f"Configurations cannot set a seed, every run seed is derived from the master seed: {config['seed']}")
+
+def parameter_grid(base_config : dict, **axes) -> list:
+    """
+    Builds every combination of the input parameter values on top of a base configuration.
+
+    Example:
+        parameter_grid(base, num_mining_trucks=range(1, 51), num_unload_stations=range(1, 11))
+
+    Args:
+        base_config (dict): lunar_Helium_3_sim parameters shared by every configuration.
+        **axes: lunar_Helium_3_sim parameter names mapped to the values to sweep.
+    Returns:
+        list: List of configuration dicts.
+    """
+    check_config({**base_config, **axes})
+    names = list(axes)
+    return [{**base_config, **dict(zip(names, values))}
+            for values in itertools.product(*(axes[name] for name in names))]
+
+def derive_seed(master_seed : int, config_index : int, replication : int) -> int:
+    """
+    Derives the seed of one run from the master seed. The same inputs always
+    give the same seed, and different runs get unrelated seeds.
+
+    Args:
+        master_seed (int): Seed of the whole sweep.
+        config_index (int): Index of the configuration in the sweep.
+        replication (int): Replication number of the configuration.
+    Returns:
+        int: 64 bit seed for the run.
+    """
+    digest = hashlib.sha256(f"{master_seed}:{config_index}:{replication}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+def run_one(task : tuple) -> dict:
+    """
+    Runs a single seeded simulation and returns its metrics. Runs in a worker process.
+
+    Args:
+        task (tuple): Tuple containing
+            - int: config_index
+            - int: replication
+            - int: seed
+            - dict: lunar_Helium_3_sim parameters
+    Returns:
+        dict: Result row with the configuration and the run metrics, the
+              statistics summary when collect_statistics is set and the
+              derivative estimates when estimate_gradients is set.
+    """
+    config_index, replication, seed, config = task
+    start = time.perf_counter()
+    sim = lunar_Helium_3_sim(**config, seed=seed)
+    sim.run()
+
+    row = {**config,
+            "config_index": config_index,
+            "replication": replication,
+            "seed": seed,
+            "total_loads": sim.total_loads,
+            "truck_loads": [truck.get_completed_load_count() for truck in sim.mining_trucks],
+            "station_served": [station.get_total_trucks_served() for station in sim.unloading_stations],
+            "wall_time_s": time.perf_counter() - start}
+    if sim.statistics is not None:
+        row["statistics"] = sim.statistics.summary()
+    if sim.gradients is not None:
+        row["gradients"] = sim.gradients
+    return row
+
+def run_sweep(configs : list,
+              num_replications : int,
+              master_seed : int,
+              processes : int = None,
+              chunksize : int = 1,
+              cache_path : str = None):
+    """
+    Runs every configuration num_replications times on a process pool and
+    yields a result row as soon as each run completes. Rows arrive in
+    completion order; use config_index and replication to sort them.
+
+    Any single run can be reproduced later with
+    lunar_Helium_3_sim(**config, seed=row["seed"]).
+
+    With a cache_path, runs found in the result_cache are yielded first without
+    simulating, with the wall_time_s of the run that was cached, and only the
+    other runs go to the pool. Their results are added to the cache.
+
+    Args:
+        configs (list): List of lunar_Helium_3_sim parameter dicts.
+        num_replications (int): Number of runs per configuration.
+        master_seed (int): Seed every run seed is derived from.
+        processes (int): Number of worker processes, defaults to every core (Optional).
+        chunksize (int): Number of runs sent to a worker at a time (Optional).
+        cache_path (str): SQLite file of a result_cache (Optional).
+    Yields:
+        dict: Result row of a completed run.
+    """
+    for config in configs:
+        check_config(config)
+    tasks = ((config_index, replication, derive_seed(master_seed, config_index, replication), config)
+             for config_index, config in enumerate(configs)
+             for replication in range(num_replications))
+
+    if cache_path is None:
+        logger.info(f"Running {len(configs) * num_replications} simulations on {processes or multiprocessing.cpu_count()} processes")
+        with multiprocessing.Pool(processes) as pool:
+            yield from pool.imap_unordered(run_one, tasks, chunksize)
+        return
+
+    with result_cache(cache_path) as cache:
+        missing = []
+        for task in tasks:
+            config_index, replication, seed, config = task
+            cached = cache.get(config, seed)
+            if cached is None:
+                missing.append(task)
+            else:
+                yield {**config, "config_index": config_index, "replication": replication, "seed": seed, **cached}
+
+        logger.info(f"Found {cache.hits} cached runs, running {len(missing)} simulations "
+                    f"on {processes or multiprocessing.cpu_count()} processes")
+        if not missing:
+            return
+        with multiprocessing.Pool(processes) as pool:
+            for row in pool.imap_unordered(run_one, missing, chunksize):
+                config = {name: row[name] for name in configs[row["config_index"]]}
+                cache.put(config, row["seed"], {name: row[name] for name in CACHED_COLUMNS if name in row})
+                yield row
+
+def write_csv(rows, file_path : str) -> int:
+    """
+    Writes result rows to a CSV file. Rows can have different columns, e.g.
+    from configurations with and without collect_statistics, so the rows are
+    kept until the last one arrives and the table gets a column for every key
+    of any row, empty where a row does not have it.
+
+    Args:
+        rows (iterable): Result rows from run_sweep().
+        file_path (str): Path of the CSV file.
+    Returns:
+        int: Number of rows written.
+    """
+    rows = list(rows)
+    # configuration columns in the order they first appear, then the metrics and any other outputs
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    outputs = [name for name in names if name in CACHED_COLUMNS and name not in METRIC_COLUMNS]
+    fieldnames = [name for name in names if name not in METRIC_COLUMNS and name not in outputs] + METRIC_COLUMNS + outputs
+    with open(file_path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
@@ -0,0 +1,425 @@
+from fleet import STATE_NAMES
+
+import asyncio
+import json
+import socket
+import threading
+from collections import deque
+import logging
+logger = logging.getLogger(__name__)
+
+TRUCK_STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+class telemetry_publisher:
+    """
+    Represents an observer that sends the changes of a running simulation to a
+    telemetry_server, as one compact frame every interval simulated minutes.
+
+    A frame only holds what changed since the previous frame: the state code
+    of each truck that changed state, the busy flag and queue length of each
+    station that changed, and the loads completed so far. Changes of the same
+    truck or station within an interval are merged, so a frame never holds
+    more than one entry per truck and station. When the server's buffer is
+    full the frame is kept and merged into the next one, so no change is lost
+    and the simulation never waits.
+
+    Attributes:
+        server (telemetry_server): Server the frames are published to.
+        interval (float): Simulated minutes between frames.
+        loads (int): Loads completed so far.
+
+    Methods:
+        update_current_time(): Publishes a frame when the interval has passed.
+        truck_state_changed(): Records a truck state change.
+        station_changed(): Records a station change.
+        close(): Publishes the last frame.
+    """
+
+    def __init__(self, server : object, num_trucks : int, num_stations : int, interval : float = 60):
+        """
+        Initializes the telemetry_publisher class. Every truck starts in
+        start_mining and every station idle at time 0, which the first frame holds.
+
+        Args:
+            server (telemetry_server): Server the frames are published to.
+            num_trucks (int): Number of trucks.
+            num_stations (int): Number of stations.
+            interval (float): Simulated minutes between frames.
+        """
+        self.server = server
+        self.interval = interval
+        self.loads = 0
+        self.current_time = 0
+        self.next_frame_time = 0
+        self.start = True
+
+        self._trucks = dict.fromkeys(range(num_trucks), TRUCK_STATE_CODES["start_mining"])
+        self._stations = {station_ID: (0, 0) for station_ID in range(num_stations)}
+
+    def update_current_time(self, current_time : float) -> None:
+        """
+        Updates the current simulation time and publishes the changes when the
+        interval has passed.
+
+        Args:
+            current_time (float): current time from simulator
+        Returns:
+            None
+        """
+        self.current_time = current_time
+        if current_time >= self.next_frame_time:
+            self._publish()
+            self.next_frame_time = current_time + self.interval
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        """
+        Records the new state of a truck.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (str): Name of the new state.
+            time (float): Time of the change.
+        Returns:
+            None
+        """
+        self._trucks[truck_ID] = TRUCK_STATE_CODES[state]
+        if state == "load_complete":
+            self.loads += 1
+
+    def station_changed(self, station : object) -> None:
+        """
+        Records the busy flag and queue length of a station.
+
+        Args:
+            station (unload_stations): Station that changed.
+        Returns:
+            None
+        """
+        self._stations[station.ID] = (0 if station.is_available else 1, len(station.truck_queue))
+
+    def close(self, end_time : float) -> None:
+        """
+        Publishes the remaining changes as the last frame of the run, even if
+        the server's buffer is full.
+
+        Args:
+            end_time (float): Simulation end time.
+        Returns:
+            None
+        """
+        self.current_time = end_time
+        self._publish(end=True)
+
+    def _publish(self, end : bool = False) -> None:
+        """
+        Hands the pending changes to the server as one frame, and keeps them for
+        the next frame if the server's buffer is full.
+        """
+        frame = {"time": self.current_time,
+                 "loads": self.loads,
+                 "trucks": self._trucks,
+                 "stations": self._stations}
+        if self.start:
+            frame["start"] = True
+        if end:
+            frame["end"] = True
+        if not self.server.publish(frame, force=end):
+            return
+        self.start = False
+        self._trucks = {}
+        self._stations = {}
+
+class telemetry_server:
+    """
+    Represents a server streaming simulation telemetry to local subscribers.
+
+    The server runs an asyncio event loop in a background thread and listens on
+    a TCP port, or on a Unix socket when a path is given. Every subscriber gets
+    newline delimited JSON frames: first a frame with the whole current state
+    ("start" set), then the changes since the frame before, in the
+    telemetry_publisher format with "state_names" in the first frame.
+
+    The simulation thread only appends frames to a bounded buffer and wakes the
+    event loop, and publish() returns False instead of waiting when the buffer
+    is full. Each subscriber has its own pending frame: while it is still
+    writing one, new frames are merged into the pending one, so a slow
+    subscriber skips stale intermediate states and gets the latest state when
+    it catches up, without slowing the other subscribers or the simulation.
+
+    Example:
+        with telemetry_server(port=8765) as server:
+            lunar_Helium_3_sim(..., telemetry=server).run()
+
+    Attributes:
+        host (str): TCP host to listen on.
+        port (int): TCP port to listen on, 0 for any free port.
+        path (str): Unix socket path to listen on instead of TCP (Optional).
+        interval (float): Simulated minutes between frames.
+        buffer_size (int): Frames the simulation can publish before the event loop takes them.
+        address (object): (host, port) or path the server listens on, once started.
+        frames_published (int): Frames published by the simulation.
+        frames_merged (int): Frames merged into a pending frame of a slow subscriber.
+
+    Methods:
+        start(): Starts the server thread and waits until it listens.
+        publish(): Hands a frame to the server without waiting.
+        state(): Returns the whole current state as a frame.
+        close(): Stops the server.
+    """
+
+    def __init__(self,
+                host : str = "127.0.0.1",
+                port : int = 0,
+                path : str = None,
+                interval : float = 60,
+                buffer_size : int = 64):
+        """
+        Initializes the telemetry_server class.
+
+        Args:
+            host (str): TCP host to listen on.
+            port (int): TCP port to listen on, 0 for any free port.
+            path (str): Unix socket path to listen on instead of TCP (Optional).
+            interval (float): Simulated minutes between frames.
+            buffer_size (int): Frames the simulation can publish before the event loop takes them.
+        """
+        if buffer_size < 1:
+            raise ValueError(f"Telemetry buffer size has to be at least 1: {buffer_size}")
+
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.buffer_size = buffer_size
+        self.address = None
+        self.frames_published = 0
+        self.frames_merged = 0
+
+        self._frames = deque()
+        self._wakeup_pending = False
+        self._state = {"time": 0, "loads": 0, "trucks": {}, "stations": {}}
+        self._subscribers = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self) -> None:
+        """
+        Starts the event loop thread and waits until the server listens.
+
+        Returns:
+            None
+        """
+        listening = threading.Event()
+        errors = []
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self._listen())
+            except OSError as error:
+                errors.append(error)
+                listening.set()
+                return
+            listening.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="telemetry_server", daemon=True)
+        self._thread.start()
+        listening.wait()
+        if errors:
+            raise errors[0]
+        logger.info(f"Telemetry server listening on {self.address}")
+
+    async def _listen(self) -> None:
+        """
+        Starts listening on the Unix socket or TCP port.
+        """
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._subscribe, self.path)
+            self.address = self.path
+        else:
+            self._server = await asyncio.start_server(self._subscribe, self.host, self.port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    def publish(self, frame : dict, force : bool = False) -> bool:
+        """
+        Hands a frame to the server. Called from the simulation thread, never waits.
+
+        Args:
+            frame (dict): Frame from a telemetry_publisher.
+            force (bool): Add the frame even if the buffer is full.
+        Returns:
+            bool: False if the buffer is full and the frame was not added.
+        """
+        if self._loop is None or self._loop.is_closed():
+            return True
+        if len(self._frames) >= self.buffer_size and not force:
+            return False
+        self._frames.append(frame)
+        self.frames_published += 1
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch)
+            except RuntimeError:
+                # the loop was closed by close()
+                pass
+        return True
+
+    def _dispatch(self) -> None:
+        """
+        Applies the buffered frames to the current state and hands them to
+        every subscriber. Runs in the event loop.
+        """
+        self._wakeup_pending = False
+        while self._frames:
+            frame = self._frames.popleft()
+            if frame.get("start"):
+                self._state = {"time": 0, "loads": 0, "trucks": {}, "stations": {}}
+            merge_frame(self._state, frame)
+            # subscribers joining later wait for the next run
+            self._state.pop("end", None)
+            for subscriber in self._subscribers:
+                if subscriber.pending is None or frame.get("start"):
+                    if subscriber.pending is not None:
+                        self.frames_merged += 1
+                    # a new run replaces whatever is pending
+                    subscriber.pending = dict(frame, trucks=dict(frame["trucks"]), stations=dict(frame["stations"]))
+                else:
+                    merge_frame(subscriber.pending, frame)
+                    self.frames_merged += 1
+                subscriber.ready.set()
+
+    async def _subscribe(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter) -> None:
+        """
+        Streams frames to one subscriber until it disconnects.
+        """
+        subscriber = _subscriber(self.state())
+        self._subscribers.add(subscriber)
+        logger.info(f"Telemetry subscriber connected, {len(self._subscribers)} in total")
+        try:
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                frame, subscriber.pending = subscriber.pending, None
+                writer.write(encode_frame(frame))
+                # only this subscriber waits for its socket
+                await writer.drain()
+                if frame.get("end"):
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._subscribers.discard(subscriber)
+            writer.close()
+            logger.info(f"Telemetry subscriber disconnected, {len(self._subscribers)} left")
+
+    def state(self) -> dict:
+        """
+        Returns the whole current state as a start frame, with the truck state names.
+
+        Returns:
+            dict: Frame with every truck and station.
+        """
+        return {**self._state,
+                "trucks": dict(self._state["trucks"]),
+                "stations": dict(self._state["stations"]),
+                "start": True,
+                "state_names": list(STATE_NAMES)}
+
+    def close(self) -> None:
+        """
+        Stops the server and disconnects every subscriber.
+
+        Returns:
+            None
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        logger.info(f"Telemetry server closed after {self.frames_published} frames, "
+                    f"{self.frames_merged} merged for slow subscribers")
+
+    async def _shutdown(self) -> None:
+        """
+        Stops listening and cancels the subscriber tasks.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+class _subscriber:
+    """
+    Pending frame and wakeup event of one connected subscriber.
+    """
+    def __init__(self, frame : dict):
+        self.pending = frame
+        self.ready = asyncio.Event()
+        self.ready.set()
+
+def merge_frame(frame : dict, newer : dict) -> None:
+    """
+    Merges a newer frame into a frame, keeping the latest value of every truck and station.
+
+    Args:
+        frame (dict): Frame to update.
+        newer (dict): Frame published after it.
+    Returns:
+        None
+    """
+    frame["time"] = newer["time"]
+    frame["loads"] = newer["loads"]
+    frame["trucks"].update(newer["trucks"])
+    frame["stations"].update(newer["stations"])
+    if newer.get("end"):
+        frame["end"] = True
+
+def encode_frame(frame : dict) -> bytes:
+    """
+    Returns a frame as one compact JSON line. Trucks are sent as
+    {"ID": state code} and stations as {"ID": [busy, queue length]}.
+
+    Args:
+        frame (dict): Frame to encode.
+    Returns:
+        bytes: JSON line.
+    """
+    return json.dumps(frame, separators=(",", ":")).encode() + b"\n"
+
+def read_frames(address : object, timeout : float = None):
+    """
+    Connects to a telemetry_server and yields its frames until it disconnects
+    or the run ends.
+
+    Args:
+        address (object): (host, port) tuple, or a Unix socket path.
+        timeout (float): Seconds to wait for a frame (Optional).
+    Yields:
+        dict: Frame, with the truck and station IDs as strings.
+    """
+    if isinstance(address, str):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(address)
+    else:
+        connection = socket.create_connection(tuple(address), timeout=timeout)
+    with connection, connection.makefile("rb") as lines:
+        for line in lines:
+            frame = json.loads(line)
+            yield frame
+            if frame.get("end"):
+                return
@@ -0,0 +1,72 @@
+from simulator import lunar_Helium_3_sim
+from batch_engine import batch_engine
+
+import random
+import numpy as np
+import pytest
+
+config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=72,
+              truck_unload_duration=5, travel_to_unload=30,
+              mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+def test_batch_matches_object_engine() -> None:
+    """
+    Test to ensure each replication matches the object engine given the same mining durations
+
+    Returns:
+        None
+    """
+    sims = []
+    for seed in range(4):
+        random.seed(seed)
+        sim = lunar_Helium_3_sim(**config)
+        sim.run()
+        sims.append(sim)
+
+    mining_durations = np.array([[truck.mining_duration for truck in sim.mining_trucks] for sim in sims])
+    batch = batch_engine(num_replications=len(sims), mining_durations=mining_durations, **config)
+    batch.run()
+
+    for replication, sim in enumerate(sims):
+        assert batch.total_loads[replication] == sim.total_loads, "Total loads should match the object engine."
+        assert list(batch.truck_loads[replication]) == [truck.get_completed_load_count() for truck in sim.mining_trucks], \
+            "Truck loads should match the object engine."
+        assert list(batch.station_served[replication]) == [station.get_total_trucks_served() for station in sim.unloading_stations], \
+            "Station counts should match the object engine."
+
+def test_batch_matches_congested_object_engine() -> None:
+    """
+    Test to ensure released stations are handed to queued trucks like the object engine when many trucks queue
+
+    Returns:
+        None
+    """
+    congested = {**config, "num_mining_trucks": 30, "num_unload_stations": 3}
+    sims = [lunar_Helium_3_sim(**congested, seed=seed) for seed in range(3)]
+    for sim in sims:
+        sim.run()
+
+    mining_durations = np.array([[truck.mining_duration for truck in sim.mining_trucks] for sim in sims])
+    batch = batch_engine(num_replications=len(sims), mining_durations=mining_durations, **congested)
+    batch.run()
+
+    assert list(batch.total_loads) == [sim.total_loads for sim in sims], "Total loads should match the object engine."
+    for replication, sim in enumerate(sims):
+        assert list(batch.station_served[replication]) == [station.get_total_trucks_served() for station in sim.unloading_stations], \
+            "Station counts should match the object engine."
+
+def test_batch_shapes() -> None:
+    """
+    Test to ensure the batch results have one row per replication
+
+    Returns:
+        None
+    """
+    batch = batch_engine(num_replications=50, seed=1, **config)
+    total_loads = batch.run()
+
+    assert total_loads.shape == (50,), "There should be one total per replication."
+    assert batch.truck_loads.shape == (50, 10), "There should be one count per replication and truck."
+    assert batch.station_served.shape == (50, 2), "There should be one count per replication and station."
+    assert (batch.truck_loads.sum(axis=1) == batch.station_served.sum(axis=1)).all(), \
+        "Every load should be served by a station."
@@ -0,0 +1,80 @@
+from benchmark import run_case, compare, main
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import pytest
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    """
+    Restores the default logging configuration after each test.
+    """
+    yield
+    logging.disable(logging.NOTSET)
+    logging.basicConfig(force=True, handlers=[logging.NullHandler()])
+
+def test_run_case() -> None:
+    """
+    Test to ensure a benchmark case reports throughput, transitions and peak memory
+
+    Returns:
+        None
+    """
+    result = run_case("event", 10, 2, 24)
+
+    assert result["name"] == "event-10t-2s-24h", "The case name should describe the case."
+    assert result["transitions"] > 0 and result["transitions_per_s"] > 0, "State transitions should be counted."
+    assert result["sim_minutes_per_s"] == 24 * 60 / result["wall_time_s"], "Throughput should be simulated minutes per second."
+    assert result["peak_memory_bytes"] > 0, "Peak memory should be measured."
+    assert run_case("tick", 10, 2, 24)["transitions"] == result["transitions"], "Every engine should count the same transitions."
+
+def test_compare_flags_regressions() -> None:
+    """
+    Test to ensure compare() flags cases that grew beyond the threshold only
+
+    Returns:
+        None
+    """
+    baseline = {"results": [{"name": "a", "wall_time_s": 1.0, "peak_memory_bytes": 100},
+                            {"name": "b", "wall_time_s": 1.0, "peak_memory_bytes": 100}]}
+    report = {"results": [{"name": "a", "wall_time_s": 1.05, "peak_memory_bytes": 150},
+                          {"name": "b", "wall_time_s": 2.0, "peak_memory_bytes": 100},
+                          {"name": "c", "wall_time_s": 9.0, "peak_memory_bytes": 900}]}
+
+    regressions = compare(report, baseline, threshold=0.1)
+    assert {(regression["name"], regression["metric"]) for regression in regressions} == \
+        {("a", "peak_memory_bytes"), ("b", "wall_time_s")}, "Only growth beyond 10% should be flagged."
+
+def test_main_writes_report(tmp_path) -> None:
+    """
+    Test to ensure the command line writes a report that compares cleanly to itself
+
+    Returns:
+        None
+    """
+    output = tmp_path / "benchmark.json"
+    assert main(["--suite", "quick", "--repeat", "1", "--no-memory", "--output", str(output)]) == 0
+
+    with open(output) as report_file:
+        report = json.load(report_file)
+    assert len(report["results"]) == 5, "Every case of the suite should be reported."
+    assert compare(report, report) == [], "A report should not regress against itself."
+
+def test_runs_without_numpy() -> None:
+    """
+    Test to ensure the benchmark imports and runs the quick suite with the standard library only
+
+    Returns:
+        None
+    """
+    # a None entry in sys.modules makes every import of numpy fail
+    script = ("import sys; sys.modules['numpy'] = None; "
+              "import benchmark; print(len(benchmark.run_suite('quick', measure_memory=False)['results']))")
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    assert result.returncode == 0, f"The benchmark should not need numpy: {result.stderr}"
+    assert result.stdout.split()[-1] == "5", "Every case of the quick suite should run."
@@ -0,0 +1,112 @@
+from capacity_planner import capacity_planner, plan_capacity
+
+import pytest
+
+base_config = dict(sim_duration_hrs=72, truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, engine="event")
+
+def test_plan_finds_fewest_trucks() -> None:
+    """
+    Test to ensure the cheapest plan reaches the target and one truck fewer does not
+
+    Returns:
+        None
+    """
+    result = plan_capacity(base_config, target_loads=300, truck_cost=1, station_cost=5,
+                           num_replications=3, processes=2)
+    best = result["best"]
+
+    assert best["feasible"] and best["mean"] >= 300, "The plan should reach the target."
+    assert best["ci_low"] <= best["mean"] <= best["ci_high"], "The plan should have a confidence interval."
+
+    planner = capacity_planner(base_config, target_loads=300, num_replications=3)
+    assert not planner.feasible(best["num_mining_trucks"] - 1, best["num_unload_stations"]), \
+        "One truck fewer should not reach the target."
+    assert result["simulations"] < 100, "Far fewer than a full grid of simulations should be run."
+
+def test_frontier_is_pareto() -> None:
+    """
+    Test to ensure every frontier configuration needs fewer trucks than the ones with fewer stations
+
+    Returns:
+        None
+    """
+    planner = capacity_planner(base_config, target_loads=600, truck_cost=1, station_cost=1,
+                               max_stations=4, num_replications=2)
+    result = planner.plan()
+    frontier = result["frontier"]
+
+    assert frontier, "The target should be reachable."
+    assert [point["num_unload_stations"] for point in frontier] == \
+        sorted(point["num_unload_stations"] for point in frontier), "The frontier should be ordered by stations."
+    trucks = [point["num_mining_trucks"] for point in frontier]
+    assert trucks == sorted(trucks, reverse=True) and len(set(trucks)) == len(trucks), \
+        "Each added station on the frontier should save trucks."
+    assert result["best"]["cost"] == min(point["cost"] for point in frontier), "The best plan should be the cheapest."
+
+class recording_pool:
+    """
+    Runs map() in this process and records the number of runs sent at a time.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def map(self, function, tasks):
+        tasks = list(tasks)
+        self.batches.append(len(tasks))
+        return [function(task) for task in tasks]
+
+def test_parallel_candidates() -> None:
+    """
+    Test to ensure several truck counts are run together per step and the plan stays the same
+
+    Returns:
+        None
+    """
+    plans = {}
+    pools = {}
+    for parallel_candidates in (1, 4):
+        pools[parallel_candidates] = recording_pool()
+        plans[parallel_candidates] = capacity_planner(base_config, target_loads=300, station_cost=5, num_replications=2,
+                                                      pool=pools[parallel_candidates],
+                                                      parallel_candidates=parallel_candidates).plan()
+
+    assert plans[4]["best"] == plans[1]["best"], "Running candidates together should find the same plan."
+    assert max(pools[1].batches) == 2, "A single candidate should only send its own replications."
+    assert max(pools[4].batches) > 2, "Several candidates should share the pool."
+    assert len(pools[4].batches) < len(pools[1].batches), "Running candidates together should take fewer steps."
+    with pytest.raises(ValueError):
+        capacity_planner(base_config, target_loads=10, parallel_candidates=0)
+
+def test_unreachable_target() -> None:
+    """
+    Test to ensure a target no configuration can reach returns no plan
+
+    Returns:
+        None
+    """
+    planner = capacity_planner({**base_config, "sim_duration_hrs": 1}, target_loads=1000,
+                               max_trucks=5, max_stations=2, num_replications=2)
+    result = planner.plan()
+
+    assert result["best"] is None and result["frontier"] == [], "No plan should be found."
+    with pytest.raises(ValueError):
+        capacity_planner(base_config, target_loads=10, num_replications=1)
+
+def test_distribution_bounds() -> None:
+    """
+    Test to ensure per-cycle duration distributions set the bounds instead of the fixed durations
+
+    Returns:
+        None
+    """
+    config = {**base_config, "mining_distribution": ("constant", 10)}
+    result = capacity_planner(config, target_loads=300, num_replications=3).plan()
+    best = result["best"]
+
+    planner = capacity_planner(config, target_loads=300, num_replications=3)
+    assert best["feasible"] and not planner.feasible(best["num_mining_trucks"] - 1, best["num_unload_stations"]), \
+        "The plan should use the fewest trucks the short mining durations need."
+    assert best["num_mining_trucks"] <= 4, "4 trucks reach the target with 10 minute mining."
+    with pytest.raises(ValueError):
+        capacity_planner({**base_config, "road_network": {}}, target_loads=10)
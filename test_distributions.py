@@ -0,0 +1,131 @@
+from simulator import lunar_Helium_3_sim
+from distributions import duration_distribution, duration_sampler
+from snapshot import dumps_snapshot, loads_snapshot
+
+import numpy as np
+import pytest
+
+base_config = dict(num_mining_trucks=20, num_unload_stations=2, sim_duration_hrs=72,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=7)
+
+integer_distributions = dict(mining_distribution=("empirical", [60, 90, 120, 180, 300], [1, 2, 3, 2, 1]),
+                             travel_distribution=("empirical", [20, 30, 45]),
+                             unload_distribution=("empirical", [4, 5, 6, 8]))
+
+@pytest.mark.parametrize("spec", [("constant", 30), ("uniform", 20, 40), ("triangular", 60, 100, 300),
+                                  ("lognormal", 30, 5), ("empirical", [4, 5, 8], [1, 2, 1])])
+def test_distribution_mean(spec) -> None:
+    """
+    Test to ensure every distribution samples durations with its mean
+
+    Returns:
+        None
+    """
+    distribution = duration_distribution(spec)
+    sample = distribution.sample(np.random.default_rng(0), 100000)
+
+    assert sample.min() >= distribution.minimum(), "No duration should be below the minimum."
+    assert sample.mean() == pytest.approx(distribution.mean(), rel=0.01), "Sample mean should match the distribution."
+    if spec[0] == "lognormal":
+        assert sample.std() == pytest.approx(5, rel=0.05), "Lognormal deviation should match its spec."
+
+@pytest.mark.parametrize("spec", [("normal", 1, 2), ("uniform", 40, 20), ("triangular", 1, 5, 3),
+                                  ("lognormal", -1, 1), ("empirical", []), ("empirical", [1, 2], [1]),
+                                  ("constant", -1), ("uniform", 1)])
+def test_invalid_distribution(spec) -> None:
+    """
+    Test to ensure invalid distribution specs are rejected
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        duration_distribution(spec)
+
+def test_sampler_state() -> None:
+    """
+    Test to ensure a sampler continues the same sequence across blocks after restoring its state
+
+    Returns:
+        None
+    """
+    distribution = duration_distribution(("uniform", 0, 1))
+    sampler = duration_sampler(distribution, seed=1, block_size=10)
+    first = [sampler.draw() for n in range(15)]
+    state = sampler.getstate()
+    expected = [sampler.draw() for n in range(20)]
+
+    restored = duration_sampler(distribution, seed=2, block_size=10)
+    restored.setstate(state)
+    assert [restored.draw() for n in range(20)] == expected, "Restored sampler should continue the sequence."
+    assert len(set(first + expected)) == 35, "Every draw should be a new duration."
+
+def test_durations_change_every_cycle() -> None:
+    """
+    Test to ensure trucks draw new durations every cycle
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**base_config, **integer_distributions)
+    sim.setup()
+    durations = set()
+    for minute in range(0, 72 * 60, 60):
+        sim.advance(minute)
+        durations.add(sim.mining_trucks[0].mining_duration)
+    sim.finish()
+
+    assert len(durations) > 1, "A truck should mine for different durations in different cycles."
+
+def test_constant_distributions_match_fixed_durations() -> None:
+    """
+    Test to ensure constant travel and unload distributions give the same run as the fixed durations
+
+    Returns:
+        None
+    """
+    for engine in ("tick", "fleet", "event"):
+        fixed = lunar_Helium_3_sim(**base_config, engine=engine).run()
+        constant = lunar_Helium_3_sim(**base_config, engine=engine,
+                                      travel_distribution=("constant", 30), unload_distribution=("constant", 5)).run()
+        assert fixed == constant, f"Constant distributions should not change the {engine} engine run."
+
+@pytest.mark.parametrize("common_random_numbers", [False, True])
+def test_engines_agree(common_random_numbers) -> None:
+    """
+    Test to ensure every engine gives the same counts with integer per-cycle durations
+
+    Returns:
+        None
+    """
+    loads = [lunar_Helium_3_sim(**base_config, **integer_distributions, engine=engine,
+                                common_random_numbers=common_random_numbers).run()
+             for engine in ("tick", "fleet", "event")]
+    assert len(set(loads)) == 1, f"Engines should agree: {loads}"
+
+@pytest.mark.parametrize("engine", ["tick", "fleet", "event"])
+def test_snapshot_continuation(engine) -> None:
+    """
+    Test to ensure a snapshot continues the per-cycle durations of a run that never stopped
+
+    Returns:
+        None
+    """
+    full_run = lunar_Helium_3_sim(**base_config, **integer_distributions, engine=engine).run()
+
+    sim = lunar_Helium_3_sim(**base_config, **integer_distributions, engine=engine)
+    sim.setup()
+    sim.advance(31 * 60 + 7)
+    snapshot = loads_snapshot(dumps_snapshot(sim.snapshot()))
+    assert lunar_Helium_3_sim.from_snapshot(snapshot).run() == full_run, "Continuation should match the full run."
+
+def test_unload_duration_must_be_positive() -> None:
+    """
+    Test to ensure unloading durations that can be zero are rejected
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**base_config, unload_distribution=("empirical", [0, 5]))
@@ -0,0 +1,61 @@
+from simulator import lunar_Helium_3_sim
+
+import random
+import pytest
+
+def run_sim(engine : str, seed : int, **kwargs) -> lunar_Helium_3_sim:
+    """
+    Runs a seeded simulation with the input engine.
+
+    Returns:
+        lunar_Helium_3_sim: simulation after running.
+    """
+    random.seed(seed)
+    sim = lunar_Helium_3_sim(engine=engine, **kwargs)
+    sim.run()
+    return sim
+
+@pytest.mark.parametrize("seed, num_mining_trucks, num_unload_stations", [(1, 10, 2), (2, 20, 3), (3, 5, 1), (4, 30, 2)])
+def test_event_engine_matches_tick_engine(seed, num_mining_trucks, num_unload_stations) -> None:
+    """
+    Test to ensure the event engine gives the same counts as the tick engine
+
+    Returns:
+        None
+    """
+    config = dict(num_mining_trucks=num_mining_trucks, num_unload_stations=num_unload_stations,
+                  sim_duration_hrs=72, truck_unload_duration=5, travel_to_unload=30,
+                  mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+    tick_sim = run_sim("tick", seed, **config)
+    event_sim = run_sim("event", seed, **config)
+
+    assert event_sim.total_loads == tick_sim.total_loads, "Total loads should match the tick engine."
+    assert [truck.get_completed_load_count() for truck in event_sim.mining_trucks] == \
+        [truck.get_completed_load_count() for truck in tick_sim.mining_trucks], "Truck loads should match the tick engine."
+    assert [station.get_total_trucks_served() for station in event_sim.unloading_stations] == \
+        [station.get_total_trucks_served() for station in tick_sim.unloading_stations], "Station counts should match the tick engine."
+
+def test_event_engine_non_integer_durations() -> None:
+    """
+    Test to ensure the event engine runs with non-integer durations
+
+    Returns:
+        None
+    """
+    sim = run_sim("event", 1, num_mining_trucks=1, num_unload_stations=1, sim_duration_hrs=1,
+                  truck_unload_duration=2.5, travel_to_unload=7.25,
+                  mining_duration_min_hrs=0.25, mining_duration_max_hrs=0.25)
+
+    # each cycle is 15 + 7.25 + 2.5 minutes plus the 4 one minute hand-off steps
+    assert sim.total_loads == 2, "Truck should complete 2 loads in an hour."
+
+def test_unknown_engine() -> None:
+    """
+    Test to ensure an unknown engine name is rejected
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(1, 1, 1, 5, 30, 1, 5, engine="fast")
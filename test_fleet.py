@@ -0,0 +1,66 @@
+from simulator import lunar_Helium_3_sim
+from station_manager import station_manager
+from stations import unload_stations as m_unload_station
+from fleet import truck_fleet, MINING_IN_PROGRESS, TRAVEL_TO_UNLOAD
+
+import pytest
+
+config = dict(num_mining_trucks=20, num_unload_stations=3, sim_duration_hrs=72,
+              truck_unload_duration=5, travel_to_unload=30,
+              mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+def test_fleet_matches_tick_engine() -> None:
+    """
+    Test to ensure the fleet engine gives the same counts as the tick engine
+
+    Returns:
+        None
+    """
+    tick_sim = lunar_Helium_3_sim(**config, seed=7)
+    fleet_sim = lunar_Helium_3_sim(**config, seed=7, engine="fleet")
+
+    assert fleet_sim.run() == tick_sim.run(), "Total loads should match the tick engine."
+    assert [truck.get_completed_load_count() for truck in fleet_sim.mining_trucks] == \
+        [truck.get_completed_load_count() for truck in tick_sim.mining_trucks], "Truck loads should match the tick engine."
+    assert [station.get_total_trucks_served() for station in fleet_sim.unloading_stations] == \
+        [station.get_total_trucks_served() for station in tick_sim.unloading_stations], "Station counts should match the tick engine."
+
+def test_fleet_state_transition() -> None:
+    """
+    Test to ensure fleet trucks move through the mining states
+
+    Returns:
+        None
+    """
+    stations = [m_unload_station(station_ID=0)]
+    fleet = truck_fleet(mining_durations=[10], unload_duration=5, travel_to_unload=30,
+                        station_manager=station_manager(stations))
+
+    fleet.update_current_time(0)
+    fleet.start_mining()
+    assert fleet[0].state_name == "mining_in_progress", "Truck should be mining."
+
+    fleet.update_current_time(9)
+    fleet.step()
+    assert fleet.phase[0] == MINING_IN_PROGRESS, "Truck should still be mining."
+
+    fleet.update_current_time(10)
+    fleet.step()
+    assert fleet.phase[0] == TRAVEL_TO_UNLOAD, "Truck should be traveling."
+
+    for current_time in range(40, 49):
+        fleet.update_current_time(current_time)
+        fleet.step()
+    assert fleet[0].get_completed_load_count() == 1, "Truck should have completed 1 load."
+    assert stations[0].get_total_trucks_served() == 1, "Station should have served 1 truck."
+
+def test_fleet_memory() -> None:
+    """
+    Test to ensure a fleet truck takes less than 100 bytes
+
+    Returns:
+        None
+    """
+    fleet = truck_fleet(mining_durations=[60] * 100000, unload_duration=5, travel_to_unload=30,
+                        station_manager=None)
+    assert fleet.nbytes() / len(fleet) < 100, "Each truck should use less than 100 bytes."
@@ -0,0 +1,87 @@
+from simulator import lunar_Helium_3_sim
+from gradients import GRADIENT_PARAMETERS
+
+import pytest
+
+base_config = dict(num_mining_trucks=30, num_unload_stations=2, sim_duration_hrs=500,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, engine="event")
+
+def test_single_truck_gradients() -> None:
+    """
+    Test to ensure a truck that never waits gets the derivative of loads completed in cycles of fixed length
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**{**base_config, "num_mining_trucks": 1, "num_unload_stations": 1,
+                                "mining_duration_min_hrs": 2, "mining_duration_max_hrs": 2}, estimate_gradients=True)
+    total_loads = sim.run()
+    cycle_time = sim.gradient_estimator.last_completion[0] / total_loads
+    loads_per_minute = total_loads / cycle_time
+
+    for name, per_unit in zip(GRADIENT_PARAMETERS, (1, 1, 30, 30)):
+        assert sim.gradients["total_loads"][name] == pytest.approx(-loads_per_minute * per_unit, rel=0.02), \
+            f"One more unit of {name} should lengthen every cycle by {per_unit} minutes."
+        assert sim.gradients["mean_wait"][name] == 0, "A single truck never waits."
+
+def test_gradients_match_finite_differences() -> None:
+    """
+    Test to ensure single-run load derivatives are close to finite differences of common random number runs
+
+    Returns:
+        None
+    """
+    estimates = {"truck_unload_duration": 0, "travel_to_unload": 0}
+    differences = {"truck_unload_duration": 0, "travel_to_unload": 0}
+    for seed in range(3):
+        config = {**base_config, "seed": seed, "common_random_numbers": True}
+        sim = lunar_Helium_3_sim(**config, estimate_gradients=True)
+        sim.run()
+        for name in estimates:
+            estimates[name] += sim.gradients["total_loads"][name]
+            differences[name] += (lunar_Helium_3_sim(**{**config, name: config[name] + 1}).run() -
+                                  lunar_Helium_3_sim(**{**config, name: config[name] - 1}).run()) / 2
+
+    for name in estimates:
+        assert estimates[name] < 0, f"Longer {name} should complete fewer loads."
+        assert estimates[name] == pytest.approx(differences[name], rel=0.25), \
+            f"The {name} estimate {estimates[name]} should be close to the finite difference {differences[name]}."
+
+def test_engines_agree() -> None:
+    """
+    Test to ensure every engine gives the same estimates, and none are kept unless asked for
+
+    Returns:
+        None
+    """
+    config = {**base_config, "sim_duration_hrs": 72, "seed": 4}
+    gradients = []
+    for engine in ("tick", "fleet", "event"):
+        sim = lunar_Helium_3_sim(**{**config, "engine": engine}, estimate_gradients=True)
+        sim.run()
+        gradients.append(sim.gradients)
+    for metric in ("total_loads", "mean_wait"):
+        for other in gradients[1:]:
+            assert other[metric] == pytest.approx(gradients[0][metric]), f"Engines should give the same {metric} estimates."
+
+    sim = lunar_Helium_3_sim(**config)
+    sim.run()
+    assert sim.gradients is None, "Estimates should only be kept when asked for."
+
+def test_distributed_parameters() -> None:
+    """
+    Test to ensure parameters replaced by per-cycle distributions get a derivative of 0
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**{**base_config, "sim_duration_hrs": 72, "seed": 4},
+                             travel_distribution=("uniform", 20, 40), mining_distribution=("uniform", 60, 300),
+                             estimate_gradients=True)
+    sim.run()
+
+    for name in ("travel_to_unload", "mining_duration_min_hrs", "mining_duration_max_hrs"):
+        assert sim.gradients["total_loads"][name] == 0 and sim.gradients["mean_wait"][name] == 0, \
+            f"{name} is not used by the run."
+    assert sim.gradients["total_loads"]["truck_unload_duration"] < 0, "Unloading durations are still used."
@@ -0,0 +1,67 @@
+from simulator import lunar_Helium_3_sim
+
+import pytest
+
+config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=24,
+              truck_unload_duration=5, travel_to_unload=30,
+              mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+def run_sim(engine : str, instrument : bool = True) -> lunar_Helium_3_sim:
+    """
+    Runs a seeded simulation with the input engine.
+
+    Returns:
+        lunar_Helium_3_sim: simulation after running.
+    """
+    sim = lunar_Helium_3_sim(**config, engine=engine, seed=4, instrument=instrument)
+    sim.run()
+    return sim
+
+@pytest.mark.parametrize("engine", ["tick", "event", "fleet"])
+def test_instrumentation_counts_calls(engine) -> None:
+    """
+    Test to ensure handler and station_manager calls are counted without changing the results
+
+    Returns:
+        None
+    """
+    sim = run_sim(engine)
+    summary = sim.instrumentation.summary()
+
+    assert sim.total_loads == run_sim(engine, instrument=False).total_loads, "Instrumentation should not change the results."
+    assert summary["calls"]["station_manager.release_station"]["count"] == sim.total_loads, \
+        "Every completed load should release a station once."
+    assert summary["calls"]["station_manager.hand_off"]["time_s"] > 0, "Call time should be recorded."
+    assert summary["queue_length_at_join"]["count"] > 0, "Queued trucks should be recorded."
+    assert summary["index_entries_skipped"] >= 0, "Station index lookups should be counted."
+
+def test_wasted_calls() -> None:
+    """
+    Test to ensure the tick engine wastes most state calls and the event engine almost none
+
+    Returns:
+        None
+    """
+    tick = run_sim("tick").instrumentation.summary()
+    fleet = run_sim("fleet").instrumentation.summary()
+    event = run_sim("event").instrumentation.summary()
+
+    assert tick["wasted_calls"]["mining_in_progress"] > 0, "Mining trucks should be called before they are done."
+    # a truck can be queued and handed a station in the same minute, which the fleet
+    # only sees as a whole step, so only the states that do not wait on a station match
+    for state in ("mining_in_progress", "travel_to_unload"):
+        assert tick["wasted_calls"][state] == fleet["wasted_calls"][state], "Both tick engines should waste the same calls."
+    assert event["wasted_fraction"] < tick["wasted_fraction"] / 2, "The event engine should waste fewer calls."
+
+def test_instrumentation_disabled() -> None:
+    """
+    Test to ensure nothing is wrapped when instrumentation is off
+
+    Returns:
+        None
+    """
+    sim = run_sim("tick", instrument=False)
+
+    assert sim.instrumentation is None, "No counters should be created."
+    assert "mining_in_progress" not in vars(sim.mining_trucks[0]), "Truck handlers should not be wrapped."
+    assert "hand_off" not in vars(sim.station_manager), "Station manager methods should not be wrapped."
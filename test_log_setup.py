@@ -0,0 +1,71 @@
+from log_setup import configure_logger
+
+import logging
+import pytest
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    """
+    Restores the default logging configuration after each test.
+    """
+    yield
+    logging.disable(logging.NOTSET)
+    for name in ("lunar_mining_truck", "station_manager", "simulator"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    logging.basicConfig(force=True, handlers=[logging.NullHandler()])
+
+def test_quiet_mode() -> None:
+    """
+    Test to ensure quiet mode disables info logging except for opened modules
+
+    Returns:
+        None
+    """
+    configure_logger("quiet", module_levels={"simulator": "INFO"}, log_file=False)
+
+    assert not logging.getLogger("lunar_mining_truck").isEnabledFor(logging.INFO), "Truck info logs should be disabled."
+    assert logging.getLogger("simulator").isEnabledFor(logging.INFO), "Simulator info logs should be enabled."
+    assert not logging.getLogger("simulator").isEnabledFor(logging.DEBUG), "Simulator debug logs should be disabled."
+
+def test_background_mode(capsys) -> None:
+    """
+    Test to ensure background mode writes records from a background thread
+
+    Returns:
+        None
+    """
+    listener = configure_logger("background", log_file=False)
+    assert listener is not None, "Background mode should return its listener."
+
+    logging.getLogger("simulator").info("background record")
+    listener.stop()
+
+    assert "background record" in capsys.readouterr().err, "Record should reach the console handler."
+
+def test_unknown_mode() -> None:
+    """
+    Test to ensure an unknown logging mode is rejected
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        configure_logger("verbose", log_file=False)
+    with pytest.raises(ValueError, match="WARN2"):
+        configure_logger("quiet", module_levels={"simulator": "WARN2"}, log_file=False)
+
+def test_quiet_log_file(tmp_path, monkeypatch) -> None:
+    """
+    Test to ensure quiet mode only creates the log file once a warning is logged
+
+    Returns:
+        None
+    """
+    monkeypatch.chdir(tmp_path)
+    configure_logger("quiet", console=False)
+
+    logging.getLogger("simulator").info("not logged")
+    assert list(tmp_path.iterdir()) == [], "No log file should be created while nothing is logged."
+    logging.getLogger("simulator").warning("logged")
+    log_files = list(tmp_path.iterdir())
+    assert len(log_files) == 1 and "logged" in log_files[0].read_text(), "A warning should create the log file."
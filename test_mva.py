@@ -0,0 +1,84 @@
+from mva import mva_estimator
+
+import pytest
+
+config = dict(sim_duration_hrs=72, truck_unload_duration=5, travel_to_unload=30,
+              mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+def mva_recursion(trucks : int, delay_time : float, station_time : float) -> float:
+    """
+    Returns the throughput of exact MVA for a delay stage and a single server station.
+
+    Returns:
+        float: Throughput per minute.
+    """
+    queue_length = throughput = 0.0
+    for n in range(1, trucks + 1):
+        residence = station_time * (1 + queue_length)
+        throughput = n / (delay_time + residence)
+        queue_length = throughput * residence
+    return throughput
+
+def test_single_truck_cycle() -> None:
+    """
+    Test to ensure one truck with a fixed mining duration gives the simulation's cycle time
+
+    Returns:
+        None
+    """
+    estimate = mva_estimator(1, 1, 10, 5, 30, 1, 1).solve()
+
+    # 60 minutes mining, 30 travel, 5 unloading and 4 one minute hand-offs
+    assert estimate["cycle_time"] == pytest.approx(99), "Cycle time should match the simulation's."
+    assert estimate["mean_wait"] == pytest.approx(1), "A single truck should only wait for the station check."
+
+@pytest.mark.parametrize("trucks", [1, 5, 20, 60])
+def test_matches_mva_recursion(trucks) -> None:
+    """
+    Test to ensure the product form solution matches the MVA recursion with one station
+
+    Returns:
+        None
+    """
+    estimator = mva_estimator(trucks, 1, **config)
+    throughput = estimator.solve()["throughput_per_hr"] / 60
+
+    assert throughput == pytest.approx(mva_recursion(trucks, estimator.delay_time, estimator.station_time)), \
+        "Throughput should match MVA."
+
+def test_large_fleets() -> None:
+    """
+    Test to ensure large fleets are solved and more stations never lower the throughput
+
+    Returns:
+        None
+    """
+    throughputs = [mva_estimator(100000, stations, **config).solve()["throughput_per_hr"]
+                   for stations in (100, 1000, 10000)]
+
+    assert throughputs == sorted(throughputs), "More stations should never lower the throughput."
+    assert throughputs[0] == pytest.approx(100 * 60 / 7), "A saturated station should serve one truck per unload."
+
+def test_compare_to_simulation() -> None:
+    """
+    Test to ensure the estimate is close to a simulation when the stations are rarely busy
+
+    Returns:
+        None
+    """
+    result = mva_estimator(20, 10, **config).compare_to_simulation(num_replications=5)
+
+    assert abs(result["gap"]["expected_loads"]) < 0.1, "Loads should be within 10% of the simulation."
+    assert set(result["simulated"]) == {"expected_loads", "station_utilization", "mean_wait"}
+
+def test_congested_wait() -> None:
+    """
+    Test to ensure the mean wait is close to a simulation when trucks queue, with the fixed unload time
+
+    Returns:
+        None
+    """
+    result = mva_estimator(40, 2, **config).compare_to_simulation(check_duration_hrs=500, num_replications=3)
+
+    assert result["estimate"]["station_utilization"] > 0.6, "The stations should be congested."
+    assert abs(result["gap"]["mean_wait"]) < 0.1, "Mean wait should be within 10% of the simulation."
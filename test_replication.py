@@ -0,0 +1,137 @@
+from replication import t_quantile, confidence_interval, run_adaptive, run_adaptive_sweep, run_paired, replication_state
+from run_statistics import running_stats
+from simulator import lunar_Helium_3_sim
+
+import time
+import pytest
+
+base_config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=24,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, engine="event")
+
+# every truck mines for exactly one hour, so every replication gives the same loads
+stable_config = {**base_config, "mining_duration_min_hrs": 1, "mining_duration_max_hrs": 1}
+
+@pytest.mark.parametrize("degrees_of_freedom, expected", [(1, 12.706), (2, 4.303), (5, 2.571), (10, 2.228), (30, 2.042)])
+def test_t_quantile(degrees_of_freedom, expected) -> None:
+    """
+    Test to ensure t quantiles match the 97.5% t table
+
+    Returns:
+        None
+    """
+    assert t_quantile(0.975, degrees_of_freedom) == pytest.approx(expected, abs=2e-3), "t quantile should match the table."
+
+@pytest.mark.parametrize("degrees_of_freedom, expected", [(3, 3.1824463), (4, 2.7764451), (5, 2.5705818),
+                                                       (10, 2.2281389), (30, 2.0422725)])
+def test_t_quantile_precision(degrees_of_freedom, expected) -> None:
+    """
+    Test to ensure t quantiles are exact to 7 digits at few degrees of freedom
+
+    Returns:
+        None
+    """
+    assert t_quantile(0.975, degrees_of_freedom) == pytest.approx(expected, abs=1e-7), "t quantile should be exact."
+    assert t_quantile(0.025, degrees_of_freedom) == pytest.approx(-expected, abs=1e-7), "t quantiles should be symmetric."
+
+def test_confidence_interval() -> None:
+    """
+    Test to ensure the confidence interval uses the t quantile and the standard error
+
+    Returns:
+        None
+    """
+    stats = running_stats()
+    for value in [10, 12, 14]:
+        stats.add(value)
+    mean, half_width = confidence_interval(stats)
+
+    assert mean == 12, "Mean should be the sample mean."
+    assert half_width == pytest.approx(4.303 * 2 / 3 ** 0.5, rel=1e-3), "Half width should be t * s / sqrt(n)."
+
+def test_adaptive_sweep_allocates_replications() -> None:
+    """
+    Test to ensure stable configurations stop at min_replications and noisy ones get more
+
+    Returns:
+        None
+    """
+    results = run_adaptive_sweep([stable_config, base_config], relative_precision=0.03,
+                                 min_replications=4, max_replications=200, master_seed=1, processes=2)
+    stable, noisy = results
+
+    assert stable["replications"] == 4, "A configuration with no variance should stop at min_replications."
+    assert stable["half_width"] == 0 and stable["target_met"], "A configuration with no variance meets any target."
+    assert noisy["replications"] > 4, "A noisy configuration should get more replications."
+    assert noisy["target_met"], "The noisy configuration should meet its target."
+    assert noisy["half_width"] <= 0.03 * noisy["mean"], "The interval should be as tight as asked."
+    assert noisy["ci_low"] < noisy["mean"] < noisy["ci_high"], "The interval should contain the estimate."
+
+def test_adaptive_stops_outstanding_replications(monkeypatch) -> None:
+    """
+    Test to ensure replications still running when the target is met are stopped and not used
+
+    Returns:
+        None
+    """
+    # the target is met at exactly the third completed replication
+    monkeypatch.setattr(replication_state, "precision_ratio",
+                        lambda self, *args: 0.0 if self.total_loads.count >= 3 else 10.0)
+    result = run_adaptive({**base_config, "sim_duration_hrs": 240}, relative_precision=0.05,
+                          min_replications=2, max_replications=100, processes=4)
+
+    assert result["target_met"], "The target should be met."
+    assert result["replications"] == 3, "Only the replications up to the target should be used."
+    assert result["launched"] > result["replications"], "Replications should have been running when the target was met."
+
+def test_adaptive_time_budget() -> None:
+    """
+    Test to ensure a wall time budget stops the outstanding replications
+
+    Returns:
+        None
+    """
+    start = time.perf_counter()
+    result = run_adaptive({**base_config, "sim_duration_hrs": 720}, half_width=0.001,
+                          time_budget_s=1, min_replications=2, processes=2)
+
+    assert time.perf_counter() - start < 10, "The run should stop soon after the budget."
+    assert not result["target_met"], "The target should not be met in the budget."
+    assert run_adaptive(base_config, half_width=1, time_budget_s=0, processes=2)["replications"] == 0, \
+        "No replication should start once the budget is used up."
+
+    with pytest.raises(ValueError):
+        run_adaptive(base_config)
+
+def test_common_random_numbers() -> None:
+    """
+    Test to ensure each truck's mining duration only depends on the seed and the truck ID
+
+    Returns:
+        None
+    """
+    small = lunar_Helium_3_sim(**{**base_config, "engine": "tick"}, seed=3, common_random_numbers=True)
+    small.setup()
+    large = lunar_Helium_3_sim(**{**base_config, "num_mining_trucks": 20, "num_unload_stations": 3, "engine": "fleet"},
+                               seed=3, common_random_numbers=True)
+    large.setup()
+
+    assert [truck.mining_duration for truck in small.mining_trucks] == \
+        [truck.mining_duration for truck in large.mining_trucks][:10], "Shared trucks should get the same durations."
+
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**base_config, common_random_numbers=True)
+
+def test_paired_comparison() -> None:
+    """
+    Test to ensure the paired interval is narrower than the unpaired one
+
+    Returns:
+        None
+    """
+    result = run_paired(base_config, {**base_config, "num_mining_trucks": 12}, num_replications=10,
+                        master_seed=1, processes=2)
+
+    assert result["ci_low"] > 0, "Two more trucks should complete more loads."
+    assert result["half_width"] < result["unpaired_half_width"], "Pairing should narrow the interval."
+    assert result["variance_reduction"] > 1, "Pairing should reduce the variance."
@@ -0,0 +1,125 @@
+from result_cache import result_cache, cache_key
+from sweep import run_sweep
+
+import multiprocessing
+import pytest
+
+base_config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=24,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, engine="event")
+
+def test_cache_key() -> None:
+    """
+    Test to ensure the cache key only depends on the parameter values, seed and engine version
+
+    Returns:
+        None
+    """
+    reordered = dict(reversed(list(base_config.items())))
+
+    assert cache_key(base_config, 1) == cache_key(reordered, 1), "Parameter order should not matter."
+    assert cache_key(base_config, 1) == cache_key({**base_config, "travel_to_unload": 30.0}, 1), \
+        "The same number as int or float should give the same key."
+    assert cache_key(base_config, 1) != cache_key(base_config, 2), "The seed should be part of the key."
+    assert cache_key(base_config, 1) != cache_key({**base_config, "num_unload_stations": 3}, 1), \
+        "Every parameter should be part of the key."
+    assert cache_key(base_config, 1) != cache_key(base_config, 1, engine_version="0"), \
+        "The engine version should be part of the key."
+    default_engine = {name: value for name, value in base_config.items() if name != "engine"}
+    assert cache_key(default_engine, 1) == cache_key({**default_engine, "engine": "tick", "collect_statistics": False}, 1), \
+        "Parameters given at their default should give the same key."
+    assert cache_key(base_config, 1) == cache_key({**base_config, "instrument": True, "trace_path": "trace"}, 1), \
+        "Parameters that only observe the run should not be part of the key."
+    assert cache_key({**base_config, "mining_distribution": ("uniform", 60, 300)}, 1) == \
+        cache_key({**base_config, "mining_distribution": ["uniform", 60.0, 300.0]}, 1), \
+        "Numbers inside a distribution spec should be canonical too."
+
+def test_batched_writes(tmp_path) -> None:
+    """
+    Test to ensure results are written in batches and read back from the file
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / "results.sqlite")
+    with result_cache(path, batch_size=3) as cache:
+        cache.put(base_config, 1, {"total_loads": 1})
+        cache.put(base_config, 2, {"total_loads": 2})
+        assert cache.get(base_config, 1) == {"total_loads": 1}, "Pending results should be readable."
+        with result_cache(path) as other:
+            assert other.get(base_config, 1) is None, "Results should not be written before the batch is full."
+
+        cache.put(base_config, 3, {"total_loads": 3})
+        with result_cache(path) as other:
+            assert other.get(base_config, 1) == {"total_loads": 1}, "A full batch should be written."
+        cache.put(base_config, None, {"total_loads": 4})
+        assert cache.get(base_config, None) is None, "Runs without a seed should not be cached."
+
+    with result_cache(path) as cache:
+        assert cache.size()[0] == 3, "Every seeded result should be stored after closing."
+
+def test_eviction(tmp_path) -> None:
+    """
+    Test to ensure the least recently used results are evicted over the size limit
+
+    Returns:
+        None
+    """
+    result = {"truck_loads": list(range(100))}
+    with result_cache(str(tmp_path / "results.sqlite"), batch_size=1) as cache:
+        cache.put(base_config, 0, result)
+        cache.put(base_config, 1, result)
+        max_bytes = cache.size()[1]
+        cache.max_bytes = max_bytes
+
+        cache.get(base_config, 0)
+        cache.put(base_config, 2, result)
+
+        assert cache.size()[1] <= max_bytes, "Stored results should fit in max_bytes."
+        assert cache.get(base_config, 1) is None, "The least recently used result should be evicted."
+        assert cache.get(base_config, 0) == result, "A recently read result should be kept."
+        assert cache.get(base_config, 2) == result, "The new result should be kept."
+
+def write_results(task : tuple) -> None:
+    """
+    Writes results to a shared cache file from a worker process.
+    """
+    path, worker = task
+    with result_cache(path, batch_size=7) as cache:
+        for seed in range(50):
+            cache.put(base_config, worker * 1000 + seed, {"total_loads": seed})
+            cache.get(base_config, seed)
+
+def test_concurrent_writers(tmp_path) -> None:
+    """
+    Test to ensure processes can write to the same cache file at the same time
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / "results.sqlite")
+    with multiprocessing.Pool(4) as pool:
+        pool.map(write_results, [(path, worker) for worker in range(4)])
+
+    with result_cache(path) as cache:
+        assert cache.size()[0] == 200, "Every result of every worker should be stored."
+        assert cache.get(base_config, 3049) == {"total_loads": 49}
+
+def test_sweep_uses_cache(tmp_path) -> None:
+    """
+    Test to ensure a repeated sweep returns the cached runs and only simulates new ones
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / "results.sqlite")
+    config = {**base_config, "collect_statistics": True}
+    first = list(run_sweep([config], num_replications=2, master_seed=1, processes=1, cache_path=path))
+    assert all("statistics" in row for row in first), "Collected statistics should be in the rows."
+
+    second = list(run_sweep([config], num_replications=3, master_seed=1, processes=1, cache_path=path))
+    cached = sorted(second, key=lambda row: row["replication"])[:2]
+
+    assert sorted(first, key=lambda row: row["replication"]) == cached, "Cached runs should be returned unchanged."
+    with result_cache(path) as cache:
+        assert cache.size()[0] == 3, "Only the new run should be added."
@@ -0,0 +1,127 @@
+from road_network import road_network, shortest_travel_times
+from station_manager import station_manager, expected_wait_policy
+from simulator import lunar_Helium_3_sim
+from snapshot import dumps_snapshot, loads_snapshot
+from stations import unload_stations as m_unload_station
+
+import random
+import numpy as np
+import pytest
+
+roads = {"dig_sites": ["north", "south", "east"],
+         "stations": ["plant_a", "plant_b", "plant_c"],
+         "segments": [["north", "j1", 10, 4], ["south", "j1", 15, 4], ["east", "j2", 8, 3], ["j1", "j2", 6, 5],
+                      ["j1", "plant_a", 12, 6], ["j2", "plant_b", 10, 6], ["j2", "plant_c", 20, 6],
+                      ["plant_a", "plant_c", 9, 2]]}
+
+config = dict(num_mining_trucks=40, num_unload_stations=3, sim_duration_hrs=72, truck_unload_duration=5,
+              travel_to_unload=30, mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=3,
+              dispatch_policy="expected_wait")
+
+def create_policy(num_stations : int) -> expected_wait_policy:
+    """
+    Generates an expected_wait_policy attached to idle stations.
+
+    Returns:
+        expected_wait_policy: Policy committing trucks on departure.
+    """
+    policy = expected_wait_policy(service=7, assign_on_departure=True)
+    station_manager([m_unload_station(station_ID=i) for i in range(num_stations)], policy)
+    return policy
+
+def test_travel_times() -> None:
+    """
+    Test to ensure travel times are the shortest routes and are computed once per network layout
+
+    Returns:
+        None
+    """
+    network = road_network(**roads)
+
+    assert network.travel_times.tolist() == [[22, 26, 31], [27, 31, 36], [26, 18, 28]], \
+        "Travel times should follow the shortest routes."
+    assert [network.segment_time(index) for index in network.route(0, 2)] == [10, 12, 9], \
+        "North should reach plant C through plant A."
+    assert road_network(**roads)._distances is network._distances, "The same layout should reuse the cached travel times."
+
+def test_congestion_updates() -> None:
+    """
+    Test to ensure congestion slows shared segments down and incremental updates match a full recomputation
+
+    Returns:
+        None
+    """
+    network = road_network(**roads, congestion=True, alpha=1, beta=1)
+    policy = create_policy(3)
+    for truck_ID in (0, 3, 6, 9):
+        network.dispatch(truck_ID, 0, policy)
+    assert network.travel_times[0, 0] > 22, "Trucks on the road should slow the next one down."
+
+    assert network.dispatch(0, 200, policy) == 22, "Arrived trucks should leave the road."
+
+    generator = random.Random(1)
+    for time in range(200, 800, 2):
+        network.dispatch(generator.randrange(40), time, policy)
+        full = shortest_travel_times(len(network._node), [(start, end, travel_time) for (start, end), travel_time
+                                                          in zip(network._ends, network._time)])
+        assert np.allclose(full, network._distances), f"Travel times should match a full recomputation at {time}."
+
+def test_routed_runs_agree() -> None:
+    """
+    Test to ensure every engine routes trucks the same way and snapshots continue the trucks on the road
+
+    Returns:
+        None
+    """
+    for congestion in (False, True):
+        network = {**roads, "congestion": congestion, "alpha": 0.5, "beta": 2}
+        loads = [lunar_Helium_3_sim(**config, road_network=network, engine=engine).run()
+                 for engine in ("tick", "fleet", "event")]
+        assert len(set(loads)) == 1, f"Engines should agree: {loads}"
+
+        sim = lunar_Helium_3_sim(**config, road_network=network, engine="event")
+        sim.setup()
+        sim.advance(30 * 60 + 7)
+        snapshot = loads_snapshot(dumps_snapshot(sim.snapshot()))
+        assert lunar_Helium_3_sim.from_snapshot(snapshot).run() == loads[0], "Continuation should match the full run."
+
+def test_trucks_queue_at_their_station() -> None:
+    """
+    Test to ensure a released station is not handed to a truck queued at another station
+
+    Returns:
+        None
+    """
+    stations = [m_unload_station(station_ID=i) for i in range(2)]
+    network = road_network(["site"], ["plant_a", "plant_b"], [["site", "plant_a", 5, 2], ["site", "plant_b", 5, 2]])
+    s_m = station_manager(stations, expected_wait_policy(7, True), network)
+    handed = []
+    s_m.on_handoff = lambda truck_ID, station_ID, time: handed.append(truck_ID)
+
+    for station in stations:
+        station.assign_truck(0)
+    stations[0].queue_truck(1)
+    stations[0].queue_truck(2)
+    s_m.release_station(1, 3)
+
+    assert handed == [], "A station should only serve its own queue."
+    assert stations[1].is_available and list(stations[0].truck_queue) == [1, 2], \
+        "Trucks should stay queued at their station."
+
+def test_invalid_road_network() -> None:
+    """
+    Test to ensure unreachable stations and networks that do not fit the simulation are rejected
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        road_network(["site"], ["plant_a", "plant_b"], [["site", "plant_a", 5, 2]])
+    with pytest.raises(ValueError):
+        road_network(["site"], ["plant_a"], [["site", "plant_a", 0, 2]])
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**{**config, "num_unload_stations": 2}, road_network=roads)
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**{**config, "dispatch_policy": "shortest_queue"}, road_network=roads)
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**config, road_network=roads, travel_distribution=("constant", 30))
@@ -0,0 +1,100 @@
+from run_sim import main, stack_sampler, memory_run
+
+import json
+import logging
+import pstats
+import pytest
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    """
+    Restores the default logging configuration after each test.
+    """
+    yield
+    logging.disable(logging.NOTSET)
+    logging.basicConfig(force=True, handlers=[logging.NullHandler()])
+
+config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=24, truck_unload_duration=5,
+              travel_to_unload=30, mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=1)
+
+def test_main_profiles_a_run(tmp_path) -> None:
+    """
+    Test to ensure the command line times repeated runs and writes the CPU profile, folded stacks and memory report
+
+    Returns:
+        None
+    """
+    prefix = str(tmp_path / "profile")
+    output = tmp_path / "summary.json"
+    assert main(["--trucks", "20", "--hours", "240", "--engine", "event", "--seed", "3", "--repeat", "2",
+                 "--profile", prefix, "--memory", "--top", "5", "--no-log-file", "--output", str(output)]) == 0
+
+    with open(output) as summary_file:
+        summary = json.load(summary_file)
+    runs = summary["timing"]["runs"]
+    assert len(runs) == 2 and runs[0]["total_loads"] == runs[1]["total_loads"], "Seeded runs should repeat."
+    assert summary["timing"]["sim_minutes_per_s"] == pytest.approx(240 * 60 / summary["timing"]["best_wall_time_s"])
+
+    stats = pstats.Stats(summary["profile"]["pstats"])
+    assert any(name == "advance" for filename, line, name in stats.stats), "The profile should hold the engine."
+    with open(summary["profile"]["folded"]) as folded_file:
+        lines = folded_file.read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines), "Every line should end with a count."
+    assert any("simulator.py:run" in line for line in lines), "Stacks should reach the simulation."
+
+    memory = summary["memory"]
+    assert memory["peak_memory_bytes"] >= memory["final_memory_bytes"] > 0
+    assert 0 < len(memory["top_allocations"]) <= 5
+
+def test_main_prints_statistics_and_gradients(tmp_path, capsys) -> None:
+    """
+    Test to ensure the statistics and derivative estimates reach stdout and the JSON summary in quiet mode
+
+    Returns:
+        None
+    """
+    output = tmp_path / "summary.json"
+    assert main(["--trucks", "10", "--hours", "48", "--engine", "event", "--seed", "1", "--statistics", "--gradients",
+                 "--log", "quiet", "--no-log-file", "--output", str(output)]) == 0
+    printed = capsys.readouterr().out
+
+    assert "Waiting time: mean" in printed and "Station busy fractions" in printed, "Statistics should be printed."
+    assert "d total_loads:" in printed and "d mean_wait:" in printed, "Derivative estimates should be printed."
+    with open(output) as summary_file:
+        timing = json.load(summary_file)["timing"]
+    assert timing["statistics"]["waiting_time"]["count"] > 0, "The summary should hold the statistics."
+    assert timing["gradients"]["total_loads"]["travel_to_unload"] < 0, "The summary should hold the derivative estimates."
+
+def test_stack_sampler() -> None:
+    """
+    Test to ensure the sampler folds the stacks of the thread that started it
+
+    Returns:
+        None
+    """
+    def busy_inner():
+        return sum(n * n for n in range(200000))
+
+    def busy_outer():
+        for n in range(20):
+            busy_inner()
+
+    sampler = stack_sampler(interval=0.001)
+    sampler.start()
+    busy_outer()
+    sampler.stop()
+
+    assert sampler.samples, "The busy thread should be sampled."
+    assert any("busy_outer;test_run_sim.py:busy_inner" in line for line in sampler.folded()), \
+        "Callers should come before their callees."
+
+def test_memory_run_groups_by_call_path() -> None:
+    """
+    Test to ensure allocation sites can be grouped by several frames
+
+    Returns:
+        None
+    """
+    memory = memory_run(config, top=3, frames=3)
+    assert all(site["site"].count(" <- ") <= 2 for site in memory["top_allocations"])
+    assert any(" <- " in site["site"] for site in memory["top_allocations"]), "Sites should hold their callers."
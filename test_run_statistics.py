@@ -0,0 +1,95 @@
+from simulator import lunar_Helium_3_sim
+from run_statistics import running_stats, p2_quantile, time_weighted_value
+
+import random
+import statistics
+import pytest
+
+def test_running_stats() -> None:
+    """
+    Test to ensure the running mean and variance match the batch values
+
+    Returns:
+        None
+    """
+    values = [random.Random(1).uniform(0, 100) for n in range(10)] + [3, 5, 8, 13]
+    stats = running_stats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.mean == pytest.approx(statistics.mean(values)), "Mean should match."
+    assert stats.variance() == pytest.approx(statistics.variance(values)), "Variance should match."
+    assert (stats.min, stats.max) == (min(values), max(values)), "Min and max should match."
+
+def test_p2_quantile() -> None:
+    """
+    Test to ensure the P-square estimate is close to the exact quantile
+
+    Returns:
+        None
+    """
+    rng = random.Random(2)
+    values = [rng.expovariate(1 / 10) for n in range(20000)]
+    estimate = p2_quantile(0.9)
+    for value in values:
+        estimate.add(value)
+
+    exact = statistics.quantiles(values, n=10)[-1]
+    assert estimate.value() == pytest.approx(exact, rel=0.05), "P90 estimate should be within 5% of the exact value."
+
+def test_time_weighted_value() -> None:
+    """
+    Test to ensure the time-weighted mean and max of a queue length
+
+    Returns:
+        None
+    """
+    queue_length = time_weighted_value()
+    queue_length.set(2, 10)
+    queue_length.set(1, 15)
+
+    # 0 for 10 minutes, 2 for 5 minutes, 1 for 5 minutes
+    assert queue_length.mean(20) == pytest.approx(15 / 20), "Time-weighted mean should be 0.75."
+    assert queue_length.max == 2, "Max queue length should be 2."
+
+@pytest.mark.parametrize("engine", ["tick", "event", "fleet"])
+def test_sim_statistics(engine) -> None:
+    """
+    Test to ensure the collected statistics are consistent with the run
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(10, 2, 72, 5, 30, 1, 5, engine=engine, seed=3, collect_statistics=True)
+    sim.run()
+    summary = sim.statistics.summary()
+
+    for state_time in summary["trucks"]:
+        assert sum(state_time.values()) == pytest.approx(72 * 60), "Every truck should account for the full run."
+    assert summary["waiting_time"]["count"] >= sim.total_loads, "Every load should have waited to unload."
+    for station, station_summary in zip(sim.unloading_stations, summary["stations"]):
+        assert 0 <= station_summary["busy_fraction"] <= 1, "Busy fraction should be between 0 and 1."
+        assert station_summary["max_queue_length"] >= station_summary["mean_queue_length"]
+
+def test_reset() -> None:
+    """
+    Test to ensure the statistics only cover the time after a reset
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(num_mining_trucks=10, num_unload_stations=1, sim_duration_hrs=48,
+                             truck_unload_duration=5, travel_to_unload=30,
+                             mining_duration_min_hrs=1, mining_duration_max_hrs=5,
+                             seed=4, collect_statistics=True)
+    sim.setup()
+    sim.advance(24 * 60)
+    sim.statistics.reset(24 * 60)
+    sim.advance(sim.sim_duration)
+    sim.finish()
+    summary = sim.statistics.summary()
+
+    assert summary["start_time"] == 24 * 60, "Statistics should start at the reset."
+    for state_time in summary["trucks"]:
+        assert sum(state_time.values()) == pytest.approx(24 * 60), "Only the time after the reset should be counted."
+    assert 0 < summary["waiting_time"]["count"] < sim.total_loads, "Waits before the reset should be dropped."
@@ -0,0 +1,104 @@
+from simulator import lunar_Helium_3_sim, substream_seed
+from sharding import sharded_sim, remove_trucks, run_sharded
+
+import pytest
+
+site = dict(num_mining_trucks=20, num_unload_stations=2, truck_unload_duration=5, travel_to_unload=30,
+            mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+sites = [site, {**site, "num_unload_stations": 4}, {**site, "num_mining_trucks": 5, "engine": "tick"}]
+transfers = [(600, 0, 2, 5), (1200, 1, 2, 3), (3000, 2, 0, 4)]
+
+def test_sites_without_transfers_match_single_runs() -> None:
+    """
+    Test to ensure sites that never exchange trucks give the same loads as separate simulations
+
+    Returns:
+        None
+    """
+    report = run_sharded(sites, sim_duration_hrs=72, seed=3)
+    for site_ID, site_config in enumerate(sites):
+        sim = lunar_Helium_3_sim(**{"engine": "event", **site_config}, sim_duration_hrs=72,
+                                 seed=substream_seed(3, "site", site_ID))
+        assert report["sites"][site_ID]["total_loads"] == sim.run(), "Each site should run like its own simulation."
+    assert report["total_loads"] == sum(site["total_loads"] for site in report["sites"]), \
+        "Total loads should be merged from every site."
+
+def test_transfers_are_deterministic() -> None:
+    """
+    Test to ensure transfers move trucks between sites the same way with and without processes
+
+    Returns:
+        None
+    """
+    parallel = sharded_sim(sites, 100, transfer_time=90, window=45, transfers=transfers, seed=1).run()
+    serial = sharded_sim(sites, 100, transfer_time=90, window=45, transfers=transfers, seed=1, processes=False).run()
+
+    for report in (parallel, serial):
+        del report["wall_time_s"]
+    assert parallel == serial, "Processes should not change the run."
+
+    moved = sum(transfer["trucks"] for transfer in parallel["transfers"])
+    assert moved == 12, "Every scheduled truck should be transferred."
+    assert all(transfer["arrival"] - transfer["departure"] == 90 for transfer in parallel["transfers"])
+    assert sum(site["num_mining_trucks"] for site in parallel["sites"]) == 45, "No truck should be lost."
+    assert [site["departures"] for site in parallel["sites"]] == [5, 3, 4]
+    assert [site["arrivals"] for site in parallel["sites"]] == [4, 0, 8]
+
+def test_policy_transfers() -> None:
+    """
+    Test to ensure a policy can move trucks from the site with the most waiting trucks
+
+    Returns:
+        None
+    """
+    calls = []
+    chosen = []
+
+    def policy(time, statuses):
+        calls.append(time)
+        busiest = max(statuses, key=lambda status: status["waiting"])
+        if time == 600 and busiest["waiting"]:
+            chosen.append(busiest["site"])
+            return [(busiest["site"], 1 - busiest["site"] if busiest["site"] < 2 else 0, 1)]
+        return []
+
+    report = sharded_sim([{**site, "num_mining_trucks": 40}, site], 24, transfer_time=60,
+                         policy=policy, seed=2, processes=False).run()
+
+    assert calls == list(range(60, 24 * 60, 60)), "The policy should be called at every window start after the first."
+    assert len(report["transfers"]) == 1 and [report["transfers"][0]["from_site"]] == chosen, \
+        "The site with the most waiting trucks should give one."
+
+def test_remove_trucks() -> None:
+    """
+    Test to ensure removed trucks are dropped from a snapshot and the others renumbered
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**site, sim_duration_hrs=24, seed=5, common_random_numbers=True)
+    sim.setup()
+    sim.advance(300)
+    snapshot = sim.snapshot()
+    snapshot["stations"]["truck_queue"][0] = [3, 7, 12]
+
+    smaller = remove_trucks(snapshot, [7, 2])
+    assert smaller["config"]["num_mining_trucks"] == 18
+    assert smaller["trucks"]["mining_duration"] == [duration for truck_ID, duration in
+                                                    enumerate(snapshot["trucks"]["mining_duration"])
+                                                    if truck_ID not in (2, 7)]
+    assert smaller["stations"]["truck_queue"][0] == [2, 10], "Queues should drop removed trucks and renumber the rest."
+    assert [index for name, index, *state in smaller["streams"]] == list(range(18)), \
+        "Random substreams should follow their truck."
+
+def test_window_longer_than_transfer() -> None:
+    """
+    Test to ensure windows longer than the transfer time are rejected
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError):
+        sharded_sim(sites, 24, transfer_time=30, window=60)
+    with pytest.raises(ValueError):
+        sharded_sim(sites, 24, transfers=[(0, 0, 0, 1)])
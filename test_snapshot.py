@@ -0,0 +1,85 @@
+from simulator import lunar_Helium_3_sim
+from snapshot import dumps_snapshot, loads_snapshot, run_forks
+
+import pytest
+
+config = dict(num_mining_trucks=20, num_unload_stations=2, sim_duration_hrs=72,
+              truck_unload_duration=5, travel_to_unload=30,
+              mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+
+def counts(sim : lunar_Helium_3_sim) -> tuple:
+    """
+    Returns the total, per truck and per station counts of a simulation.
+
+    Returns:
+        tuple: total loads, truck loads and station served counts.
+    """
+    return (sim.total_loads,
+            [truck.get_completed_load_count() for truck in sim.mining_trucks],
+            [station.get_total_trucks_served() for station in sim.unloading_stations])
+
+@pytest.mark.parametrize("engine, snapshot_engine", [("tick", "tick"), ("event", "event"), ("fleet", "fleet"),
+                                                     ("tick", "event"), ("event", "fleet")])
+def test_snapshot_continuation_matches_full_run(engine, snapshot_engine) -> None:
+    """
+    Test to ensure a run restored from a snapshot ends like a run that never stopped
+
+    Returns:
+        None
+    """
+    full_sim = lunar_Helium_3_sim(**config, engine=engine, seed=7)
+    full_sim.run()
+
+    sim = lunar_Helium_3_sim(**config, engine=snapshot_engine, seed=7)
+    sim.setup()
+    sim.advance(48 * 60 + 17)
+    restored_sim = lunar_Helium_3_sim.from_snapshot(loads_snapshot(dumps_snapshot(sim.snapshot())), engine=engine)
+    restored_sim.run()
+
+    assert counts(restored_sim) == counts(full_sim), "Restored run should match the full run."
+
+def test_fork_changes_parameters() -> None:
+    """
+    Test to ensure forks run with their changed parameters and leave the original unchanged
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**config, engine="event", seed=3)
+    sim.setup()
+    sim.advance(48 * 60)
+
+    fork = sim.fork(num_unload_stations=3, num_mining_trucks=25)
+    fork.run()
+    assert len(fork.unloading_stations) == 3, "The fork should have the added station."
+    assert fork.unloading_stations[2].get_total_trucks_served() > 0, "The added station should serve trucks."
+    assert len(fork.mining_trucks) == 25, "The fork should have the added trucks."
+
+    sim.advance(sim.sim_duration)
+    assert len(sim.unloading_stations) == 2, "The original simulation should be unchanged."
+    assert fork.total_loads > sim.finish(), "More stations and trucks should complete more loads."
+
+    with pytest.raises(ValueError):
+        sim.fork(num_unload_stations=1)
+    with pytest.raises(ValueError):
+        sim.fork(mining_duration_min_hrs=2)
+
+def test_run_forks() -> None:
+    """
+    Test to ensure forks of one snapshot run on worker processes
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**config, engine="event", seed=5)
+    sim.setup()
+    sim.advance(24 * 60)
+    snapshot = sim.snapshot()
+
+    variants = [{}, {"travel_to_unload": 10}, {"truck_unload_duration": 1}]
+    rows = sorted(run_forks(snapshot, variants, processes=2), key=lambda row: row["variant_index"])
+
+    assert len(rows) == 3, "There should be one row per variant."
+    assert rows[0]["total_loads"] == lunar_Helium_3_sim(**config, engine="event", seed=5).run(), \
+        "The unchanged fork should match the full run."
+    assert rows[1]["total_loads"] > rows[0]["total_loads"], "Shorter travel should complete more loads."
@@ -74,12 +74,19 @@ def test_state_transition() -> None:
     assert truck_1.state == truck_1.wait_to_unload, "Truck 1 next state should be wait_to_unload"
     assert truck_1.ID in stations[0].truck_queue, "Station 0 should have Truck_1 ID in queue"
 
-    # trigger next state conditions
-    stations[1].is_available = True
+    # a queued truck waits for the station manager instead of checking again
     truck_1.wait_to_unload()
+    assert truck_1.state == truck_1.wait_to_unload, "Truck 1 should stay queued"
+
+    # trigger next state conditions, a released station is handed to the queued truck
+    s_m.on_handoff = lambda truck_ID, station_ID, time: truck_1.start_unloading(station_ID, time)
+    s_m.release_station(1, 30)
     assert truck_1.state == truck_1.unloading, "Truck 1 next state should be unloading"
+    assert truck_1.assigned_station == 1, "Truck 1 should unload at the released station"
+    assert not truck_1.ID in stations[0].truck_queue, "Truck 1 should leave the queue"
 
     # check that the state doesn't change if time unloading is under set unload time
+    truck_1.update_current_time(31)
     truck_1.time_elapsed_unloading = 3
     truck_1.unloading()
     assert truck_1.state == truck_1.unloading, "Truck 1 next state should be unloading"
@@ -1,5 +1,6 @@
 import pytest
-from station_manager import station_manager
+from station_manager import station_manager, expected_wait_policy
+from simulator import lunar_Helium_3_sim
 from lunar_mining_truck import mining_truck
 from stations import unload_stations as m_unload_station
 
@@ -124,3 +125,209 @@ def test_release_station() -> None:
 
     # Ensure station's trucks served counter works
     assert station.get_total_trucks_served() == 1, "Station should only have 1 served truck in counter."
+
+def test_queue_least_loaded_station() -> None:
+    """
+    Test to ensure trucks are queued at the lowest station ID with the shortest queue
+
+    Returns:
+        None
+    """
+    # Create 3 busy stations
+    stations = create_stations(3)
+    s_m = station_manager(stations)
+    for station in stations:
+        station.is_available = False
+
+    # Queue 7 trucks, they should fill the queues evenly
+    queued_at = [s_m.queue_truck(truck_id).ID for truck_id in range(1, 8)]
+    assert queued_at == [0, 1, 2, 0, 1, 2, 0], "Trucks should be queued at the station with the least queue."
+    assert s_m.truck_station[4] == 0, "Truck 4 should be mapped to station 0."
+
+    # Dequeue from station 1, it should take the next truck
+    stations[1].is_available = True
+    truck_in_queue, station = s_m.manage_queue()
+    assert (truck_in_queue, station.ID) == (2, 1), "Station 1 should serve truck 2."
+    assert 2 not in s_m.truck_station, "Truck 2 should no longer be mapped to a station."
+    assert s_m.queue_truck(8).ID == 1, "Station 1 should now have the least queue."
+
+def test_available_station_index() -> None:
+    """
+    Test to ensure availability changes made on the stations are seen by the manager
+
+    Returns:
+        None
+    """
+    stations = create_stations(3)
+    s_m = station_manager(stations)
+
+    stations[0].assign_truck(1)
+    assert s_m.get_available_station() is stations[1], "Station 1 should be the first available station."
+
+    stations[1].is_available = False
+    stations[2].is_available = False
+    assert s_m.get_available_station() is None, "No station should be available."
+    assert s_m.free_stations == set(), "No station should be free."
+
+    s_m.release_station(0)
+    assert s_m.get_available_station() is stations[0], "Station 0 should be available after release."
+
+def test_expected_wait_policy() -> None:
+    """
+    Test to ensure the expected wait policy sends trucks to the station that frees up first,
+    counting the trucks already on the way
+
+    Returns:
+        None
+    """
+    stations = create_stations(2)
+    policy = expected_wait_policy(service=10, assign_on_departure=True)
+    s_m = station_manager(stations, policy)
+
+    # two trucks on the way take one station each
+    s_m.truck_departing(1, 0, 30)
+    s_m.truck_departing(2, 2, 30)
+    assert [policy.reservations[1][0], policy.reservations[2][0]] == [0, 1]
+    assert policy.free_at == [40, 42]
+
+    # a third truck waits less behind the first
+    s_m.truck_departing(3, 5, 30)
+    assert policy.reservations[3] == (0, 40) and policy.free_at == [50, 42]
+
+    # truck 1 starts late, which delays the station
+    assert s_m.get_available_station(1, 33) is stations[0]
+    assert policy.free_at[0] == 50 and policy.reservations.get(1), "A lookup should not change the estimate."
+    s_m.assign_station(0, 1, 33)
+    assert policy.free_at[0] == 53, "A late start should move the estimate."
+    assert s_m.get_available_station(3, 36) is None, "A truck should wait for its own station."
+    assert s_m.queue_truck(3, 36) is stations[0]
+
+    # released early with truck 3 queued, truck 3 starts now
+    s_m.release_station(0, 40)
+    truck_in_queue, station = s_m.manage_queue(40)
+    assert (truck_in_queue, station) == (3, stations[0])
+    assert policy.free_at[0] == 53 and not policy.reservations.get(3)
+
+    # without committed trucks a released station is free from the release
+    s_m.release_station(0, 45)
+    assert policy.free_at[0] == 45
+
+def test_expected_wait_dispatch_shortens_longest_wait() -> None:
+    """
+    Test to ensure the expected wait policy completes as many loads and shortens the longest wait
+
+    Returns:
+        None
+    """
+    config = dict(num_mining_trucks=40, num_unload_stations=3, sim_duration_hrs=72, truck_unload_duration=5,
+                  travel_to_unload=30, mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=4,
+                  engine="event", collect_statistics=True)
+    shortest_queue = lunar_Helium_3_sim(**config)
+    expected_wait = lunar_Helium_3_sim(**config, dispatch_policy="expected_wait", assign_on_departure=True)
+
+    # released stations are handed to queued trucks, so both policies keep every station busy
+    assert expected_wait.run() >= shortest_queue.run(), "Expected wait dispatch should not lose loads."
+    waiting = [sim.statistics.summary()["waiting_time"]["max"] for sim in (shortest_queue, expected_wait)]
+    assert waiting[1] < waiting[0], "No truck should wait as long to unload."
+
+@pytest.mark.parametrize("assign_on_departure", [False, True])
+def test_expected_wait_engines_agree(assign_on_departure) -> None:
+    """
+    Test to ensure every engine gives the same counts with the expected wait policy
+
+    Returns:
+        None
+    """
+    config = dict(num_mining_trucks=30, num_unload_stations=3, sim_duration_hrs=48, truck_unload_duration=5,
+                  travel_to_unload=30, mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=2,
+                  dispatch_policy="expected_wait", assign_on_departure=assign_on_departure)
+    loads = [lunar_Helium_3_sim(**config, engine=engine).run() for engine in ("tick", "fleet", "event")]
+    assert len(set(loads)) == 1, f"Engines should agree: {loads}"
+
+def test_invalid_dispatch_policy() -> None:
+    """
+    Test to ensure unknown policies and departure assignment without a policy are rejected
+
+    Returns:
+        None
+    """
+    config = dict(num_mining_trucks=3, num_unload_stations=1, sim_duration_hrs=1, truck_unload_duration=5,
+                  travel_to_unload=30, mining_duration_min_hrs=1, mining_duration_max_hrs=5)
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**config, dispatch_policy="random")
+    with pytest.raises(ValueError):
+        lunar_Helium_3_sim(**config, assign_on_departure=True)
+
+def test_hand_off() -> None:
+    """
+    Test to ensure released stations are handed to queued trucks at once, every one in the same minute
+
+    Returns:
+        None
+    """
+    stations = create_stations(3)
+    s_m = station_manager(stations)
+    handed = []
+    s_m.on_handoff = lambda truck_ID, station_ID, time: handed.append((truck_ID, station_ID, time))
+
+    for station in stations:
+        station.assign_truck(0)
+    for truck_ID in range(1, 6):
+        s_m.queue_truck(truck_ID)
+
+    # every station released in the same minute serves its own queue
+    for station in stations:
+        s_m.release_station(station.ID, 10)
+    assert handed == [(1, 0, 10), (2, 1, 10), (3, 2, 10)], "Each released station should take the head of its queue."
+    assert not any(station.is_available for station in stations), "No station should stay idle."
+
+    # a station with an empty queue takes the head of the longest queue
+    s_m.release_station(2, 12)
+    assert handed[-1] == (4, 2, 12), "The station should serve the longest queue, lowest station ID first."
+    assert s_m.truck_station == {5: 1}, "Handed trucks should leave their queue."
+
+    s_m.release_station(0, 15)
+    assert handed[-1] == (5, 0, 15) and not s_m.truck_station, "The last queued truck should be handed a station."
+    s_m.release_station(1, 16)
+    assert stations[1].is_available and len(handed) == 5, "A station with no queued trucks should become available."
+
+class idle_station_check:
+    """
+    Observer that counts the minutes a station is available while a truck is queued.
+    """
+    def __init__(self, manager : station_manager):
+        self.manager = manager
+        self.idle_minutes = 0
+        self.queued_minutes = 0
+
+    def update_current_time(self, current_time : float) -> None:
+        if self.manager.truck_station:
+            self.queued_minutes += 1
+            if self.manager.free_stations:
+                self.idle_minutes += 1
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        pass
+
+    def station_changed(self, station : object) -> None:
+        pass
+
+@pytest.mark.parametrize("engine", ["tick", "fleet", "event"])
+def test_no_idle_station_while_trucks_queue(engine) -> None:
+    """
+    Test to ensure no station is left available while trucks are queued
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(num_mining_trucks=40, num_unload_stations=3, sim_duration_hrs=24, truck_unload_duration=5,
+                             travel_to_unload=30, mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=6,
+                             engine=engine)
+    sim.setup()
+    check = idle_station_check(sim.station_manager)
+    sim.add_observer(check)
+    sim.advance(sim.sim_duration)
+    sim.finish()
+
+    assert check.queued_minutes > 0, "Trucks should have queued."
+    assert check.idle_minutes == 0, "A station should never be idle while a truck is queued."
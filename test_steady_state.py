@@ -0,0 +1,106 @@
+from simulator import lunar_Helium_3_sim
+from steady_state import load_series, mser, batch_means, run_until_steady
+
+import random
+import pytest
+
+base_config = dict(num_mining_trucks=20, num_unload_stations=2, sim_duration_hrs=2000,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=3)
+
+def test_mser_finds_transient() -> None:
+    """
+    Test to ensure MSER truncates a transient at the start of a series and not a stationary one
+
+    Returns:
+        None
+    """
+    rng = random.Random(1)
+    stationary = [rng.gauss(10, 1) for n in range(500)]
+    transient = [10 * n / 50 for n in range(50)] + stationary
+
+    assert 40 <= mser(transient) <= 60, "The transient should be discarded."
+    assert mser(stationary) <= 25, "Little of a stationary series should be discarded."
+    assert mser(list(range(100))) is None, "A series that keeps trending has no steady state yet."
+
+def test_batch_means() -> None:
+    """
+    Test to ensure the batch means interval holds the mean and narrows with more values
+
+    Returns:
+        None
+    """
+    rng = random.Random(2)
+    series = [rng.gauss(5, 2) for n in range(4000)]
+    mean, half_width = batch_means(series[:400])
+    more_mean, more_half_width = batch_means(series)
+
+    assert abs(more_mean - 5) < more_half_width, "The interval should hold the mean."
+    assert more_half_width < half_width, "More values should narrow the interval."
+    assert batch_means([1, 2], num_batches=5)[1] == float("inf"), "Too few values give no interval."
+
+@pytest.mark.parametrize("engine", ["tick", "fleet", "event"])
+def test_load_series(engine) -> None:
+    """
+    Test to ensure an added observer counts every load of the run
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(**{**base_config, "sim_duration_hrs": 48}, engine=engine, collect_statistics=True)
+    sim.setup()
+    series = load_series(interval=60)
+    sim.add_observer(series)
+    sim.advance(sim.sim_duration)
+    total_loads = sim.finish()
+
+    assert sum(series.loads) == total_loads, "Every load should be counted in an interval."
+    assert series.loads[0] == 0, "No load completes in the first hour."
+    assert len(series.complete(sim.sim_duration)) == 48
+
+def test_run_until_steady() -> None:
+    """
+    Test to ensure a run stops once the throughput converges, with the warm-up left out of the statistics
+
+    Returns:
+        None
+    """
+    result = run_until_steady({**base_config, "engine": "event", "collect_statistics": True},
+                              relative_precision=0.02)
+
+    assert result["converged"] and result["stopped_at_hrs"] < base_config["sim_duration_hrs"], \
+        "The run should stop early."
+    assert 0 < result["warmup_hrs"] <= result["statistics_start_hrs"], "The warm-up should be found and left out."
+    assert result["statistics"]["start_time"] == result["statistics_start_hrs"] * 60
+    assert result["half_width_per_hr"] <= 0.02 * result["loads_per_hr"]
+
+    mean_throughput = lunar_Helium_3_sim(**base_config, engine="event").run() / base_config["sim_duration_hrs"]
+    assert abs(result["loads_per_hr"] - mean_throughput) < 3 * result["half_width_per_hr"], \
+        "The estimate should match the throughput of a long run."
+
+def test_run_until_steady_stops_at_duration() -> None:
+    """
+    Test to ensure a run that cannot reach the precision stops at its duration
+
+    Returns:
+        None
+    """
+    result = run_until_steady({**base_config, "sim_duration_hrs": 48}, relative_precision=0.001, check_every_hrs=12)
+
+    assert not result["converged"] and result["stopped_at_hrs"] == 48
+    assert result["statistics"] is None
+
+def test_statistics_reset_after_warmup() -> None:
+    """
+    Test to ensure the statistics are reset soon after the warm-up, not at the next precision check
+
+    Returns:
+        None
+    """
+    result = run_until_steady({**base_config, "engine": "event", "collect_statistics": True},
+                              relative_precision=0.02, check_every_hrs=48)
+
+    assert result["warmup_hrs"] <= result["statistics_start_hrs"] < 48, \
+        "The statistics should be reset before the first precision check."
+    assert result["stopped_at_hrs"] % 48 == result["statistics_start_hrs"] % 48, \
+        "Precision checks should follow every check_every_hrs after the warm-up."
@@ -0,0 +1,88 @@
+from simulator import lunar_Helium_3_sim
+from sweep import parameter_grid, derive_seed, run_sweep, write_csv
+
+import csv
+import pytest
+
+base_config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=24,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, engine="event")
+
+def test_parameter_grid() -> None:
+    """
+    Test to ensure every combination of the swept parameters is generated
+
+    Returns:
+        None
+    """
+    configs = parameter_grid(base_config, num_mining_trucks=[5, 10, 20], num_unload_stations=[1, 2])
+
+    assert len(configs) == 6, "There should be one configuration per combination."
+    assert {(c["num_mining_trucks"], c["num_unload_stations"]) for c in configs} == \
+        {(n, m) for n in [5, 10, 20] for m in [1, 2]}, "Every combination should be present."
+    assert all(c["travel_to_unload"] == 30 for c in configs), "Base parameters should be kept."
+
+def test_sweep_runs_are_reproducible() -> None:
+    """
+    Test to ensure every run of a sweep can be reproduced from its seed
+
+    Returns:
+        None
+    """
+    configs = parameter_grid(base_config, num_unload_stations=[1, 2])
+    rows = list(run_sweep(configs, num_replications=3, master_seed=42, processes=2))
+
+    assert len(rows) == 6, "There should be one row per run."
+    assert len({row["seed"] for row in rows}) == 6, "Every run should have its own seed."
+
+    for row in rows:
+        assert row["seed"] == derive_seed(42, row["config_index"], row["replication"])
+        sim = lunar_Helium_3_sim(**configs[row["config_index"]], seed=row["seed"])
+        assert sim.run() == row["total_loads"], "Run should be reproducible from its seed."
+
+def test_seeded_configs_rejected() -> None:
+    """
+    Test to ensure a configuration that sets its own seed is rejected before anything runs
+
+    Returns:
+        None
+    """
+    with pytest.raises(ValueError, match="seed"):
+        parameter_grid({**base_config, "seed": 1}, num_unload_stations=[1, 2])
+    with pytest.raises(ValueError, match="seed"):
+        parameter_grid(base_config, seed=[1, 2])
+    with pytest.raises(ValueError, match="seed"):
+        next(run_sweep([{**base_config, "seed": 1}], num_replications=1, master_seed=42, processes=1))
+
+def test_write_csv(tmp_path) -> None:
+    """
+    Test to ensure result rows are written to a CSV table
+
+    Returns:
+        None
+    """
+    rows = run_sweep([base_config], num_replications=2, master_seed=1, processes=1)
+    file_path = tmp_path / "sweep.csv"
+
+    assert write_csv(rows, file_path) == 2, "Both rows should be written."
+    with open(file_path) as csv_file:
+        table = list(csv.DictReader(csv_file))
+    assert {row["replication"] for row in table} == {"0", "1"}, "Every replication should be in the table."
+
+def test_write_csv_mixed_columns(tmp_path) -> None:
+    """
+    Test to ensure rows with different columns share one table, whichever arrives first
+
+    Returns:
+        None
+    """
+    configs = [base_config, {**base_config, "collect_statistics": True, "estimate_gradients": True}]
+    rows = sorted(run_sweep(configs, num_replications=1, master_seed=1, processes=1), key=lambda row: row["config_index"])
+    file_path = tmp_path / "sweep.csv"
+
+    assert write_csv(rows, file_path) == 2, "Both rows should be written."
+    with open(file_path) as csv_file:
+        table = list(csv.DictReader(csv_file))
+    assert table[0]["statistics"] == "" and table[0]["collect_statistics"] == "", \
+        "Columns a row does not have should be empty."
+    assert table[1]["statistics"] and table[1]["gradients"], "Columns of later rows should be kept."
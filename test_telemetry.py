@@ -0,0 +1,143 @@
+from simulator import lunar_Helium_3_sim
+from telemetry import telemetry_server, telemetry_publisher, read_frames, merge_frame, TRUCK_STATE_CODES
+
+import json
+import socket
+import threading
+import time
+import pytest
+
+base_config = dict(num_mining_trucks=10, num_unload_stations=2, sim_duration_hrs=24,
+                   truck_unload_duration=5, travel_to_unload=30,
+                   mining_duration_min_hrs=1, mining_duration_max_hrs=5, seed=1)
+
+def final_state(frames : list) -> dict:
+    """
+    Merges a subscriber's frames into the last state it saw.
+    """
+    state = {"time": 0, "loads": 0, "trucks": {}, "stations": {}}
+    for frame in frames:
+        merge_frame(state, frame)
+    return state
+
+def check_state(state : dict, sim : lunar_Helium_3_sim) -> None:
+    """
+    Checks a merged telemetry state against the simulation's trucks and stations.
+    """
+    assert state["loads"] == sim.total_loads, "Telemetry loads should match the simulation."
+    assert [state["trucks"][str(truck.ID)] for truck in sim.mining_trucks] == \
+        [TRUCK_STATE_CODES[truck.state.__name__] for truck in sim.mining_trucks], \
+        "Telemetry truck states should match the simulation."
+    assert [state["stations"][str(station.ID)] for station in sim.unloading_stations] == \
+        [[0 if station.is_available else 1, len(station.truck_queue)] for station in sim.unloading_stations], \
+        "Telemetry station states should match the simulation."
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+def test_telemetry_stream(engine) -> None:
+    """
+    Test to ensure the frames streamed to several subscribers add up to the final state of the run
+
+    Returns:
+        None
+    """
+    with telemetry_server(interval=60) as server:
+        received = [[], []]
+        readers = [threading.Thread(target=lambda frames=frames: frames.extend(read_frames(server.address, timeout=30)))
+                   for frames in received]
+        for reader in readers:
+            reader.start()
+        while len(server._subscribers) < len(readers):
+            time.sleep(0.01)
+
+        sim = lunar_Helium_3_sim(**base_config, engine=engine, telemetry=server)
+        sim.run()
+        for reader in readers:
+            reader.join()
+
+    for frames in received:
+        assert frames[0]["start"] and frames[0]["state_names"][0] == "start_mining", \
+            "The first frame should hold the state names."
+        assert frames[-1]["end"] and frames[-1]["time"] == sim.sim_duration, "The last frame should end the run."
+        assert all(len(frame["trucks"]) <= base_config["num_mining_trucks"] for frame in frames), \
+            "A frame should hold each truck at most once."
+        check_state(final_state(frames), sim)
+
+def test_slow_subscriber_does_not_block() -> None:
+    """
+    Test to ensure a subscriber that does not read never slows the simulation
+    and gets the latest state when it catches up
+
+    Returns:
+        None
+    """
+    config = {**base_config, "num_mining_trucks": 20, "num_unload_stations": 2, "sim_duration_hrs": 72}
+    with telemetry_server(interval=1) as server:
+        slow = socket.create_connection(server.address, timeout=30)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        while not server._subscribers:
+            time.sleep(0.01)
+
+        sim = lunar_Helium_3_sim(**config, engine="event", telemetry=server)
+        sim.run()
+        assert server.frames_merged > 0, "Frames should be merged for the subscriber that does not read."
+
+        frames = []
+        with slow, slow.makefile("rb") as lines:
+            for line in lines:
+                frames.append(json.loads(line))
+                if frames[-1].get("end"):
+                    break
+
+    assert len(frames) < server.frames_published, "The slow subscriber should skip stale frames."
+    check_state(final_state(frames), sim)
+
+def test_full_buffer_keeps_changes() -> None:
+    """
+    Test to ensure frames the server has no room for are merged into the next one
+
+    Returns:
+        None
+    """
+    class full_server:
+        def __init__(self):
+            self.frames = []
+            self.full = True
+
+        def publish(self, frame, force=False):
+            if self.full and not force:
+                return False
+            self.frames.append(frame)
+            return True
+
+    server = full_server()
+    publisher = telemetry_publisher(server, num_trucks=3, num_stations=1, interval=1)
+    publisher.update_current_time(0)
+    publisher.truck_state_changed(1, "mining_in_progress", 0)
+    publisher.update_current_time(1)
+    assert server.frames == [], "No frame should be added to a full buffer."
+
+    server.full = False
+    publisher.truck_state_changed(1, "travel_to_unload", 1)
+    publisher.update_current_time(2)
+    assert len(server.frames) == 1 and server.frames[0]["start"], "The held changes should be published."
+    assert server.frames[0]["trucks"] == {0: 0, 1: 2, 2: 0}, "Every change should be kept, latest first."
+
+def test_unix_socket(tmp_path) -> None:
+    """
+    Test to ensure the server can listen on a Unix socket
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / "telemetry.sock")
+    with telemetry_server(path=path, interval=120) as server:
+        frames = []
+        reader = threading.Thread(target=lambda: frames.extend(read_frames(path, timeout=30)))
+        reader.start()
+        while not server._subscribers:
+            time.sleep(0.01)
+        sim = lunar_Helium_3_sim(**base_config, engine="event", telemetry=server)
+        sim.run()
+        reader.join()
+
+    check_state(final_state(frames), sim)
@@ -0,0 +1,63 @@
+from simulator import lunar_Helium_3_sim
+from stations import unload_stations as m_unload_station
+from trace_recorder import trace_recorder, load_trace, export_csv, TRUCK, STATION
+
+import csv
+import numpy as np
+import pytest
+
+def test_trace_intervals(tmp_path) -> None:
+    """
+    Test to ensure the trace covers every truck for the full run without gaps
+
+    Returns:
+        None
+    """
+    sim = lunar_Helium_3_sim(10, 2, 72, 5, 30, 1, 5, engine="event", seed=3, trace_path=str(tmp_path))
+    sim.run()
+    trace = load_trace(str(tmp_path))
+
+    assert isinstance(trace["start"], np.memmap), "Columns should be memory-mapped."
+    trucks = trace["kind"] == TRUCK
+    for truck_ID in range(10):
+        rows = trucks & (trace["entity_id"] == truck_ID)
+        start, end = trace["start"][rows], trace["end"][rows]
+        assert (start[1:] == end[:-1]).all(), "Truck intervals should follow each other."
+        assert (start[0], end[-1]) == (0, 72 * 60), "Truck intervals should cover the full run."
+    assert (trace["end"] > trace["start"]).all(), "Zero-length intervals should not be recorded."
+
+    # a load is counted when its load_complete interval ends before the end of the run
+    load_complete = trucks & (trace["state"] == 5) & (trace["end"] < 72 * 60)
+    assert load_complete.sum() == sim.total_loads, "Every completed load should have a load_complete interval."
+
+def test_trace_chunks_and_csv(tmp_path) -> None:
+    """
+    Test to ensure rows written across several chunks are loaded and exported in order
+
+    Returns:
+        None
+    """
+    station = m_unload_station(station_ID=0)
+    recorder = trace_recorder(str(tmp_path / "trace"), num_trucks=1, num_stations=1, chunk_size=2)
+
+    for time, state in enumerate(["mining_in_progress", "travel_to_unload", "wait_to_unload", "unloading"], start=1):
+        recorder.truck_state_changed(0, state, time * 10)
+    recorder.update_current_time(40)
+    station.is_available = False
+    recorder.station_changed(station)
+    assert recorder.close(50) == 7, "Trace should have 5 truck rows and 2 station rows."
+
+    trace = load_trace(str(tmp_path / "trace"))
+    assert list(trace["end"]) == [10, 20, 30, 40, 40, 50, 50], "Rows should be loaded in order."
+    assert list(trace["kind"]) == [TRUCK] * 4 + [STATION, TRUCK, STATION]
+
+    recorder = trace_recorder(str(tmp_path / "repeat"), num_trucks=1, num_stations=1)
+    recorder.truck_state_changed(0, "mining_in_progress", 0)
+    recorder.truck_state_changed(0, "travel_to_unload", 60)
+    assert recorder.close(90) == 3, "Only mining, travel and the idle station should get rows, not start_mining at time 0."
+
+    assert export_csv(str(tmp_path / "trace"), str(tmp_path / "trace.csv")) == 7
+    with open(tmp_path / "trace.csv") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert (rows[4]["kind"], rows[4]["state"]) == ("station", "idle"), "Station rows should use state names."
+    assert rows[5]["state"] == "unloading", "Truck rows should use state names."
@@ -0,0 +1,223 @@
+from fleet import STATE_NAMES
+
+from array import array
+import csv
+import json
+import os
+import sys
+import logging
+logger = logging.getLogger(__name__)
+
+# entity kinds
+TRUCK = 0
+STATION = 1
+
+STATION_STATE_NAMES = ("idle", "busy")
+TRUCK_STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+# column name, array typecode, numpy dtype
+TRACE_COLUMNS = (("kind", "B", "u1"),
+                 ("entity_id", "i", "i4"),
+                 ("state", "B", "u1"),
+                 ("start", "d", "f8"),
+                 ("end", "d", "f8"))
+
+METADATA_FILE = "trace.json"
+
+class trace_recorder:
+    """
+    Represents a recorder of truck and station state intervals.
+
+    Only state changes are recorded, as (kind, entity_id, state, start, end)
+    rows, where kind is TRUCK or STATION. States left in the minute they were
+    entered, e.g. start_mining at time 0, take no time and get no row. Rows are kept in typed arrays and
+    written in chunks to one binary file per column in the trace directory, so
+    each column can be memory-mapped as a NumPy array with load_trace().
+
+    Attributes:
+        path (str): Trace directory.
+        num_trucks (int): Number of trucks.
+        num_stations (int): Number of stations.
+        chunk_size (int): Number of rows kept in memory before writing a chunk.
+
+    Methods:
+        update_current_time(): Updates the current simulation time.
+        truck_state_changed(): Records the end of a truck state.
+        station_changed(): Records the end of a station idle or busy period.
+        close(): Ends every open interval and writes the remaining rows.
+    """
+
+    def __init__(self,
+                path : str,
+                num_trucks : int,
+                num_stations : int,
+                chunk_size : int = 65536):
+        """
+        Initializes the trace_recorder class and creates the trace directory.
+
+        Args:
+            path (str): Trace directory.
+            num_trucks (int): Number of trucks.
+            num_stations (int): Number of stations.
+            chunk_size (int): Number of rows kept in memory before writing a chunk.
+        """
+        self.path = path
+        self.num_trucks = num_trucks
+        self.num_stations = num_stations
+        self.chunk_size = chunk_size
+        self.current_time = 0
+        self.rows = 0
+
+        # every truck starts in start_mining and every station idle at time 0
+        self.truck_state = [TRUCK_STATE_CODES["start_mining"]] * num_trucks
+        self.truck_start = [0.0] * num_trucks
+        self.station_state = [0] * num_stations
+        self.station_start = [0.0] * num_stations
+
+        os.makedirs(path, exist_ok=True)
+        self._buffers = {name: array(typecode) for name, typecode, dtype in TRACE_COLUMNS}
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name, typecode, dtype in TRACE_COLUMNS}
+
+    def update_current_time(self, current_time : float) -> None:
+        """
+        Updates the current simulation time.
+
+        Args:
+            current_time (float): current time from simulator
+        Returns:
+            None
+        """
+        self.current_time = current_time
+
+    def truck_state_changed(self, truck_ID : int, state : str, time : float) -> None:
+        """
+        Records the end of the truck's previous state.
+
+        Args:
+            truck_ID (int): Truck ID.
+            state (str): Name of the new state.
+            time (float): Time of the change.
+        Returns:
+            None
+        """
+        self._append(TRUCK, truck_ID, self.truck_state[truck_ID], self.truck_start[truck_ID], time)
+        self.truck_state[truck_ID] = TRUCK_STATE_CODES[state]
+        self.truck_start[truck_ID] = time
+
+    def station_changed(self, station : object) -> None:
+        """
+        Records the end of the station's idle or busy period, if it changed.
+
+        Args:
+            station (unload_stations): Station that changed.
+        Returns:
+            None
+        """
+        state = 0 if station.is_available else 1
+        if state == self.station_state[station.ID]:
+            return
+        self._append(STATION, station.ID, self.station_state[station.ID], self.station_start[station.ID], self.current_time)
+        self.station_state[station.ID] = state
+        self.station_start[station.ID] = self.current_time
+
+    def close(self, end_time : float) -> int:
+        """
+        Ends every open interval at end_time, writes the remaining rows and
+        the trace metadata.
+
+        Args:
+            end_time (float): Simulation end time.
+        Returns:
+            int: Number of rows in the trace.
+        """
+        for truck_ID in range(self.num_trucks):
+            self._append(TRUCK, truck_ID, self.truck_state[truck_ID], self.truck_start[truck_ID], end_time)
+        for station_ID in range(self.num_stations):
+            self._append(STATION, station_ID, self.station_state[station_ID], self.station_start[station_ID], end_time)
+        self._flush()
+        for column_file in self._files.values():
+            column_file.close()
+
+        metadata = {"rows": self.rows,
+                    "byteorder": sys.byteorder,
+                    "columns": {name: dtype for name, typecode, dtype in TRACE_COLUMNS},
+                    "kinds": ["truck", "station"],
+                    "states": {"truck": list(STATE_NAMES), "station": list(STATION_STATE_NAMES)}}
+        with open(os.path.join(self.path, METADATA_FILE), "w") as metadata_file:
+            json.dump(metadata, metadata_file, indent=2)
+
+        logger.info(f"Trace with {self.rows} rows written to {self.path}")
+        return self.rows
+
+    def _append(self, kind : int, entity_id : int, state : int, start : float, end : float) -> None:
+        """
+        Appends one interval row, writing a chunk when the buffers are full.
+        Zero-length intervals are skipped.
+        """
+        if end == start:
+            return
+        buffers = self._buffers
+        buffers["kind"].append(kind)
+        buffers["entity_id"].append(entity_id)
+        buffers["state"].append(state)
+        buffers["start"].append(start)
+        buffers["end"].append(end)
+        self.rows += 1
+        if len(buffers["kind"]) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Writes the buffered rows to the column files.
+        """
+        for name, buffer in self._buffers.items():
+            buffer.tofile(self._files[name])
+            del buffer[:]
+
+def load_trace(path : str) -> dict:
+    """
+    Memory-maps a trace written by trace_recorder. No data is copied.
+
+    Args:
+        path (str): Trace directory.
+    Returns:
+        dict: Column name mapped to a read-only NumPy memmap, plus "metadata".
+    """
+    # NumPy is only needed to read a trace back, not to record one
+    import numpy as np
+
+    with open(os.path.join(path, METADATA_FILE)) as metadata_file:
+        metadata = json.load(metadata_file)
+
+    byteorder = "<" if metadata["byteorder"] == "little" else ">"
+    trace = {"metadata": metadata}
+    for name, dtype in metadata["columns"].items():
+        if metadata["rows"] == 0:
+            trace[name] = np.empty(0, dtype=byteorder + dtype)
+            continue
+        trace[name] = np.memmap(os.path.join(path, f"{name}.bin"), dtype=byteorder + dtype,
+                                mode="r", shape=(metadata["rows"],))
+    return trace
+
+def export_csv(path : str, csv_path : str) -> int:
+    """
+    Exports a trace to a CSV file with state names instead of state codes.
+
+    Args:
+        path (str): Trace directory.
+        csv_path (str): Path of the CSV file.
+    Returns:
+        int: Number of rows written.
+    """
+    trace = load_trace(path)
+    kinds = trace["metadata"]["kinds"]
+    states = trace["metadata"]["states"]
+
+    with open(csv_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["kind", "entity_id", "state", "start", "end"])
+        for kind, entity_id, state, start, end in zip(trace["kind"].tolist(), trace["entity_id"].tolist(),
+                                                      trace["state"].tolist(), trace["start"].tolist(),
+                                                      trace["end"].tolist()):
+            writer.writerow([kinds[kind], entity_id, states[kinds[kind]][state], start, end])
+    return trace["metadata"]["rows"]